@@ -13,11 +13,12 @@ if os.path.exists("output"):
     for f in os.listdir("output"):
         os.remove(os.path.join("output", f))
 
-from server.database.database import init_database, execute_query
+from server.database.database import init_database, execute_query, get_db_connection, analyze_database, publish_snapshot
 from server.scraper.seasonScraper import SeasonScraper
 from server.scraper.eventScraper import EventScraper
 from server.scraper.matchScraper import MatchScraper
 from server.scraper.gameScraper import GameScraper
+from server.analytics.lake import ensure_lake_tables
 
 os.makedirs("logs", exist_ok=True)
 log_file = os.path.join("logs", "scraper.log")
@@ -31,6 +32,111 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+def post_scrape_tasks():
+    """Tâches à lancer après un scraping (exports, données précalculées...)"""
+    try:
+        from server.analytics.dashboard import refresh_dashboard
+        conn = get_db_connection()
+        try:
+            refreshed = refresh_dashboard(conn)
+            conn.commit()
+        finally:
+            conn.close()
+        logger.info(f"Dashboard tables refreshed: {refreshed['players']} players, {refreshed['events']} events")
+    except Exception as e:
+        logger.error(f"Error refreshing dashboard tables: {e}", exc_info=True)
+
+    try:
+        from server.analytics.map_vetoes import refresh_map_vetoes
+        conn = get_db_connection()
+        try:
+            refreshed = refresh_map_vetoes(conn)
+            conn.commit()
+        finally:
+            conn.close()
+        logger.info(f"Map vetoes table refreshed: {refreshed} matches")
+    except Exception as e:
+        logger.error(f"Error refreshing map vetoes table: {e}", exc_info=True)
+
+    try:
+        from server.analytics.ratings import update_ratings
+        conn = get_db_connection()
+        try:
+            played = update_ratings(conn)
+            conn.commit()
+        finally:
+            conn.close()
+        logger.info(f"Team ratings updated: {played['series']} series, {played['map']} maps")
+    except Exception as e:
+        logger.error(f"Error updating team ratings: {e}", exc_info=True)
+
+    try:
+        from server.analytics.round_states import update_round_states
+        conn = get_db_connection()
+        try:
+            counted = update_round_states(conn)
+            conn.commit()
+        finally:
+            conn.close()
+        logger.info(f"Round state tables updated: {counted} games")
+    except ImportError as e:
+        logger.warning(f"Skipping round state tables: {e}")
+    except Exception as e:
+        logger.error(f"Error updating round state tables: {e}", exc_info=True)
+
+    try:
+        from server.analytics.economy_cube import update_economy_cube
+        conn = get_db_connection()
+        try:
+            counted = update_economy_cube(conn)
+            conn.commit()
+        finally:
+            conn.close()
+        logger.info(f"Economy cube updated: {counted} games")
+    except Exception as e:
+        logger.error(f"Error updating economy cube: {e}", exc_info=True)
+
+    try:
+        from server.analytics.player_embedding import update_player_embeddings
+        conn = get_db_connection()
+        try:
+            projected = update_player_embeddings(conn)
+            conn.commit()
+        finally:
+            conn.close()
+        logger.info(f"Player embeddings updated: {projected}")
+    except ImportError as e:
+        logger.warning(f"Skipping player embeddings: {e}")
+    except Exception as e:
+        logger.error(f"Error updating player embeddings: {e}", exc_info=True)
+
+    try:
+        conn = get_db_connection()
+        try:
+            analyze_database(conn)
+            conn.commit()
+        finally:
+            conn.close()
+        logger.info("Database statistics updated (ANALYZE)")
+    except Exception as e:
+        logger.error(f"Error updating database statistics: {e}", exc_info=True)
+
+    try:
+        from server.analytics.lake import export_to_parquet
+        written = export_to_parquet()
+        logger.info(f"Parquet export done: {sum(written.values())} partitions written")
+    except ImportError as e:
+        logger.warning(f"Skipping parquet export: {e}")
+    except Exception as e:
+        logger.error(f"Error exporting to parquet: {e}", exc_info=True)
+
+    # en dernier : le site web passe sur les nouvelles données (stats sqlite comprises)
+    try:
+        snapshot_path = publish_snapshot()
+        logger.info(f"Snapshot published: {snapshot_path}")
+    except Exception as e:
+        logger.error(f"Error publishing snapshot: {e}", exc_info=True)
+
 def main(
         oldest_date: str = "2003-07-18", 
         seasons: list = None, 
@@ -47,6 +153,13 @@ def main(
     
     try:
         init_database(overwrite=overwrite_db)
+        # events modifiés notés dès les premières écritures (export parquet incrémental)
+        conn = get_db_connection()
+        try:
+            ensure_lake_tables(conn)
+            conn.commit()
+        finally:
+            conn.close()
     except:
         print("Failed to initialize the database. Exiting.")
         logger.error("Failed to initialize the database", exc_info=True)
@@ -127,6 +240,8 @@ def main(
     if not matches_to_collect:
         logger.info("No new matches to process. Exiting.")
         print("No new matches to process. Exiting.")
+        # les events/saisons ont pu être mis à jour : snapshot à republier (tâches incrémentales, peu coûteuses)
+        post_scrape_tasks()
         return
 
     match_scraper = MatchScraper(delay=request_delay, full_log=False, logger=logger)
@@ -196,6 +311,8 @@ def main(
             continue
 
     game_scraper.close()
+
+    post_scrape_tasks()
     
     logger.info("Scraping completed!")
 
@@ -0,0 +1,3 @@
+"""
+Modules d'analyse des données de la base v2 (export colonne, stats précalculées...)
+"""
@@ -0,0 +1,160 @@
+"""
+Pick rate, win rate, compositions et paires d'agents à partir de player_stats.
+Chaque composition (5 agents d'une équipe sur une map) est un masque de bits (un bit par agent) :
+tous les comptages se font en une passe vectorisée (numpy), par map, patch, région ou event.
+"""
+
+from typing import Any, Dict, List, Optional
+import sqlite3
+
+try:
+    import numpy as np
+except ImportError:  # numpy est optionnel
+    np = None
+
+# dimensions de découpage : paramètre -> colonne des compositions chargées
+SLICE_DIMENSIONS = ('map', 'patch', 'region', 'event_id')
+TOP_COMPOSITIONS = 10
+
+
+def _require_numpy():
+    if np is None:
+        raise ImportError("numpy est requis pour les stats d'agents (pip install numpy)")
+
+
+class Compositions:
+    """Une ligne par équipe et par game : masque des agents joués, victoire et dimensions de découpage"""
+
+    def __init__(self, agents, masks, won, dimensions):
+        self.agents = agents  # nom de l'agent du bit i
+        self.masks = masks
+        self.won = won
+        self.dimensions = dimensions  # nom -> tableau de valeurs (objets)
+
+    def __len__(self):
+        return len(self.masks)
+
+    def agent_bits(self, selection=None) -> "np.ndarray":
+        """Matrice (compositions x agents) de 0/1"""
+        masks = self.masks if selection is None else self.masks[selection]
+        return ((masks[:, None] >> np.arange(len(self.agents), dtype=np.int64)) & 1).astype(np.int64)
+
+    def decode(self, mask: int) -> List[str]:
+        return [agent for i, agent in enumerate(self.agents) if mask >> i & 1]
+
+
+def load_compositions(conn: sqlite3.Connection) -> Compositions:
+    """Lit player_stats une fois et construit les masques de toutes les compositions"""
+    _require_numpy()
+    rows = conn.execute("""
+        SELECT ps.game_id, ps.team_id, ps.agent_name, g.map, CAST(g.win AS INTEGER) = ps.team_id,
+               m.patch, t.region, m.event_id
+        FROM player_stats ps
+        JOIN games g ON g.game_id = ps.game_id
+        JOIN matches m ON m.match_id = g.match_id
+        LEFT JOIN teams t ON t.id = ps.team_id
+        WHERE ps.agent_name IS NOT NULL AND ps.agent_name != '' AND ps.team_id IS NOT NULL
+        ORDER BY ps.game_id, ps.team_id
+    """).fetchall()
+
+    agents = sorted({row[2] for row in rows})
+    if len(agents) > 63:
+        raise ValueError(f"Trop d'agents pour un masque sur 64 bits : {len(agents)}")
+    agent_bit = {agent: i for i, agent in enumerate(agents)}
+
+    keys = np.array([(row[0], row[1]) for row in rows], dtype=np.int64).reshape(-1, 2)
+    _, first_row, composition = np.unique(keys, axis=0, return_index=True, return_inverse=True)
+    composition = composition.reshape(-1)
+    bits = np.array([agent_bit[row[2]] for row in rows], dtype=np.int64)
+    masks = np.zeros(len(first_row), dtype=np.int64)
+    np.bitwise_or.at(masks, composition, np.left_shift(1, bits))
+
+    # les autres colonnes sont les mêmes pour les 5 joueurs : on prend la première ligne de chaque équipe
+    first_rows = [rows[i] for i in first_row.tolist()]
+    won = np.array([bool(row[4]) for row in first_rows])
+    dimensions = {
+        name: np.array([row[column] for row in first_rows], dtype=object)
+        for name, column in zip(SLICE_DIMENSIONS, (3, 5, 6, 7))
+    }
+    return Compositions(agents, masks, won, dimensions)
+
+
+def _slice_stats(compositions: Compositions, masks, won, bits, top: int) -> Dict[str, Any]:
+    total = len(masks)
+
+    picks = bits.sum(axis=0)
+    wins = won @ bits
+    agents = [
+        {
+            "agent": agent,
+            "picks": int(picks[i]),
+            "pick_rate": round(float(picks[i]) / total, 4),
+            "wins": int(wins[i]),
+            "win_rate": round(float(wins[i]) / picks[i], 4),
+        }
+        for i, agent in enumerate(compositions.agents) if picks[i]
+    ]
+    agents.sort(key=lambda agent: agent["picks"], reverse=True)
+
+    unique_masks, inverse, counts = np.unique(masks, return_inverse=True, return_counts=True)
+    composition_wins = np.bincount(inverse.reshape(-1), weights=won, minlength=len(unique_masks))
+    order = np.argsort(-counts, kind='stable')[:top]
+    top_compositions = [
+        {
+            "agents": compositions.decode(int(unique_masks[i])),
+            "games": int(counts[i]),
+            "wins": int(composition_wins[i]),
+            "win_rate": round(float(composition_wins[i]) / counts[i], 4),
+        }
+        for i in order
+    ]
+
+    # nb de compositions où deux agents sont joués ensemble (diagonale = picks)
+    picked = np.nonzero(picks)[0]
+    co_occurrence = bits[:, picked].T @ bits[:, picked]
+    return {
+        "team_games": total,
+        "distinct_compositions": len(unique_masks),
+        "agents": agents,
+        "compositions": top_compositions,
+        "co_occurrence": {
+            "agents": [compositions.agents[i] for i in picked],
+            "matrix": co_occurrence.tolist(),
+        },
+    }
+
+
+def agent_stats(compositions: Compositions,
+                filters: Optional[Dict[str, Any]] = None,
+                by: Optional[str] = None,
+                top: int = TOP_COMPOSITIONS) -> List[Dict[str, Any]]:
+    """
+    Stats des agents sur les compositions filtrées (ex: {"map": "Bind", "region": "emea"}),
+    une entrée par valeur de la dimension `by` (ou une seule pour tout). ValueError si dimension inconnue.
+    """
+    for name in list(filters or {}) + ([by] if by else []):
+        if name not in SLICE_DIMENSIONS:
+            raise ValueError(f"Dimension inconnue : {name} (possibles : {', '.join(SLICE_DIMENSIONS)})")
+
+    selection = np.ones(len(compositions), dtype=bool)
+    for name, value in (filters or {}).items():
+        column = compositions.dimensions[name]
+        selection &= column == (int(value) if name == 'event_id' else value)
+
+    masks = compositions.masks[selection]
+    won = compositions.won[selection].astype(np.int64)
+    bits = compositions.agent_bits(selection)  # une seule fois pour toutes les tranches
+    if by is None:
+        return [dict(_slice_stats(compositions, masks, won, bits, top), slice=None)] if len(masks) else []
+
+    # tranches = lignes regroupées par valeur de la dimension (un seul tri)
+    values = compositions.dimensions[by][selection].tolist()
+    slice_values = sorted(set(values), key=lambda value: (value is None, str(value)))
+    codes = {value: i for i, value in enumerate(slice_values)}
+    slice_of_row = np.array([codes[value] for value in values], dtype=np.int64)
+    order = np.argsort(slice_of_row, kind='stable')
+    bounds = np.cumsum(np.bincount(slice_of_row, minlength=len(slice_values)))[:-1]
+    return [
+        dict(_slice_stats(compositions, masks[rows], won[rows], bits[rows], top), slice=value)
+        for value, rows in zip(slice_values, np.split(order, bounds))
+    ]
@@ -0,0 +1,208 @@
+"""
+Tables précalculées pour le dashboard (compteurs, top joueurs, victoires des régions en inter),
+mises à jour de façon incrémentale après chaque scraping
+"""
+
+from typing import Any, Dict, List
+import sqlite3
+
+from ..database.database import get_meta, set_meta, bump_write_generation
+
+# dernières lignes déjà prises en compte (rowid), dans db_meta
+PLAYER_STATS_WATERMARK_KEY = 'dashboard_player_stats_rowid'
+MATCH_TEAMS_WATERMARK_KEY = 'dashboard_match_teams_rowid'
+
+COUNTED_TABLES = ['matches', 'games', 'players', 'teams', 'events']
+INTER_REGION = 'inter'  # région des events internationaux (voir SeasonScraper._parse_region_and_name)
+
+# métrique demandée -> colonne de dashboard_player_totals
+PLAYER_METRICS = {
+    'acs': 'acs',
+    'k': 'kills',
+    'd': 'deaths',
+    'a': 'assists',
+    'kd': 'kd',
+    'kast': 'kast',
+    'adr': 'adr',
+    'hs': 'hs',
+    'fkdiff': 'fkdiff',
+}
+MIN_GAMES = 10  # pour ne pas classer les joueurs avec 2 maps jouées
+
+DASHBOARD_SCHEMA = [
+    """
+    CREATE TABLE IF NOT EXISTS dashboard_counts (
+        name TEXT PRIMARY KEY,
+        value INTEGER
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS dashboard_player_totals (
+        player_id INTEGER PRIMARY KEY,
+        team_id INTEGER,  -- équipe de la dernière partie jouée
+        games INTEGER,
+        kills INTEGER,
+        deaths INTEGER,
+        assists INTEGER,
+        first_kills INTEGER,
+        first_deaths INTEGER,
+        acs REAL,
+        kd REAL,
+        kast REAL,
+        adr REAL,
+        hs REAL,
+        fkdiff INTEGER
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS dashboard_region_wins (
+        event_id INTEGER,
+        region TEXT,
+        matches INTEGER,
+        wins INTEGER,
+        PRIMARY KEY (event_id, region)
+    )
+    """,
+    # recalcul des seuls joueurs touchés par un scraping
+    "CREATE INDEX IF NOT EXISTS idx_player_stats_player_id ON player_stats (player_id)",
+]
+
+
+def ensure_dashboard_tables(conn: sqlite3.Connection) -> None:
+    for statement in DASHBOARD_SCHEMA:
+        conn.execute(statement)
+
+
+def _refresh_counts(conn: sqlite3.Connection) -> bool:
+    """Recompte les petites tables, True si un compteur a changé"""
+    previous = get_counts(conn)
+    counts = {table: conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0] for table in COUNTED_TABLES}
+    conn.executemany("INSERT OR REPLACE INTO dashboard_counts (name, value) VALUES (?, ?)", counts.items())
+    return counts != previous
+
+
+def _refresh_player_totals(conn: sqlite3.Connection, since_rowid: int) -> int:
+    """Recalcule les totaux des joueurs ayant des lignes de player_stats après since_rowid"""
+    players = [row[0] for row in conn.execute(
+        "SELECT DISTINCT player_id FROM player_stats WHERE id > ? AND player_id IS NOT NULL", (since_rowid,)
+    )]
+    if not players:
+        return 0
+
+    conn.execute("CREATE TEMP TABLE IF NOT EXISTS dashboard_dirty_players (player_id INTEGER PRIMARY KEY)")
+    conn.execute("DELETE FROM dashboard_dirty_players")
+    conn.executemany("INSERT INTO dashboard_dirty_players (player_id) VALUES (?)", [(p,) for p in players])
+
+    # team_id vient de la ligne du MAX(game_id) (colonne "nue" avec un seul max() dans sqlite)
+    conn.execute("""
+        INSERT OR REPLACE INTO dashboard_player_totals (
+            player_id, team_id, games, kills, deaths, assists, first_kills, first_deaths,
+            acs, kd, kast, adr, hs, fkdiff
+        )
+        SELECT player_id, team_id, games, kills, deaths, assists, first_kills, first_deaths,
+               acs, kd, kast, adr, hs, fkdiff
+        FROM (
+            SELECT
+                ps.player_id, ps.team_id, MAX(ps.game_id) AS last_game, COUNT(*) AS games,
+                TOTAL(ps.k_both) AS kills, TOTAL(ps.d_both) AS deaths, TOTAL(ps.a_both) AS assists,
+                TOTAL(ps.fk_both) AS first_kills, TOTAL(ps.fd_both) AS first_deaths,
+                AVG(ps.acs_both) AS acs,
+                TOTAL(ps.k_both) / NULLIF(TOTAL(ps.d_both), 0) AS kd,
+                AVG(ps.kast_both) AS kast, AVG(ps.adr_both) AS adr, AVG(ps.hs_both) AS hs,
+                TOTAL(ps.fk_both) - TOTAL(ps.fd_both) AS fkdiff
+            FROM player_stats ps
+            WHERE ps.player_id IN (SELECT player_id FROM dashboard_dirty_players)
+            GROUP BY ps.player_id
+        )
+    """)
+    return len(players)
+
+
+def _refresh_region_wins(conn: sqlite3.Connection, since_rowid: int) -> int:
+    """Recalcule les victoires par région des events inter ayant de nouveaux matchs depuis since_rowid"""
+    events = [row[0] for row in conn.execute("""
+        SELECT DISTINCT m.event_id
+        FROM match_teams mt
+        JOIN matches m ON m.match_id = mt.match_id
+        JOIN events e ON e.id = m.event_id
+        WHERE mt.id > ? AND e.region = ?
+    """, (since_rowid, INTER_REGION))]
+
+    for event_id in events:
+        conn.execute("DELETE FROM dashboard_region_wins WHERE event_id = ?", (event_id,))
+        conn.execute("""
+            INSERT INTO dashboard_region_wins (event_id, region, matches, wins)
+            SELECT m.event_id, COALESCE(t.region, 'unknown'), COUNT(*), TOTAL(mt.is_winner)
+            FROM match_teams mt
+            JOIN matches m ON m.match_id = mt.match_id
+            LEFT JOIN teams t ON t.id = mt.team_id
+            WHERE m.event_id = ?
+            GROUP BY 1, 2
+        """, (event_id,))
+    return len(events)
+
+
+def refresh_dashboard(conn: sqlite3.Connection, full: bool = False) -> Dict[str, int]:
+    """
+    Met à jour les tables du dashboard (sans commit). Seuls les joueurs et events
+    touchés depuis le dernier rafraîchissement sont recalculés, sauf si full=True.
+    Retourne le nombre de joueurs et d'events recalculés.
+    """
+    ensure_dashboard_tables(conn)
+    if full:
+        conn.execute("DELETE FROM dashboard_player_totals")
+        conn.execute("DELETE FROM dashboard_region_wins")
+
+    player_watermark = 0 if full else int(get_meta(conn, PLAYER_STATS_WATERMARK_KEY, 0))
+    match_watermark = 0 if full else int(get_meta(conn, MATCH_TEAMS_WATERMARK_KEY, 0))
+    last_player_stats = conn.execute("SELECT COALESCE(MAX(id), 0) FROM player_stats").fetchone()[0]
+    last_match_teams = conn.execute("SELECT COALESCE(MAX(id), 0) FROM match_teams").fetchone()[0]
+
+    counts_changed = _refresh_counts(conn)
+    refreshed = {
+        'players': _refresh_player_totals(conn, player_watermark),
+        'events': _refresh_region_wins(conn, match_watermark),
+    }
+
+    set_meta(conn, PLAYER_STATS_WATERMARK_KEY, last_player_stats)
+    set_meta(conn, MATCH_TEAMS_WATERMARK_KEY, last_match_teams)
+    if counts_changed or any(refreshed.values()):
+        bump_write_generation(conn)  # pour que les caches des lecteurs voient les nouvelles valeurs
+    return refreshed
+
+
+def get_counts(conn: sqlite3.Connection) -> Dict[str, int]:
+    return {row[0]: row[1] for row in conn.execute("SELECT name, value FROM dashboard_counts")}
+
+
+def get_top_players(conn: sqlite3.Connection, metric: str, limit: int = 10, min_games: int = MIN_GAMES) -> List[Dict[str, Any]]:
+    """Meilleurs joueurs selon une métrique de PLAYER_METRICS (ValueError si inconnue)"""
+    column = PLAYER_METRICS.get(metric)
+    if column is None:
+        raise ValueError(f"Métrique inconnue : {metric} (possibles : {', '.join(PLAYER_METRICS)})")
+
+    rows = conn.execute(f"""
+        SELECT d.player_id, p.name, t.short_name AS team, t.region, d.games, d.{column} AS value
+        FROM dashboard_player_totals d
+        LEFT JOIN players p ON p.id = d.player_id
+        LEFT JOIN teams t ON t.id = d.team_id
+        WHERE d.games >= ? AND d.{column} IS NOT NULL
+        ORDER BY d.{column} DESC
+        LIMIT ?
+    """, (min_games, limit)).fetchall()
+    columns = ['player_id', 'name', 'team', 'region', 'games', 'value']
+    return [dict(zip(columns, row)) for row in rows]
+
+
+def get_region_wins(conn: sqlite3.Connection) -> List[Dict[str, Any]]:
+    """Victoires (matchs) de chaque région dans chaque event inter, par ordre chronologique"""
+    events = {}
+    for event_id, title, start_date, region, matches, wins in conn.execute("""
+        SELECT e.id, e.title, e.start_date, w.region, w.matches, w.wins
+        FROM dashboard_region_wins w
+        JOIN events e ON e.id = w.event_id
+        ORDER BY e.start_date, e.id, w.region
+    """):
+        event = events.setdefault(event_id, {'event_id': event_id, 'title': title, 'start_date': start_date, 'regions': {}})
+        event['regions'][region] = {'matches': matches, 'wins': int(wins)}
+    return list(events.values())
@@ -0,0 +1,201 @@
+"""
+Cube des conversions économiques (remplace le parcours du json de v1/api/stat_teams.py) :
+une ligne par équipe x map x côté x event x patch avec les sommes des rounds pistol, eco,
+semi-eco, semi-buy et full-buy joués/gagnés. La région de l'équipe et le patch découpé en
+(majeur, mineur) sont recopiés dans chaque ligne : une question comme « full-buy des équipes
+EMEA sur Lotus depuis le patch 9.0 » est une lecture par index suivie d'un SUM.
+Seules les games pas encore comptées sont ajoutées à chaque mise à jour.
+"""
+
+from typing import Any, Dict, List, Optional, Sequence
+import sqlite3
+
+from ..database.database import bump_write_generation
+
+# economy_stats n'est pas découpé par côté : les achats sont sur le côté 'both',
+# 't' et 'ct' portent les rounds gagnés de chaque côté (game_scores)
+SIDES = ('both', 't', 'ct')
+BUY_TYPES = ('pistol', 'eco', 'semi_eco', 'semi_buy', 'full_buy')
+MEASURES = ['games', 'wins', 'rounds_won'] + [f"{buy}_{result}" for buy in BUY_TYPES for result in ('played', 'won')]
+
+# regroupement possible -> colonne du cube
+CUBE_GROUPS = {
+    'team': 'team_id',
+    'map': 'map',
+    'event': 'event_id',
+    'patch': 'patch',
+    'region': 'region',
+}
+
+ECONOMY_CUBE_SCHEMA = [
+    f"""
+    CREATE TABLE IF NOT EXISTS economy_cube (
+        team_id INTEGER,
+        map TEXT,
+        side TEXT,  -- both, t ou ct
+        event_id INTEGER,
+        patch TEXT,
+        region TEXT,  -- région de l'équipe, recopiée pour filtrer sans jointure
+        patch_major INTEGER,  -- '9.07' -> 9, 7 pour comparer les patchs
+        patch_minor INTEGER,
+        {', '.join(f'{measure} INTEGER' for measure in MEASURES)},
+        PRIMARY KEY (team_id, map, side, event_id, patch)
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS idx_economy_cube_region ON economy_cube (region, map, side, patch_major, patch_minor)",
+    "CREATE INDEX IF NOT EXISTS idx_economy_cube_map ON economy_cube (map, side, patch_major, patch_minor)",
+    # games déjà comptées (traitement incrémental)
+    """
+    CREATE TABLE IF NOT EXISTS economy_cube_games (
+        game_id INTEGER PRIMARY KEY
+    )
+    """,
+]
+
+# 'X.YY' -> (X, YY) ; un patch sans point est un patch majeur
+PATCH_MAJOR = "CAST(CASE WHEN instr(patch, '.') THEN substr(patch, 1, instr(patch, '.') - 1) ELSE patch END AS INTEGER)"
+PATCH_MINOR = "CAST(CASE WHEN instr(patch, '.') THEN substr(patch, instr(patch, '.') + 1) ELSE 0 END AS INTEGER)"
+
+# dernière ligne de chaque (game, équipe) : INSERT OR REPLACE sans contrainte d'unicité peut laisser des doublons
+PENDING_ROWS = """
+    SELECT e.game_id, e.team_id, g.map, m.event_id, m.patch, t.region,
+           CAST(g.win AS INTEGER) = e.team_id AS won,
+           s.score, s.t_score, s.ct_score,
+           e.pistol, e.eco_played, e.eco_won, e.semi_eco_played, e.semi_eco_won,
+           e.semi_buy_played, e.semi_buy_won, e.full_buy_played, e.full_buy_won
+    FROM economy_stats e
+    JOIN games g ON g.game_id = e.game_id
+    JOIN matches m ON m.match_id = g.match_id
+    LEFT JOIN teams t ON t.id = e.team_id
+    LEFT JOIN game_scores s ON s.id = (
+        SELECT MAX(id) FROM game_scores WHERE game_id = e.game_id AND team_id = e.team_id
+    )
+    WHERE e.id IN (
+        SELECT MAX(id) FROM economy_stats
+        WHERE game_id IN (SELECT game_id FROM economy_cube_pending) AND team_id IS NOT NULL
+        GROUP BY game_id, team_id
+    )
+"""
+
+
+def ensure_economy_cube_tables(conn: sqlite3.Connection) -> None:
+    for statement in ECONOMY_CUBE_SCHEMA:
+        conn.execute(statement)
+
+
+def _side_measures(side: str) -> str:
+    """Expressions sql des mesures d'une ligne de PENDING_ROWS pour un côté"""
+    rounds_won = {'both': 'score', 't': 't_score', 'ct': 'ct_score'}[side]
+    if side != 'both':
+        return f"1, won, COALESCE({rounds_won}, 0), " + ', '.join(['0'] * (len(MEASURES) - 3))
+    # 2 rounds pistol par map, comme v1
+    buys = ', '.join(
+        f"COALESCE({buy}_played, 0), COALESCE({buy}_won, 0)" for buy in BUY_TYPES[1:]
+    )
+    return f"1, won, COALESCE({rounds_won}, 0), 2, COALESCE(pistol, 0), {buys}"
+
+
+def update_economy_cube(conn: sqlite3.Connection, full: bool = False) -> int:
+    """
+    Ajoute au cube les games d'economy_stats pas encore comptées (toutes si full=True), sans commit.
+    Retourne le nombre de games ajoutées.
+    """
+    ensure_economy_cube_tables(conn)
+    if full:
+        conn.execute("DELETE FROM economy_cube")
+        conn.execute("DELETE FROM economy_cube_games")
+
+    conn.execute("CREATE TEMP TABLE IF NOT EXISTS economy_cube_pending (game_id INTEGER PRIMARY KEY)")
+    conn.execute("DELETE FROM economy_cube_pending")
+    pending = conn.execute("""
+        INSERT INTO economy_cube_pending (game_id)
+        SELECT DISTINCT game_id FROM economy_stats
+        WHERE game_id IS NOT NULL AND game_id NOT IN (SELECT game_id FROM economy_cube_games)
+    """).rowcount
+    if not pending:
+        return 0
+
+    sides = ' UNION ALL '.join(
+        f"SELECT team_id, map, '{side}', event_id, patch, region, {_side_measures(side)} FROM pending"
+        for side in SIDES
+    )
+    measures = ', '.join(MEASURES)
+    conn.execute(f"""
+        INSERT INTO economy_cube (team_id, map, side, event_id, patch, region, patch_major, patch_minor, {measures})
+        WITH pending AS ({PENDING_ROWS}),
+             side_rows (team_id, map, side, event_id, patch, region, {measures}) AS ({sides})
+        SELECT team_id, COALESCE(map, ''), side, COALESCE(event_id, 0), COALESCE(patch, ''), region,
+               {PATCH_MAJOR}, {PATCH_MINOR}, {', '.join(f'SUM({measure})' for measure in MEASURES)}
+        FROM side_rows
+        GROUP BY 1, 2, 3, 4, 5
+        ON CONFLICT (team_id, map, side, event_id, patch) DO UPDATE SET
+            region = excluded.region,
+            {', '.join(f'{measure} = {measure} + excluded.{measure}' for measure in MEASURES)}
+    """)
+    conn.execute("INSERT INTO economy_cube_games (game_id) SELECT game_id FROM economy_cube_pending")
+    bump_write_generation(conn)
+    return pending
+
+
+def parse_patch(patch: str) -> tuple:
+    """'9.0' -> (9, 0) (ValueError si illisible)"""
+    major, _, minor = patch.partition('.')
+    try:
+        return int(major), int(minor or 0)
+    except ValueError:
+        raise ValueError(f"Patch illisible : {patch} (attendu : 9.0, 10.03...)")
+
+
+def economy_conversion(conn: sqlite3.Connection,
+                       team_id: Optional[int] = None,
+                       regions: Optional[Sequence[str]] = None,
+                       map_name: Optional[str] = None,
+                       side: str = 'both',
+                       event_id: Optional[int] = None,
+                       since_patch: Optional[str] = None,
+                       until_patch: Optional[str] = None,
+                       by: Optional[str] = None) -> List[Dict[str, Any]]:
+    """
+    Sommes et taux de conversion (gagnés / joués) de chaque type d'achat sur les lignes du cube
+    filtrées, une entrée par valeur de `by` (team, map, event, patch, region).
+    ValueError si le côté, le regroupement ou un patch est invalide.
+    """
+    if side not in SIDES:
+        raise ValueError(f"Côté inconnu : {side} (possibles : {', '.join(SIDES)})")
+    if by is not None and by not in CUBE_GROUPS:
+        raise ValueError(f"Regroupement inconnu : {by} (possibles : {', '.join(CUBE_GROUPS)})")
+
+    conditions, params = ["side = ?"], [side]
+    for column, value in (('team_id', team_id), ('map', map_name), ('event_id', event_id)):
+        if value is not None:
+            conditions.append(f"{column} = ?")
+            params.append(value)
+    if regions:
+        conditions.append(f"region IN ({', '.join('?' * len(regions))})")
+        params.extend(regions)
+    if since_patch:
+        conditions.append("(patch_major, patch_minor) >= (?, ?)")
+        params.extend(parse_patch(since_patch))
+    if until_patch:
+        conditions.append("(patch_major, patch_minor) <= (?, ?)")
+        params.extend(parse_patch(until_patch))
+
+    group = CUBE_GROUPS[by] if by else "NULL"
+    rows = conn.execute(f"""
+        SELECT {group}, {', '.join(f'SUM({measure})' for measure in MEASURES)}
+        FROM economy_cube
+        WHERE {' AND '.join(conditions)}
+        GROUP BY 1
+        ORDER BY 1
+    """, params).fetchall()
+
+    slices = []
+    for slice_value, *sums in rows:
+        totals = dict(zip(MEASURES, sums))
+        entry = {"slice": slice_value, "games": totals["games"], "wins": totals["wins"], "rounds_won": totals["rounds_won"]}
+        if side == 'both':
+            for buy in BUY_TYPES:
+                played, won = totals[f"{buy}_played"], totals[f"{buy}_won"]
+                entry[buy] = {"played": played, "won": won, "rate": round(won / played, 4) if played else None}
+        slices.append(entry)
+    return slices
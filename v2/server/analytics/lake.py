@@ -0,0 +1,367 @@
+"""
+Export des tables sqlite vers des fichiers parquet partitionnés par saison/event
+et chargement colonne par colonne (memory-map) avec pyarrow.
+Des triggers notent dans lake_changes l'event de chaque ligne écrite par les scrapers :
+l'export suivant ne relit que les partitions de ces events.
+"""
+
+from typing import Any, Dict, List, Optional
+import sqlite3
+import json
+import os
+import shutil
+import time
+import zlib
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    import pyarrow.dataset as ds
+    import pyarrow.compute as pc
+    from pyarrow import fs as pafs
+except ImportError:  # pyarrow est optionnel
+    pa = None
+
+from ..database.database import DATABASE_PATH, get_meta, set_meta
+
+LAKE_PATH = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'data', 'lake'))
+MANIFEST_NAME = '_manifest.json'
+
+# petites tables réécrites entièrement à chaque export
+DIMENSION_TABLES = ['events', 'teams', 'players']
+
+# tables partitionnées : (jointure jusqu'au match, expression de l'event_id)
+PARTITIONED_TABLES = {
+    'matches': ("matches t", "t.event_id"),
+    'match_teams': ("match_teams t JOIN matches m ON m.match_id = t.match_id", "m.event_id"),
+    'games': ("games t JOIN matches m ON m.match_id = t.match_id", "m.event_id"),
+    'game_scores': ("game_scores t JOIN games g ON g.game_id = t.game_id JOIN matches m ON m.match_id = g.match_id", "m.event_id"),
+    'economy_stats': ("economy_stats t JOIN games g ON g.game_id = t.game_id JOIN matches m ON m.match_id = g.match_id", "m.event_id"),
+    'round_history': ("round_history t JOIN games g ON g.game_id = t.game_id JOIN matches m ON m.match_id = g.match_id", "m.event_id"),
+    'player_stats': ("player_stats t JOIN games g ON g.game_id = t.game_id JOIN matches m ON m.match_id = g.match_id", "m.event_id"),
+}
+
+BATCH_SIZE = 10000
+
+# suivi des modifications : requête qui donne l'event d'une ligne ({row} = NEW ou OLD dans un trigger)
+GAME_EVENT = "SELECT m.event_id FROM games g JOIN matches m ON m.match_id = g.match_id WHERE g.game_id = {row}.game_id"
+CHANGED_EVENT = {
+    'matches': "SELECT {row}.event_id AS event_id",
+    'match_teams': "SELECT event_id FROM matches WHERE match_id = {row}.match_id",
+    'games': "SELECT event_id FROM matches WHERE match_id = {row}.match_id",
+    'game_scores': GAME_EVENT,
+    'economy_stats': GAME_EVENT,
+    'round_history': GAME_EVENT,
+    'player_stats': GAME_EVENT,
+}
+# INSERT OR REPLACE d'un match ou d'une game existant : l'event de la ligne remplacée, noté avant
+REPLACED_EVENT = {
+    'matches': "SELECT event_id FROM matches WHERE match_id = NEW.match_id",
+    'games': GAME_EVENT.format(row='NEW'),
+}
+# id du suivi dans db_meta, recopié dans le manifest : s'il diffère, des écritures n'ont pas été suivies
+LAKE_TRACKING_KEY = 'lake_tracking'
+MANIFEST_TRACKING_KEY = '_tracking'
+
+
+def _flag_event(lookup: str) -> str:
+    """Instruction de trigger : note l'event renvoyé par `lookup` (une seule fois)"""
+    return f"""
+        INSERT INTO lake_changes (event_id)
+        SELECT event_id FROM ({lookup}) AS changed
+        WHERE NOT EXISTS (SELECT 1 FROM lake_changes c WHERE c.event_id IS changed.event_id);
+    """
+
+
+def _lake_schema() -> List[str]:
+    statements = [
+        "CREATE TABLE IF NOT EXISTS lake_changes (event_id INTEGER)",
+        "CREATE INDEX IF NOT EXISTS idx_lake_changes_event ON lake_changes (event_id)",
+        # saison de l'event modifiée : ses partitions changent de dossier
+        f"""
+        CREATE TRIGGER IF NOT EXISTS lake_events_update AFTER UPDATE ON events BEGIN
+            {_flag_event("SELECT NEW.id AS event_id")}
+        END
+        """,
+    ]
+    for table, lookup in CHANGED_EVENT.items():
+        for operation, rows in (('insert', ['NEW']), ('update', ['OLD', 'NEW']), ('delete', ['OLD'])):
+            statements.append(f"""
+                CREATE TRIGGER IF NOT EXISTS lake_{table}_{operation} AFTER {operation.upper()} ON {table} BEGIN
+                    {''.join(_flag_event(lookup.format(row=row)) for row in rows)}
+                END
+            """)
+    for table, lookup in REPLACED_EVENT.items():
+        statements.append(f"""
+            CREATE TRIGGER IF NOT EXISTS lake_{table}_replace BEFORE INSERT ON {table} BEGIN
+                {_flag_event(lookup)}
+            END
+        """)
+    return statements
+
+LAKE_SCHEMA = _lake_schema()
+
+
+def _require_pyarrow():
+    if pa is None:
+        raise ImportError("pyarrow est requis pour l'export parquet (pip install pyarrow)")
+
+
+def _to_int(value):
+    if value is None or isinstance(value, int):
+        return value
+    try:
+        return int(float(value))
+    except (TypeError, ValueError):
+        return None  # ex: '' stocké dans une colonne INTEGER
+
+def _to_float(value):
+    if value is None or isinstance(value, float):
+        return value
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+def _to_bool(value):
+    if value is None or value == '':
+        return None
+    return bool(_to_int(value))
+
+def _to_str(value):
+    return value if value is None or isinstance(value, str) else str(value)
+
+
+def _table_schema(conn: sqlite3.Connection, table: str) -> list:
+    """Schéma arrow + fonctions de conversion à partir des types déclarés dans sqlite"""
+    columns = []
+    for col in conn.execute(f"PRAGMA table_info({table})").fetchall():
+        declared = (col[2] or '').upper()
+        if declared == 'INTEGER':
+            columns.append((col[1], pa.int64(), _to_int))
+        elif declared == 'REAL':
+            columns.append((col[1], pa.float64(), _to_float))
+        elif declared == 'BOOLEAN':
+            columns.append((col[1], pa.bool_(), _to_bool))
+        else:  # TEXT, DATE, TIMESTAMP (on garde le texte tel quel)
+            columns.append((col[1], pa.string(), _to_str))
+    return columns
+
+
+def _write_query(conn: sqlite3.Connection, table: str, query: str, params: tuple, path: str) -> int:
+    """Ecrit le résultat d'une requête dans un fichier parquet par lots (mémoire bornée)"""
+    columns = _table_schema(conn, table)
+    schema = pa.schema([(name, arrow_type) for name, arrow_type, _ in columns])
+
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = path + '.tmp'
+    rows_written = 0
+
+    cursor = conn.execute(query, params)
+    with pq.ParquetWriter(tmp_path, schema, compression='zstd') as writer:
+        while True:
+            rows = cursor.fetchmany(BATCH_SIZE)
+            if not rows:
+                break
+            arrays = [
+                pa.array([convert(row[i]) for row in rows], type=arrow_type)
+                for i, (_, arrow_type, convert) in enumerate(columns)
+            ]
+            writer.write_batch(pa.RecordBatch.from_arrays(arrays, schema=schema))
+            rows_written += len(rows)
+
+    os.replace(tmp_path, path)  # remplacement atomique
+    return rows_written
+
+
+def _partition_path(table: str, season: str, event_id) -> str:
+    """Chemin du fichier d'une partition, relatif au lac (gardé tel quel dans le manifest)"""
+    event = 'none' if event_id is None else str(event_id)
+    return '/'.join([table, f"season={season}", f"event={event}", 'part-0.parquet'])
+
+
+def _row_checksum(*values) -> int:
+    """crc32 d'une ligne : la somme par partition change si une ligne est modifiée sur place (INSERT OR REPLACE)"""
+    return zlib.crc32(repr(values).encode('utf-8'))
+
+
+def ensure_lake_tables(conn: sqlite3.Connection) -> bool:
+    """
+    Crée lake_changes et ses triggers si besoin (sans commit), à appeler avant que les scrapers écrivent.
+    True si le suivi vient d'être créé : le prochain export relit toutes les partitions.
+    """
+    created = conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'lake_changes'").fetchone() is None
+    for statement in LAKE_SCHEMA:
+        conn.execute(statement)
+    if created or get_meta(conn, LAKE_TRACKING_KEY) is None:
+        set_meta(conn, LAKE_TRACKING_KEY, str(time.time_ns()))
+    return created
+
+
+def _remove_partition(lake_path: str, path: str):
+    """Supprime le fichier d'une partition qui n'existe plus (ou a changé de saison) et ses dossiers vides"""
+    full_path = os.path.join(lake_path, *path.split('/'))
+    if os.path.exists(full_path):
+        os.remove(full_path)
+    directory = os.path.dirname(full_path)
+    while directory != lake_path and os.path.isdir(directory) and not os.listdir(directory):
+        os.rmdir(directory)
+        directory = os.path.dirname(directory)
+
+
+def _load_manifest(lake_path: str) -> Dict[str, Any]:
+    manifest_path = os.path.join(lake_path, MANIFEST_NAME)
+    if os.path.exists(manifest_path):
+        with open(manifest_path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    return {}
+
+def _save_manifest(lake_path: str, manifest: Dict[str, Any]):
+    manifest_path = os.path.join(lake_path, MANIFEST_NAME)
+    with open(manifest_path + '.tmp', 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(manifest_path + '.tmp', manifest_path)
+
+
+def export_to_parquet(db_path: str = DATABASE_PATH, lake_path: str = LAKE_PATH, full: bool = False) -> Dict[str, int]:
+    """
+    Exporte la base vers le lac parquet (une partition par saison/event et par table).
+    Seules les partitions des events notés dans lake_changes depuis le dernier export sont relues,
+    et seules celles qui ont changé sont écrites (toutes si full=True, ou si le suivi a été
+    recréé depuis). Retourne le nombre de partitions écrites par table.
+    """
+    _require_pyarrow()
+    os.makedirs(lake_path, exist_ok=True)
+
+    manifest = {} if full else _load_manifest(lake_path)
+    written = {}
+
+    conn = sqlite3.connect(db_path)
+    conn.create_function('row_checksum', -1, _row_checksum, deterministic=True)
+    try:
+        ensure_lake_tables(conn)
+        conn.commit()
+        tracking = get_meta(conn, LAKE_TRACKING_KEY)
+        # events modifiés jusqu'ici (les suivants seront pris au prochain export)
+        last_change = conn.execute("SELECT MAX(rowid) FROM lake_changes").fetchone()[0] or 0
+        changed = None  # None = toutes les partitions
+        if not full and manifest.get(MANIFEST_TRACKING_KEY) == tracking:
+            changed = [row[0] for row in conn.execute("SELECT DISTINCT event_id FROM lake_changes WHERE rowid <= ?", (last_change,))]
+
+        # saison = année de début de l'event (comme les saisons vct-YYYY)
+        seasons = {
+            row[0]: row[1] or 'unknown'
+            for row in conn.execute("SELECT id, strftime('%Y', start_date) FROM events")
+        }
+
+        for table in DIMENSION_TABLES:
+            _write_query(conn, table, f"SELECT * FROM {table}", (), os.path.join(lake_path, table, 'part-0.parquet'))
+            written[table] = 1
+
+        for table, (from_clause, event_expr) in PARTITIONED_TABLES.items():
+            previous = manifest.get(table, {})
+            legacy = not all(isinstance(partition, dict) for partition in previous.values())
+            if full or legacy:
+                # pas de chemins connus (export complet ou ancien manifest) : on repart d'un dossier vide
+                shutil.rmtree(os.path.join(lake_path, table), ignore_errors=True)
+                previous = {}
+            written[table] = 0
+
+            # seules les partitions des events modifiés sont relues, les autres restent telles quelles
+            where, params = "", ()
+            if changed is not None and table in manifest and not legacy:
+                changed_keys = {'none' if event_id is None else str(event_id) for event_id in changed}
+                current = {key: partition for key, partition in previous.items() if key not in changed_keys}
+                event_ids = [event_id for event_id in changed if event_id is not None]
+                conditions = [f"{event_expr} IN ({', '.join('?' * len(event_ids))})"] if event_ids else []
+                if None in changed:
+                    conditions.append(f"{event_expr} IS NULL")
+                where, params = f"WHERE {' OR '.join(conditions) or '0'}", tuple(event_ids)
+            else:
+                current = {}
+
+            # empreinte de chaque partition relue (nb de lignes, somme des crc32 des lignes) pour ne réécrire que
+            # ce qui a changé ; le rowid ne suffit pas, INSERT OR REPLACE le garde en modifiant la ligne
+            columns = ', '.join(f"t.{column[1]}" for column in conn.execute(f"PRAGMA table_info({table})"))
+            fingerprints = conn.execute(f"""
+                SELECT {event_expr} AS event_id, COUNT(*), SUM(row_checksum({columns}))
+                FROM {from_clause}
+                {where}
+                GROUP BY 1
+            """, params).fetchall()
+
+            for event_id, row_count, checksum in fingerprints:
+                key = 'none' if event_id is None else str(event_id)
+                path = _partition_path(table, seasons.get(event_id, 'unknown'), event_id)
+                current[key] = {"rows": row_count, "checksum": checksum, "path": path}
+                if previous.get(key) == current[key]:
+                    continue
+
+                _write_query(conn, table, f"SELECT t.* FROM {from_clause} WHERE {event_expr} IS ?", (event_id,),
+                             os.path.join(lake_path, *path.split('/')))
+                written[table] += 1
+
+            # partitions disparues ou déplacées (saison de l'event modifiée) : l'ancien fichier ferait doublon
+            current_paths = {partition["path"] for partition in current.values()}
+            for partition in previous.values():
+                if partition["path"] not in current_paths:
+                    _remove_partition(lake_path, partition["path"])
+
+            manifest[table] = current
+
+        manifest[MANIFEST_TRACKING_KEY] = tracking
+        _save_manifest(lake_path, manifest)
+        conn.execute("DELETE FROM lake_changes WHERE rowid <= ?", (last_change,))
+        conn.commit()
+    finally:
+        conn.close()
+
+    return written
+
+
+def load_table(table: str,
+               columns: Optional[List[str]] = None,
+               seasons: Optional[List] = None,
+               events: Optional[List] = None,
+               lake_path: str = LAKE_PATH) -> "pa.Table":
+    """
+    Charge une table du lac en mémoire colonne (fichiers memory-mappés).
+    Seules les colonnes demandées sont lues, et seules les partitions des saisons/events filtrés.
+    """
+    _require_pyarrow()
+    table_path = os.path.join(lake_path, table)
+    if not os.path.exists(table_path):
+        raise FileNotFoundError(f"Table {table} absente du lac ({table_path}), lancer export_to_parquet()")
+
+    filesystem = pafs.LocalFileSystem(use_mmap=True)
+
+    if table not in PARTITIONED_TABLES:
+        return ds.dataset(table_path, format='parquet', filesystem=filesystem).to_table(columns=columns)
+
+    partitioning = ds.partitioning(pa.schema([('season', pa.string()), ('event', pa.string())]), flavor='hive')
+    dataset = ds.dataset(table_path, format='parquet', partitioning=partitioning, filesystem=filesystem)
+
+    condition = None
+    if seasons:
+        condition = ds.field('season').isin([str(s) for s in seasons])
+    if events:
+        event_condition = ds.field('event').isin([str(e) for e in events])
+        condition = event_condition if condition is None else condition & event_condition
+
+    return dataset.to_table(columns=columns, filter=condition)
+
+
+def agent_winrates(seasons: Optional[List] = None, lake_path: str = LAKE_PATH) -> "pa.Table":
+    """Pick count et winrate de chaque agent (calcul vectorisé, 3 colonnes lues seulement)"""
+    stats = load_table('player_stats', columns=['game_id', 'team_id', 'agent_name'], seasons=seasons, lake_path=lake_path)
+    games = load_table('games', columns=['game_id', 'win'], seasons=seasons, lake_path=lake_path)
+
+    joined = stats.join(games, 'game_id')
+    # games.win est déclaré TEXT dans le schéma (id de l'équipe gagnante)
+    won = pc.fill_null(pc.equal(pc.cast(joined['team_id'], pa.string()), joined['win']), False)
+    joined = joined.append_column('won', pc.cast(won, pa.int64()))
+
+    result = joined.group_by('agent_name').aggregate([('won', 'sum'), ('won', 'count')])
+    result = result.rename_columns(['agent_name', 'wins', 'picks'])
+    result = result.append_column('winrate', pc.divide(pc.cast(result['wins'], pa.float64()), result['picks']))
+    return result.sort_by([('picks', 'descending')])
@@ -0,0 +1,151 @@
+"""
+Picks, bans et deciders des maps en sql : les listes json de matches (picks, bans, decider)
+sont dépliées une fois avec json_each dans la table map_vetoes, puis agrégées (GROUP BY)
+par équipe, event ou patch.
+"""
+
+from typing import Any, Dict, List, Optional
+import sqlite3
+
+from ..database.database import bump_write_generation
+
+# regroupement possible -> colonne sql
+VETO_GROUPS = {
+    'team': 'team_id',
+    'event': 'v.event_id',
+    'patch': 'v.patch',
+}
+
+MAP_VETOES_SCHEMA = [
+    """
+    CREATE TABLE IF NOT EXISTS map_vetoes (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        match_id INTEGER,
+        event_id INTEGER,
+        patch TEXT,
+        action TEXT,  -- pick, ban ou decider
+        position INTEGER,  -- ordre dans la liste du match
+        map TEXT,
+        team_id INTEGER  -- NULL pour le decider
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS idx_map_vetoes_event ON map_vetoes (event_id)",
+    "CREATE INDEX IF NOT EXISTS idx_map_vetoes_team ON map_vetoes (team_id)",
+    # équipe des picks/bans retrouvée dans match_teams à chaque ligne dépliée
+    "CREATE INDEX IF NOT EXISTS idx_match_teams_match_id ON match_teams (match_id)",
+    # matchs déjà dépliés (traitement incrémental)
+    """
+    CREATE TABLE IF NOT EXISTS map_vetoes_matches (
+        match_id INTEGER PRIMARY KEY
+    )
+    """,
+]
+
+# équipe d'un pick/ban : "team" du json est le nom court d'une des deux équipes du match
+VETO_TEAM = """
+    (SELECT mt.team_id FROM match_teams mt JOIN teams t ON t.id = mt.team_id
+     WHERE mt.match_id = m.match_id AND t.short_name = json_extract(j.value, '$.team') LIMIT 1)
+"""
+
+
+def ensure_map_vetoes_tables(conn: sqlite3.Connection) -> None:
+    for statement in MAP_VETOES_SCHEMA:
+        conn.execute(statement)
+
+
+def refresh_map_vetoes(conn: sqlite3.Connection, full: bool = False) -> int:
+    """Déplie les picks/bans des matchs pas encore traités (tous si full=True), sans commit"""
+    ensure_map_vetoes_tables(conn)
+    if full:
+        conn.execute("DELETE FROM map_vetoes")
+        conn.execute("DELETE FROM map_vetoes_matches")
+
+    conn.execute("CREATE TEMP TABLE IF NOT EXISTS map_vetoes_pending (match_id INTEGER PRIMARY KEY)")
+    conn.execute("DELETE FROM map_vetoes_pending")
+    conn.execute("""
+        INSERT INTO map_vetoes_pending (match_id)
+        SELECT match_id FROM matches
+        WHERE match_id NOT IN (SELECT match_id FROM map_vetoes_matches)
+          -- match encore à l'état d'ébauche (EventScraper) : déplié quand MatchScraper aura rempli ses vetos
+          AND (picks IS NOT NULL OR bans IS NOT NULL)
+    """)
+
+    for action, column in (('pick', 'picks'), ('ban', 'bans')):
+        conn.execute(f"""
+            INSERT INTO map_vetoes (match_id, event_id, patch, action, position, map, team_id)
+            SELECT m.match_id, m.event_id, m.patch, '{action}', j.key, json_extract(j.value, '$.map'), {VETO_TEAM}
+            FROM map_vetoes_pending p
+            JOIN matches m ON m.match_id = p.match_id
+            JOIN json_each(CASE WHEN json_valid(m.{column}) THEN m.{column} ELSE '[]' END) j
+        """)
+    conn.execute("""
+        INSERT INTO map_vetoes (match_id, event_id, patch, action, position, map, team_id)
+        SELECT m.match_id, m.event_id, m.patch, 'decider', 0, m.decider, NULL
+        FROM map_vetoes_pending p
+        JOIN matches m ON m.match_id = p.match_id
+        WHERE m.decider IS NOT NULL AND m.decider != ''
+    """)
+
+    refreshed = conn.execute("INSERT INTO map_vetoes_matches (match_id) SELECT match_id FROM map_vetoes_pending").rowcount
+    if refreshed:
+        bump_write_generation(conn)
+    return refreshed
+
+
+def veto_fingerprint(conn: sqlite3.Connection, event_id: Optional[int] = None) -> tuple:
+    """Change quand des vetos sont ajoutés (à l'event donné seulement s'il y en a un) : clé de cache"""
+    if event_id is None:
+        return tuple(conn.execute("SELECT COUNT(*), MAX(id) FROM map_vetoes").fetchone())
+    # requête séparée pour passer par idx_map_vetoes_event
+    return tuple(conn.execute("SELECT COUNT(*), MAX(id) FROM map_vetoes WHERE event_id = ?", (event_id,)).fetchone())
+
+
+def map_veto_stats(conn: sqlite3.Connection,
+                   event_id: Optional[int] = None,
+                   team_id: Optional[int] = None,
+                   patch: Optional[str] = None,
+                   by: Optional[str] = None) -> List[Dict[str, Any]]:
+    """
+    Nb de picks/bans/deciders de chaque map et part de chacun dans les apparitions de la map
+    (comme v1), filtrés par event/équipe/patch et regroupés par `by` (team, event, patch).
+    Par équipe, le decider compte pour les deux équipes du match.
+    """
+    if by is not None and by not in VETO_GROUPS:
+        raise ValueError(f"Regroupement inconnu : {by} (possibles : {', '.join(VETO_GROUPS)})")
+
+    by_team = team_id is not None or by == 'team'
+    # par équipe : le decider (sans équipe) est rattaché aux deux équipes du match
+    source = """
+        map_vetoes v
+        LEFT JOIN match_teams mt ON v.team_id IS NULL AND mt.match_id = v.match_id
+    """ if by_team else "map_vetoes v"
+    team = "COALESCE(v.team_id, mt.team_id)" if by_team else "v.team_id"
+    group = VETO_GROUPS[by].replace('team_id', team) if by else "NULL"
+
+    rows = conn.execute(f"""
+        SELECT {group} AS slice, v.map,
+               SUM(v.action = 'pick'), SUM(v.action = 'ban'), SUM(v.action = 'decider'),
+               COUNT(DISTINCT v.match_id)
+        FROM {source}
+        WHERE (:event_id IS NULL OR v.event_id = :event_id)
+          AND (:patch IS NULL OR v.patch = :patch)
+          AND (:team_id IS NULL OR {team} = :team_id)
+          AND v.map IS NOT NULL
+        GROUP BY 1, 2
+        ORDER BY 1, 3 DESC, 2
+    """, {"event_id": event_id, "team_id": team_id, "patch": patch}).fetchall()
+
+    slices = {}
+    for slice_value, map_name, picks, bans, deciders, matches in rows:
+        total = picks + bans + deciders
+        slices.setdefault(slice_value, []).append({
+            "map": map_name,
+            "picks": picks,
+            "bans": bans,
+            "deciders": deciders,
+            "matches": matches,
+            "pick_rate": round(picks / total, 4),
+            "ban_rate": round(bans / total, 4),
+            "decider_rate": round(deciders / total, 4),
+        })
+    return [{"slice": slice_value, "maps": maps} for slice_value, maps in slices.items()]
@@ -0,0 +1,242 @@
+"""
+ACP des joueurs (remplace v1/api/player_stats_pca.py) directement depuis player_stats :
+- player_features : sommes des stats de chaque joueur, complétées avec les nouvelles lignes seulement
+- pca_models : statistiques suffisantes (nb de joueurs, somme des vecteurs, somme des produits
+  extérieurs) de chaque jeu de features ; un joueur qui a joué de nouvelles games retire son ancien
+  vecteur et ajoute le nouveau, puis les axes sont recalculés sur la petite matrice de corrélation
+- player_embeddings : coordonnées de chaque joueur sur les premiers axes
+"""
+
+from typing import Any, Dict, List, Optional
+import datetime
+import sqlite3
+
+try:
+    import numpy as np
+except ImportError:  # numpy est optionnel
+    np = None
+
+from ..database.database import get_meta, set_meta, bump_write_generation
+
+# jeux de features (colonnes de player_stats, moyennes par game)
+FEATURE_SETS = {
+    # comme v1 (après les colonnes retirées dans player_stats_pca.py)
+    'v1': ['acs_both', 'k_both', 'd_both', 'a_both', 'kddiff_both'],
+    'duelist': ['acs_both', 'k_both', 'adr_both', 'hs_both', 'fk_both', 'fd_both', 'fkddiff_both', 'multikills_2k', 'multikills_3k'],
+    'sides': ['acs_t', 'acs_ct', 'k_t', 'k_ct', 'd_t', 'd_ct', 'a_t', 'a_ct', 'kast_t', 'kast_ct', 'adr_t', 'adr_ct'],
+    'all': [
+        'acs_both', 'k_both', 'd_both', 'a_both', 'kddiff_both', 'kast_both', 'adr_both', 'hs_both',
+        'fk_both', 'fd_both', 'fkddiff_both', 'multikills_2k', 'multikills_3k', 'multikills_4k', 'multikills_5k',
+        'clutches_1v1', 'clutches_1v2', 'clutches_1v3', 'eco', 'plant', 'defuse',
+    ],
+}
+FEATURE_COLUMNS = sorted({column for columns in FEATURE_SETS.values() for column in columns})
+
+N_COMPONENTS = 3
+MIN_GAMES = 5  # en dessous les moyennes sont trop bruitées pour entrer dans l'ACP
+PLAYER_STATS_WATERMARK_KEY = 'embedding_player_stats_rowid'
+
+PLAYER_EMBEDDING_SCHEMA = [
+    f"""
+    CREATE TABLE IF NOT EXISTS player_features (
+        player_id INTEGER PRIMARY KEY,
+        games INTEGER,
+        {', '.join(f'{column} REAL' for column in FEATURE_COLUMNS)}
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS pca_models (
+        feature_set TEXT PRIMARY KEY,
+        players INTEGER,
+        feature_sum BLOB,  -- float64, statistiques suffisantes
+        feature_outer BLOB,
+        mean BLOB,  -- float32, pour projeter
+        scale BLOB,
+        components BLOB,  -- N_COMPONENTS x features
+        explained_variance BLOB,
+        updated_at TIMESTAMP
+    )
+    """,
+    f"""
+    CREATE TABLE IF NOT EXISTS player_embeddings (
+        feature_set TEXT,
+        player_id INTEGER,
+        {', '.join(f'pc{i + 1} REAL' for i in range(N_COMPONENTS))},
+        PRIMARY KEY (feature_set, player_id)
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS idx_player_stats_player_id ON player_stats (player_id)",
+]
+
+
+def _require_numpy():
+    if np is None:
+        raise ImportError("numpy est requis pour l'ACP des joueurs (pip install numpy)")
+
+
+def ensure_embedding_tables(conn: sqlite3.Connection) -> None:
+    for statement in PLAYER_EMBEDDING_SCHEMA:
+        conn.execute(statement)
+
+
+def _read_features(conn: sqlite3.Connection, where: str = "", params: tuple = ()) -> tuple:
+    """(player_ids, games, sommes float64 players x FEATURE_COLUMNS) de player_features"""
+    rows = conn.execute(f"SELECT player_id, games, {', '.join(FEATURE_COLUMNS)} FROM player_features {where}", params).fetchall()
+    if not rows:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64), np.empty((0, len(FEATURE_COLUMNS)))
+    data = np.array(rows, dtype=np.float64)
+    return data[:, 0].astype(np.int64), data[:, 1].astype(np.int64), data[:, 2:]
+
+
+def feature_matrix(games: "np.ndarray", sums: "np.ndarray", feature_set: str) -> "np.ndarray":
+    """Moyennes par game des colonnes du jeu de features, en float32"""
+    indexes = [FEATURE_COLUMNS.index(column) for column in FEATURE_SETS[feature_set]]
+    return (sums[:, indexes] / np.maximum(games, 1)[:, None]).astype(np.float32)
+
+
+def _add_new_rows(conn: sqlite3.Connection, since_rowid: int) -> None:
+    """Ajoute aux sommes de player_features les lignes de player_stats après since_rowid"""
+    totals = ', '.join(f"TOTAL({column})" for column in FEATURE_COLUMNS)
+    updates = ', '.join(f"{column} = {column} + excluded.{column}" for column in FEATURE_COLUMNS)
+    conn.execute(f"""
+        INSERT INTO player_features (player_id, games, {', '.join(FEATURE_COLUMNS)})
+        SELECT player_id, COUNT(*), {totals}
+        FROM player_stats
+        WHERE id > ? AND player_id IS NOT NULL
+        GROUP BY player_id
+        ON CONFLICT (player_id) DO UPDATE SET games = games + excluded.games, {updates}
+    """, (since_rowid,))
+
+
+def _load_model(conn: sqlite3.Connection, feature_set: str) -> Dict[str, Any]:
+    size = len(FEATURE_SETS[feature_set])
+    row = conn.execute("SELECT players, feature_sum, feature_outer FROM pca_models WHERE feature_set = ?", (feature_set,)).fetchone()
+    if row is None:
+        return {"players": 0, "sum": np.zeros(size), "outer": np.zeros((size, size))}
+    return {
+        "players": row[0],
+        "sum": np.frombuffer(row[1], dtype=np.float64).copy(),
+        "outer": np.frombuffer(row[2], dtype=np.float64).reshape(size, size).copy(),
+    }
+
+
+def fit_components(players: int, feature_sum: "np.ndarray", feature_outer: "np.ndarray") -> tuple:
+    """ACP normée à partir des statistiques suffisantes : (mean, scale, components, explained_variance)"""
+    mean = feature_sum / players
+    covariance = feature_outer / players - np.outer(mean, mean)
+    scale = np.sqrt(np.clip(np.diag(covariance), 0, None))
+    scale[scale == 0] = 1.0
+    correlation = covariance / np.outer(scale, scale)
+    eigenvalues, eigenvectors = np.linalg.eigh(correlation)
+    order = np.argsort(eigenvalues)[::-1][:N_COMPONENTS]
+    components = eigenvectors[:, order].T
+    # signe fixé (plus grand coefficient positif) pour que les axes ne s'inversent pas d'une mise à jour à l'autre
+    signs = np.sign(components[np.arange(len(order)), np.abs(components).argmax(axis=1)])
+    components *= np.where(signs == 0, 1, signs)[:, None]
+    explained = eigenvalues[order] / max(eigenvalues.sum(), 1e-12)
+    return mean, scale, components, explained
+
+
+def _update_feature_set(conn: sqlite3.Connection, feature_set: str, old: tuple, new: tuple) -> int:
+    """Met à jour les statistiques avec les joueurs modifiés, recalcule les axes et les projections"""
+    model = _load_model(conn, feature_set)
+    _, old_games, old_sums = old
+    _, new_games, new_sums = new
+
+    # on retire l'ancien vecteur des joueurs qui étaient déjà dans l'ACP et on ajoute le nouveau
+    old_vectors = feature_matrix(old_games, old_sums, feature_set).astype(np.float64)[old_games >= MIN_GAMES]
+    new_vectors = feature_matrix(new_games, new_sums, feature_set).astype(np.float64)[new_games >= MIN_GAMES]
+    model["players"] += len(new_vectors) - len(old_vectors)
+    model["sum"] += new_vectors.sum(axis=0) - old_vectors.sum(axis=0)
+    model["outer"] += new_vectors.T @ new_vectors - old_vectors.T @ old_vectors
+
+    conn.execute("DELETE FROM player_embeddings WHERE feature_set = ?", (feature_set,))
+    # les statistiques suffisantes sont toujours gardées : player_features contient les vecteurs
+    # qui seront retirés à la prochaine mise à jour, même si l'ACP ne peut pas encore être calculée
+    fitted = fit_components(model["players"], model["sum"], model["outer"]) if model["players"] >= 2 else None
+    conn.execute("""
+        INSERT OR REPLACE INTO pca_models (
+            feature_set, players, feature_sum, feature_outer, mean, scale, components, explained_variance, updated_at
+        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+    """, (
+        feature_set, model["players"], model["sum"].tobytes(), model["outer"].tobytes(),
+        *([value.astype(np.float32).tobytes() for value in fitted] if fitted else [None] * 4),
+        datetime.datetime.now().isoformat(timespec='seconds')
+    ))
+    if fitted is None:
+        return 0
+    mean, scale, components, _ = fitted
+
+    # les axes ont bougé : toutes les projections sont recalculées (produit matriciel float32)
+    player_ids, games, sums = _read_features(conn, "WHERE games >= ?", (MIN_GAMES,))
+    standardized = (feature_matrix(games, sums, feature_set) - mean.astype(np.float32)) / scale.astype(np.float32)
+    projections = standardized @ components.T.astype(np.float32)
+    placeholders = ', '.join('?' * (N_COMPONENTS + 2))
+    conn.executemany(
+        f"INSERT INTO player_embeddings VALUES ({placeholders})",
+        ((feature_set, player_id, *coordinates) for player_id, coordinates in zip(player_ids.tolist(), projections.tolist()))
+    )
+    return len(player_ids)
+
+
+def update_player_embeddings(conn: sqlite3.Connection, full: bool = False) -> Dict[str, int]:
+    """
+    Ajoute les nouvelles lignes de player_stats aux features et met à jour l'ACP de chaque
+    jeu de features (sans commit). full=True repart de zéro. Retourne le nb de joueurs projetés.
+    """
+    _require_numpy()
+    ensure_embedding_tables(conn)
+    if full:
+        conn.execute("DELETE FROM player_features")
+        conn.execute("DELETE FROM pca_models")
+        conn.execute("DELETE FROM player_embeddings")
+    watermark = 0 if full else int(get_meta(conn, PLAYER_STATS_WATERMARK_KEY, 0))
+    last_rowid = conn.execute("SELECT COALESCE(MAX(id), 0) FROM player_stats").fetchone()[0]
+    if last_rowid <= watermark:
+        return {}
+
+    conn.execute("CREATE TEMP TABLE IF NOT EXISTS embedding_dirty_players (player_id INTEGER PRIMARY KEY)")
+    conn.execute("DELETE FROM embedding_dirty_players")
+    conn.execute("""
+        INSERT INTO embedding_dirty_players (player_id)
+        SELECT DISTINCT player_id FROM player_stats WHERE id > ? AND player_id IS NOT NULL
+    """, (watermark,))
+    dirty = "WHERE player_id IN (SELECT player_id FROM embedding_dirty_players) ORDER BY player_id"
+
+    old = _read_features(conn, dirty)
+    _add_new_rows(conn, watermark)
+    new = _read_features(conn, dirty)
+
+    projected = {feature_set: _update_feature_set(conn, feature_set, old, new) for feature_set in FEATURE_SETS}
+    set_meta(conn, PLAYER_STATS_WATERMARK_KEY, last_rowid)
+    bump_write_generation(conn)
+    return projected
+
+
+def get_embedding(conn: sqlite3.Connection, feature_set: str = 'v1') -> Dict[str, Any]:
+    """Coordonnées des joueurs et part de variance expliquée par axe (ValueError si jeu inconnu)"""
+    if feature_set not in FEATURE_SETS:
+        raise ValueError(f"Jeu de features inconnu : {feature_set} (possibles : {', '.join(FEATURE_SETS)})")
+    model = conn.execute(
+        "SELECT players, explained_variance, components, updated_at FROM pca_models WHERE feature_set = ?", (feature_set,)
+    ).fetchone()
+    if model is None or model[2] is None:  # moins de 2 joueurs : pas encore d'axes
+        return {"feature_set": feature_set, "features": FEATURE_SETS[feature_set], "players": []}
+
+    components = [f"pc{i + 1}" for i in range(N_COMPONENTS)]
+    rows = conn.execute(f"""
+        SELECT e.player_id, p.name, f.games, {', '.join(f'e.{c}' for c in components)}
+        FROM player_embeddings e
+        JOIN player_features f ON f.player_id = e.player_id
+        LEFT JOIN players p ON p.id = e.player_id
+        WHERE e.feature_set = ?
+    """, (feature_set,)).fetchall()
+    return {
+        "feature_set": feature_set,
+        "features": FEATURE_SETS[feature_set],
+        "fitted_players": model[0],
+        "explained_variance": [round(float(v), 4) for v in np.frombuffer(model[1], dtype=np.float32)],
+        "loadings": np.frombuffer(model[2], dtype=np.float32).astype(np.float64).reshape(N_COMPONENTS, -1).round(4).tolist(),
+        "updated_at": model[3],
+        "players": [dict(zip(['player_id', 'name', 'games', *components], row)) for row in rows],
+    }
@@ -0,0 +1,121 @@
+"""
+Joueurs les plus proches d'un joueur (similarité cosinus exacte) sur un jeu de features.
+Les vecteurs viennent de player_features (sommes tenues à jour après chaque scraping par
+player_embedding) : moyennes par game centrées-réduites avec la moyenne et l'écart-type de
+pca_models, puis normées. Une recherche = un produit matrice-vecteur float32 et un argpartition.
+"""
+
+from collections import OrderedDict
+from typing import Any, Dict, List
+import sqlite3
+import threading
+
+try:
+    import numpy as np
+except ImportError:  # numpy est optionnel
+    np = None
+
+from .player_embedding import FEATURE_SETS, MIN_GAMES, _read_features, feature_matrix
+
+DEFAULT_NEIGHBOURS = 10
+MAX_NEIGHBOURS = 100
+RESULTS_CACHE_SIZE = 1024  # résultats (joueur, k) gardés par index
+
+
+def _require_numpy():
+    if np is None:
+        raise ImportError("numpy est requis pour la similarité des joueurs (pip install numpy)")
+
+
+class SimilarityIndex:
+    """Vecteurs normés des joueurs (MIN_GAMES games ou plus) d'un jeu de features, en mémoire"""
+
+    def __init__(self, feature_set: str, player_ids, vectors):
+        self.feature_set = feature_set
+        self.player_ids = player_ids
+        self.vectors = vectors  # float32, une ligne de norme 1 (ou nulle) par joueur
+        self.positions = {player_id: i for i, player_id in enumerate(player_ids.tolist())}
+        self.results = OrderedDict()
+        self.lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.player_ids)
+
+    def __contains__(self, player_id: int):
+        return player_id in self.positions
+
+    def most_similar(self, player_id: int, k: int = DEFAULT_NEIGHBOURS) -> List[tuple]:
+        """[(player_id, similarité)] des k joueurs les plus proches, le joueur lui-même exclu (KeyError si absent)"""
+        key = (player_id, k)
+        with self.lock:
+            if key in self.results:
+                self.results.move_to_end(key)
+                return self.results[key]
+
+        position = self.positions[player_id]
+        scores = self.vectors @ self.vectors[position]
+        scores[position] = -np.inf
+        k = min(k, len(scores) - 1)
+        if k <= 0:
+            return []
+        # les k meilleurs sans trier tout le tableau, puis triés entre eux
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top], kind='stable')]
+        neighbours = list(zip(self.player_ids[top].tolist(), scores[top].astype(np.float64).round(4).tolist()))
+
+        with self.lock:
+            self.results[key] = neighbours
+            if len(self.results) > RESULTS_CACHE_SIZE:
+                self.results.popitem(last=False)
+        return neighbours
+
+
+def build_index(conn: sqlite3.Connection, feature_set: str) -> SimilarityIndex:
+    """Construit l'index d'un jeu de features (ValueError si jeu inconnu, vide si l'ACP n'est pas calculée)"""
+    _require_numpy()
+    if feature_set not in FEATURE_SETS:
+        raise ValueError(f"Jeu de features inconnu : {feature_set} (possibles : {', '.join(FEATURE_SETS)})")
+    size = len(FEATURE_SETS[feature_set])
+    model = conn.execute("SELECT mean, scale FROM pca_models WHERE feature_set = ?", (feature_set,)).fetchone()
+    if model is None or model[0] is None:
+        return SimilarityIndex(feature_set, np.empty(0, dtype=np.int64), np.empty((0, size), dtype=np.float32))
+
+    mean = np.frombuffer(model[0], dtype=np.float32)
+    scale = np.frombuffer(model[1], dtype=np.float32)
+    player_ids, games, sums = _read_features(conn, "WHERE games >= ? ORDER BY player_id", (MIN_GAMES,))
+    vectors = (feature_matrix(games, sums, feature_set) - mean) / scale
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    vectors /= np.where(norms == 0, 1, norms)
+    return SimilarityIndex(feature_set, player_ids, vectors)
+
+
+def get_similar_players(conn: sqlite3.Connection, index: SimilarityIndex,
+                        player_id: int, k: int = DEFAULT_NEIGHBOURS) -> Dict[str, Any]:
+    """Voisins d'un joueur avec noms et nb de games (KeyError si le joueur n'est pas dans l'index)"""
+    neighbours = index.most_similar(player_id, k)
+    ids = [player_id] + [neighbour for neighbour, _ in neighbours]
+    placeholders = ', '.join('?' * len(ids))
+    players = {row[0]: row[1:] for row in conn.execute(f"""
+        SELECT f.player_id, p.name, f.games
+        FROM player_features f
+        LEFT JOIN players p ON p.id = f.player_id
+        WHERE f.player_id IN ({placeholders})
+    """, ids)}
+    name, games = players.get(player_id, (None, None))
+    return {
+        "feature_set": index.feature_set,
+        "features": FEATURE_SETS[index.feature_set],
+        "player_id": player_id,
+        "name": name,
+        "games": games,
+        "indexed_players": len(index),
+        "similar": [
+            {
+                "player_id": neighbour,
+                "name": players.get(neighbour, (None, None))[0],
+                "games": players.get(neighbour, (None, None))[1],
+                "similarity": similarity,
+            }
+            for neighbour, similarity in neighbours
+        ],
+    }
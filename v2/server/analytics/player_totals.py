@@ -0,0 +1,183 @@
+"""
+Totaux par joueur (et par équipe) en flux : les lignes sont lues au fur et à mesure, depuis la base
+(curseur sqlite lu par lots) ou depuis le gros json de v1 (ijson), et cumulées dans des tableaux
+compacts. La mémoire dépend du nombre de joueurs, pas de la taille des données.
+Même CSV que v1/api/player_stats_collection.py (moyennes par game).
+
+    python -m server.analytics.player_totals output/player_stats.csv
+    python -m server.analytics.player_totals output/player_stats.csv --json matches_raw.json --teams ../v1/data/teams.json
+"""
+
+from array import array
+from typing import Dict, Iterable, Optional, Tuple
+import argparse
+import csv
+import json
+import sqlite3
+
+try:
+    import ijson
+except ImportError:  # ijson est optionnel (lecture en flux du json de v1)
+    ijson = None
+
+# colonne du csv -> (colonne de player_stats, chemin dans les stats du json de v1)
+STAT_FIELDS = {
+    "acs_both": ("acs_both", ("acs", "both")),
+    "k_both": ("k_both", ("k", "both")),
+    "d_both": ("d_both", ("d", "both")),
+    "a_both": ("a_both", ("a", "both")),
+    "kddiff_both": ("kddiff_both", ("kddiff", "both")),
+    "kast_both": ("kast_both", ("kast", "both")),
+    "adr_both": ("adr_both", ("adr", "both")),
+    "hs_both": ("hs_both", ("hs", "both")),
+    "fk_both": ("fk_both", ("fk", "both")),
+    "fd_both": ("fd_both", ("fd", "both")),
+    "fkddiff_both": ("fkddiff_both", ("fkddiff", "both")),
+    "2k": ("multikills_2k", ("multikills", "2k")),
+    "3k": ("multikills_3k", ("multikills", "3k")),
+    "4k": ("multikills_4k", ("multikills", "4k")),
+    "5k": ("multikills_5k", ("multikills", "5k")),
+    "1v1": ("clutches_1v1", ("clutches", "1v1")),
+    "1v2": ("clutches_1v2", ("clutches", "1v2")),
+    "1v3": ("clutches_1v3", ("clutches", "1v3")),
+    "1v4": ("clutches_1v4", ("clutches", "1v4")),
+    "1v5": ("clutches_1v5", ("clutches", "1v5")),
+    "eco": ("eco", ("eco",)),
+    "plant": ("plant", ("plant",)),
+    "defuse": ("defuse", ("defuse",)),
+}
+STAT_NAMES = list(STAT_FIELDS)
+N_STATS = len(STAT_NAMES)
+
+FETCH_BATCH_SIZE = 5000
+UNKNOWN_REGION = 'unknown'
+
+
+def to_number(value) -> float:
+    """'65%', '+3', '' ou None -> nombre (0 si illisible, comme v1)"""
+    if isinstance(value, (int, float)):
+        return float(value)
+    if isinstance(value, str):
+        try:
+            return float(value.replace('%', '').replace('+', ''))
+        except ValueError:
+            return 0.0
+    return 0.0
+
+
+class PlayerTotals:
+    """Sommes par (joueur, équipe) dans des tableaux plats : N_STATS valeurs par joueur à la suite"""
+
+    def __init__(self):
+        self.slots: Dict[Tuple[str, str], int] = {}
+        self.regions = []
+        self.totals = array('d')
+        self.games = array('l')
+        self.rounds = array('l')
+
+    def __len__(self):
+        return len(self.regions)
+
+    def add(self, name: str, team: str, region: Optional[str], values: Iterable, rounds: int) -> None:
+        slot = self.slots.get((name, team))
+        if slot is None:
+            slot = self.slots[(name, team)] = len(self.regions)
+            self.regions.append(region or UNKNOWN_REGION)
+            self.totals.extend([0.0] * N_STATS)
+            self.games.append(0)
+            self.rounds.append(0)
+        offset = slot * N_STATS
+        for i, value in enumerate(values):
+            self.totals[offset + i] += to_number(value)
+        self.games[slot] += 1
+        self.rounds[slot] += rounds or 0
+
+    def rows(self):
+        """Lignes du csv : totaux divisés par le nb de games (sauf rounds), comme v1"""
+        for (name, team), slot in self.slots.items():
+            games = self.games[slot]
+            offset = slot * N_STATS
+            averages = [round(self.totals[offset + i] / games, 8) if games else 0 for i in range(N_STATS)]
+            yield [name, team, self.regions[slot], self.rounds[slot], *averages, games]
+
+    def write_csv(self, path: str) -> int:
+        with open(path, 'w', newline='', encoding='utf-8') as f:
+            writer = csv.writer(f)
+            writer.writerow(["player_name", "team", "region", "rounds", *STAT_NAMES, "games_played"])
+            writer.writerows(self.rows())
+        return len(self)
+
+
+def aggregate_from_database(conn: sqlite3.Connection, batch_size: int = FETCH_BATCH_SIZE) -> PlayerTotals:
+    """Parcourt player_stats par lots (fetchmany), sans jamais charger toute la table"""
+    totals = PlayerTotals()
+    columns = ', '.join(f"ps.{column}" for column, _ in STAT_FIELDS.values())
+    cursor = conn.execute(f"""
+        SELECT p.name, t.short_name, t.region, rc.rounds, {columns}
+        FROM player_stats ps
+        LEFT JOIN players p ON p.id = ps.player_id
+        LEFT JOIN teams t ON t.id = ps.team_id
+        LEFT JOIN (SELECT game_id, COUNT(*) AS rounds FROM round_history GROUP BY game_id) rc ON rc.game_id = ps.game_id
+    """)
+    while True:
+        batch = cursor.fetchmany(batch_size)
+        if not batch:
+            break
+        for row in batch:
+            totals.add(row[0], row[1], row[2], row[4:], row[3])
+    return totals
+
+
+def load_team_regions(teams_path: str) -> Dict[str, str]:
+    """teams.json de v1 ({"regions": {région: [équipes]}}) -> {équipe: région}, un seul dict"""
+    with open(teams_path, 'r', encoding='utf-8') as f:
+        teams_data = json.load(f)
+    return {team: region for region, teams in teams_data.get("regions", {}).items() for team in teams}
+
+
+def _json_stat(stats: dict, path: tuple):
+    value = stats
+    for key in path:
+        value = value.get(key, 0) if isinstance(value, dict) else 0
+    return value
+
+
+def aggregate_from_json(json_path: str, teams_path: Optional[str] = None) -> PlayerTotals:
+    """Lit les matchs du json de v1 un par un avec ijson (le fichier n'est jamais chargé en entier)"""
+    if ijson is None:
+        raise ImportError("ijson est requis pour lire le json en flux (pip install ijson)")
+    regions = load_team_regions(teams_path) if teams_path else {}
+    totals = PlayerTotals()
+    with open(json_path, 'rb') as f:
+        for match in ijson.items(f, 'item', use_float=True):
+            for game in match.get("games", []):
+                rounds = len(game.get("history", []))
+                for players in game.get("scoreboard", {}).values():
+                    for player in players:
+                        stats = player.get("stats", {})
+                        team = player.get("team")
+                        totals.add(
+                            player.get("name"), team, regions.get(team),
+                            (_json_stat(stats, path) for _, path in STAT_FIELDS.values()), rounds
+                        )
+    return totals
+
+
+if __name__ == '__main__':
+    from ..database.database import get_db_connection
+
+    parser = argparse.ArgumentParser(description="CSV des stats moyennes par joueur et par équipe")
+    parser.add_argument('output', help="fichier csv à écrire")
+    parser.add_argument('--json', help="json de matchs de v1 à lire en flux (sinon la base v2)")
+    parser.add_argument('--teams', help="teams.json de v1 pour les régions (avec --json)")
+    args = parser.parse_args()
+
+    if args.json:
+        player_totals = aggregate_from_json(args.json, args.teams)
+    else:
+        conn = get_db_connection()
+        try:
+            player_totals = aggregate_from_database(conn)
+        finally:
+            conn.close()
+    print(f"{player_totals.write_csv(args.output)} joueurs écrits dans {args.output}")
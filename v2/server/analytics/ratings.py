@@ -0,0 +1,295 @@
+"""
+Classement Elo des équipes, au niveau des séries (match_teams) et des maps (game_scores).
+Après chaque scraping seuls les nouveaux matchs/maps sont joués (watermark dans db_meta),
+rebuild_ratings() rejoue tout l'historique par lots vectorisés (numpy).
+"""
+
+from typing import Any, Dict, List, Optional
+import sqlite3
+
+try:
+    import numpy as np
+except ImportError:  # numpy est optionnel (reconstruction complète seulement)
+    np = None
+
+from ..database.database import get_meta, set_meta, bump_write_generation
+
+INITIAL_RATING = 1500.0
+ELO_SCALE = 400.0
+
+# niveau -> facteur K
+RATING_LEVELS = {
+    'series': 32.0,
+    'map': 24.0,
+}
+
+# dernières lignes déjà jouées (rowid de match_teams / game_scores), dans db_meta
+WATERMARK_KEYS = {
+    'series': 'ratings_series_match_teams_rowid',
+    'map': 'ratings_map_game_scores_rowid',
+}
+
+RATING_SCHEMA = [
+    """
+    CREATE TABLE IF NOT EXISTS team_ratings (
+        level TEXT,
+        team_id INTEGER,
+        rating REAL,
+        played INTEGER,
+        wins INTEGER,
+        peak REAL,
+        last_date DATE,
+        PRIMARY KEY (level, team_id)
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS team_rating_history (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        level TEXT,
+        match_id INTEGER,
+        game_id INTEGER,  -- NULL pour les séries
+        date DATE,
+        team_id INTEGER,
+        opponent_id INTEGER,
+        won INTEGER,
+        expected REAL,
+        rating_before REAL,
+        rating_after REAL
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS idx_team_rating_history_team ON team_rating_history (level, team_id, id)",
+    "CREATE INDEX IF NOT EXISTS idx_team_rating_history_match ON team_rating_history (level, match_id, game_id)",
+]
+
+# une ligne par confrontation terminée : (rowid, match_id, game_id, date, équipe 1, équipe 2, équipe 1 gagne)
+# triées dans l'ordre chronologique, sans celles déjà présentes dans l'historique (lignes re-scrapées)
+RESULTS_QUERIES = {
+    'series': """
+        SELECT b.id, m.match_id, NULL, m.date, a.team_id, b.team_id, a.is_winner
+        FROM match_teams a
+        JOIN match_teams b ON b.match_id = a.match_id AND b.id > a.id
+        JOIN matches m ON m.match_id = a.match_id
+        WHERE b.id > ? AND a.team_id IS NOT NULL AND b.team_id IS NOT NULL
+          AND a.team_id != b.team_id AND a.is_winner + b.is_winner = 1
+          AND NOT EXISTS (SELECT 1 FROM team_rating_history h WHERE h.level = 'series' AND h.match_id = m.match_id)
+        ORDER BY m.date, m.match_id
+    """,
+    'map': """
+        SELECT b.id, g.match_id, g.game_id, m.date, a.team_id, b.team_id, a.score > b.score
+        FROM game_scores a
+        JOIN game_scores b ON b.game_id = a.game_id AND b.id > a.id
+        JOIN games g ON g.game_id = a.game_id
+        JOIN matches m ON m.match_id = g.match_id
+        WHERE b.id > ? AND a.team_id IS NOT NULL AND b.team_id IS NOT NULL
+          AND a.team_id != b.team_id AND a.score != b.score
+          AND NOT EXISTS (SELECT 1 FROM team_rating_history h WHERE h.level = 'map' AND h.match_id = g.match_id AND h.game_id = g.game_id)
+        ORDER BY m.date, m.match_id, g.game_id
+    """,
+}
+
+
+def ensure_rating_tables(conn: sqlite3.Connection) -> None:
+    for statement in RATING_SCHEMA:
+        conn.execute(statement)
+
+
+def _fetch_results(conn: sqlite3.Connection, level: str, watermark: int) -> list:
+    """Confrontations à jouer, une seule fois chacune (un match re-scrapé a ses lignes en double)"""
+    results = []
+    seen = set()
+    for row in conn.execute(RESULTS_QUERIES[level], (watermark,)):
+        if (row[1], row[2]) not in seen:
+            seen.add((row[1], row[2]))
+            results.append(row)
+    return results
+
+
+def expected_score(rating: float, opponent: float) -> float:
+    return 1.0 / (1.0 + 10.0 ** ((opponent - rating) / ELO_SCALE))
+
+
+def _write_history(conn: sqlite3.Connection, level: str, rows: list) -> None:
+    conn.executemany("""
+        INSERT INTO team_rating_history (
+            level, match_id, game_id, date, team_id, opponent_id, won, expected, rating_before, rating_after
+        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+    """, [(level, *row) for row in rows])
+
+
+def _write_ratings(conn: sqlite3.Connection, level: str, states: Dict[int, list]) -> None:
+    conn.executemany("""
+        INSERT OR REPLACE INTO team_ratings (level, team_id, rating, played, wins, peak, last_date)
+        VALUES (?, ?, ?, ?, ?, ?, ?)
+    """, [(level, team_id, *state) for team_id, state in states.items()])
+
+
+def _update_level(conn: sqlite3.Connection, level: str) -> int:
+    """Joue les confrontations arrivées depuis le watermark, retourne leur nombre"""
+    k = RATING_LEVELS[level]
+    watermark = int(get_meta(conn, WATERMARK_KEYS[level], 0))
+    results = _fetch_results(conn, level, watermark)
+    if not results:
+        return 0
+
+    # état des équipes concernées : [rating, played, wins, peak, last_date]
+    teams = {team for row in results for team in (row[4], row[5])}
+    states = {}
+    for team_id, rating, played, wins, peak, last_date in conn.execute(
+        "SELECT team_id, rating, played, wins, peak, last_date FROM team_ratings WHERE level = ?", (level,)
+    ):
+        if team_id in teams:
+            states[team_id] = [rating, played, wins, peak, last_date]
+
+    history = []
+    for _, match_id, game_id, date, team_a, team_b, a_won in results:
+        a = states.setdefault(team_a, [INITIAL_RATING, 0, 0, INITIAL_RATING, None])
+        b = states.setdefault(team_b, [INITIAL_RATING, 0, 0, INITIAL_RATING, None])
+        expected = expected_score(a[0], b[0])
+        delta = k * (a_won - expected)
+        history.append((match_id, game_id, date, team_a, team_b, a_won, expected, a[0], a[0] + delta))
+        history.append((match_id, game_id, date, team_b, team_a, 1 - a_won, 1 - expected, b[0], b[0] - delta))
+        for state, change, won in ((a, delta, a_won), (b, -delta, 1 - a_won)):
+            state[0] += change
+            state[1] += 1
+            state[2] += won
+            state[3] = max(state[3], state[0])
+            state[4] = date
+
+    _write_history(conn, level, history)
+    _write_ratings(conn, level, states)
+    set_meta(conn, WATERMARK_KEYS[level], max(watermark, max(row[0] for row in results)))
+    return len(results)
+
+
+def update_ratings(conn: sqlite3.Connection) -> Dict[str, int]:
+    """
+    Met à jour les classements avec les matchs/maps scrapés depuis la dernière fois (sans commit).
+    Un match plus ancien que ceux déjà joués est joué à la suite (rebuild_ratings() remet l'ordre
+    chronologique exact). Retourne le nombre de confrontations jouées par niveau.
+    """
+    ensure_rating_tables(conn)
+    played = {level: _update_level(conn, level) for level in RATING_LEVELS}
+    if any(played.values()):
+        bump_write_generation(conn)
+    return played
+
+
+def _disjoint_batches(team_a: "np.ndarray", team_b: "np.ndarray") -> List[tuple]:
+    """
+    Découpe la suite chronologique en lots consécutifs où chaque équipe joue au plus une fois :
+    les mises à jour d'un lot sont indépendantes et se font d'un coup, dans le même ordre qu'en séquentiel.
+    """
+    batches = []
+    start = 0
+    seen = set()
+    for i, (a, b) in enumerate(zip(team_a.tolist(), team_b.tolist())):
+        if a in seen or b in seen:
+            batches.append((start, i))
+            start = i
+            seen = set()
+        seen.add(a)
+        seen.add(b)
+    batches.append((start, len(team_a)))
+    return batches
+
+
+def _rebuild_level(conn: sqlite3.Connection, level: str) -> int:
+    k = RATING_LEVELS[level]
+    conn.execute("DELETE FROM team_rating_history WHERE level = ?", (level,))
+    conn.execute("DELETE FROM team_ratings WHERE level = ?", (level,))
+    results = _fetch_results(conn, level, 0)
+    set_meta(conn, WATERMARK_KEYS[level], max((row[0] for row in results), default=0))
+    if not results:
+        return 0
+
+    team_ids, indexes = np.unique(np.array([(row[4], row[5]) for row in results], dtype=np.int64), return_inverse=True)
+    indexes = indexes.reshape(-1, 2)
+    team_a, team_b = indexes[:, 0], indexes[:, 1]
+    a_won = np.array([row[6] for row in results], dtype=np.float64)
+
+    ratings = np.full(len(team_ids), INITIAL_RATING)
+    peaks = ratings.copy()
+    before_a = np.empty(len(results))
+    before_b = np.empty(len(results))
+    expected = np.empty(len(results))
+    for start, end in _disjoint_batches(team_a, team_b):
+        a, b = team_a[start:end], team_b[start:end]
+        rating_a, rating_b = ratings[a], ratings[b]
+        expected[start:end] = 1.0 / (1.0 + 10.0 ** ((rating_b - rating_a) / ELO_SCALE))
+        delta = k * (a_won[start:end] - expected[start:end])
+        before_a[start:end], before_b[start:end] = rating_a, rating_b
+        ratings[a] = rating_a + delta
+        ratings[b] = rating_b - delta
+        peaks[a] = np.maximum(peaks[a], ratings[a])
+        peaks[b] = np.maximum(peaks[b], ratings[b])
+    delta = k * (a_won - expected)
+
+    history = []
+    for i, (_, match_id, game_id, date, id_a, id_b, won) in enumerate(results):
+        history.append((match_id, game_id, date, id_a, id_b, won, expected[i], before_a[i], before_a[i] + delta[i]))
+        history.append((match_id, game_id, date, id_b, id_a, 1 - won, 1 - expected[i], before_b[i], before_b[i] - delta[i]))
+    _write_history(conn, level, history)
+
+    played = np.bincount(indexes.ravel(), minlength=len(team_ids))
+    wins = np.bincount(team_a, weights=a_won, minlength=len(team_ids)) + np.bincount(team_b, weights=1 - a_won, minlength=len(team_ids))
+    last_dates = {}
+    for row in results:  # ordre chronologique : la dernière date gagne
+        last_dates[row[4]] = last_dates[row[5]] = row[3]
+    _write_ratings(conn, level, {
+        int(team_id): [float(ratings[i]), int(played[i]), int(wins[i]), float(peaks[i]), last_dates[int(team_id)]]
+        for i, team_id in enumerate(team_ids)
+    })
+    return len(results)
+
+
+def rebuild_ratings(conn: sqlite3.Connection) -> Dict[str, int]:
+    """Recalcule entièrement les classements dans l'ordre chronologique (sans commit, numpy requis)"""
+    if np is None:
+        raise ImportError("numpy est requis pour la reconstruction des classements (pip install numpy)")
+    ensure_rating_tables(conn)
+    played = {level: _rebuild_level(conn, level) for level in RATING_LEVELS}
+    bump_write_generation(conn)
+    return played
+
+
+def get_ratings(conn: sqlite3.Connection, level: str = 'series', region: Optional[str] = None, limit: int = 50) -> List[Dict[str, Any]]:
+    """Classement actuel des équipes (ValueError si niveau inconnu)"""
+    if level not in RATING_LEVELS:
+        raise ValueError(f"Niveau inconnu : {level} (possibles : {', '.join(RATING_LEVELS)})")
+    rows = conn.execute("""
+        SELECT r.team_id, t.name, t.short_name, t.region, r.rating, r.played, r.wins, r.peak, r.last_date
+        FROM team_ratings r
+        LEFT JOIN teams t ON t.id = r.team_id
+        WHERE r.level = ? AND (? IS NULL OR t.region = ?)
+        ORDER BY r.rating DESC
+        LIMIT ?
+    """, (level, region, region, limit)).fetchall()
+    columns = ['team_id', 'name', 'short_name', 'region', 'rating', 'played', 'wins', 'peak', 'last_date']
+    return [dict(zip(columns, row)) for row in rows]
+
+
+def get_rating_history(conn: sqlite3.Connection, team_id: int, level: str = 'series') -> List[Dict[str, Any]]:
+    """Evolution du classement d'une équipe, match par match (ou map par map)"""
+    if level not in RATING_LEVELS:
+        raise ValueError(f"Niveau inconnu : {level} (possibles : {', '.join(RATING_LEVELS)})")
+    rows = conn.execute("""
+        SELECT h.match_id, h.game_id, h.date, h.opponent_id, t.short_name, h.won, h.expected, h.rating_before, h.rating_after
+        FROM team_rating_history h
+        LEFT JOIN teams t ON t.id = h.opponent_id
+        WHERE h.level = ? AND h.team_id = ?
+        ORDER BY h.id
+    """, (level, team_id)).fetchall()
+    columns = ['match_id', 'game_id', 'date', 'opponent_id', 'opponent', 'won', 'expected', 'rating_before', 'rating_after']
+    return [dict(zip(columns, row)) for row in rows]
+
+
+if __name__ == '__main__':
+    # reconstruction complète : python -m server.analytics.ratings (depuis v2/)
+    from ..database.database import get_db_connection
+
+    conn = get_db_connection()
+    try:
+        print(f"Classements reconstruits : {rebuild_ratings(conn)}")
+        conn.commit()
+    finally:
+        conn.close()
@@ -0,0 +1,201 @@
+"""
+Probabilité de gagner la map depuis chaque score (0-0 à 12-12), pour toutes les équipes d'un coup.
+round_history est lu une fois, les scores sont calculés en tableaux numpy et comptés en une passe
+(bincount) puis ajoutés à la table team_round_states ; seules les nouvelles games sont traitées.
+"""
+
+from typing import Any, Dict, List, Optional
+import sqlite3
+
+try:
+    import numpy as np
+except ImportError:  # numpy est optionnel
+    np = None
+
+from ..database.database import bump_write_generation
+
+MAX_SCORE = 12  # au-delà de 12-12 (prolongations) les scores ne sont pas comptés, comme dans v1
+STATES = MAX_SCORE + 1
+GAMES_BATCH_SIZE = 5000
+
+ROUND_STATES_SCHEMA = [
+    """
+    CREATE TABLE IF NOT EXISTS team_round_states (
+        team_id INTEGER,
+        team_score INTEGER,
+        opponent_score INTEGER,
+        reached INTEGER,  -- nb de maps où l'équipe a été à ce score
+        wins INTEGER,  -- dont gagnées
+        PRIMARY KEY (team_id, team_score, opponent_score)
+    )
+    """,
+    # games déjà comptées (traitement incrémental)
+    """
+    CREATE TABLE IF NOT EXISTS round_states_games (
+        game_id INTEGER PRIMARY KEY
+    )
+    """,
+]
+
+
+def _require_numpy():
+    if np is None:
+        raise ImportError("numpy est requis pour les tables de scores (pip install numpy)")
+
+
+def ensure_round_states_tables(conn: sqlite3.Connection) -> None:
+    for statement in ROUND_STATES_SCHEMA:
+        conn.execute(statement)
+
+
+def _load_games(conn: sqlite3.Connection, game_ids: List[int]) -> tuple:
+    """
+    Rounds des games (triés par game puis round) et les deux équipes de chaque game, en tableaux,
+    précédés des games dont les scores sont complets (deux équipes dans game_scores).
+    Les games dont un round n'a pas de vainqueur connu parmi les deux équipes sont écartées.
+    """
+    placeholders = ', '.join('?' * len(game_ids))
+    teams = {}
+    for game_id, team_id in conn.execute(f"""
+        SELECT game_id, team_id FROM game_scores
+        WHERE game_id IN ({placeholders}) AND team_id IS NOT NULL
+        ORDER BY game_id, id
+    """, game_ids):
+        game_teams = teams.setdefault(game_id, [])
+        if team_id not in game_teams:
+            game_teams.append(team_id)
+
+    rounds = np.array(conn.execute(f"""
+        SELECT game_id, COALESCE(CAST(winner AS INTEGER), 0) FROM round_history
+        WHERE game_id IN ({placeholders})
+        ORDER BY game_id, round_number
+    """, game_ids).fetchall(), dtype=np.int64).reshape(-1, 2)
+
+    valid_games = np.array([game_id for game_id, game_teams in teams.items() if len(game_teams) == 2], dtype=np.int64)
+    rounds = rounds[np.isin(rounds[:, 0], valid_games)]
+    game_of_round, winner = rounds[:, 0], rounds[:, 1]
+
+    games, round_game = np.unique(game_of_round, return_inverse=True)
+    team_a = np.array([teams[game_id][0] for game_id in games.tolist()], dtype=np.int64)
+    team_b = np.array([teams[game_id][1] for game_id in games.tolist()], dtype=np.int64)
+
+    # un vainqueur inconnu (ou NULL -> 0) invalide toute la game
+    unknown = (winner != team_a[round_game]) & (winner != team_b[round_game])
+    bad_games = np.unique(round_game[unknown])
+    keep_games = np.ones(len(games), dtype=bool)
+    keep_games[bad_games] = False
+    keep_rounds = keep_games[round_game]
+
+    games, team_a, team_b = games[keep_games], team_a[keep_games], team_b[keep_games]
+    round_game = np.cumsum(keep_games)[round_game[keep_rounds]] - 1  # réindexation des games gardées
+    a_won_round = (winner[keep_rounds] == team_a[round_game]).astype(np.int64)
+    return valid_games.tolist(), (games, team_a, team_b, round_game, a_won_round)
+
+
+def count_round_states(games, team_a, team_b, round_game, a_won_round) -> tuple:
+    """
+    Compte, pour toutes les équipes en une passe, les maps passées par chaque score et celles gagnées.
+    Retourne (team_ids, reached, wins) avec reached/wins de forme (équipes, STATES, STATES).
+    """
+    n_games = len(games)
+    team_ids, team_index = np.unique(np.concatenate([team_a, team_b]), return_inverse=True)
+    index_a, index_b = team_index[:n_games], team_index[n_games:]
+    reached = np.zeros(len(team_ids) * STATES * STATES, dtype=np.int64)
+    wins = np.zeros_like(reached)
+    if n_games == 0:
+        return team_ids, reached.reshape(-1, STATES, STATES), wins.reshape(-1, STATES, STATES)
+
+    # score avant chaque round : cumul des rounds gagnés dans la game, moins le round lui-même
+    first_round = np.searchsorted(round_game, np.arange(n_games))
+    cumulative = np.cumsum(a_won_round)
+    a_after = cumulative - (cumulative[first_round] - a_won_round[first_round])[round_game]
+    round_in_game = np.arange(len(round_game)) - first_round[round_game]
+    a_before = a_after - a_won_round
+    b_before = round_in_game - a_before
+
+    # la map est gagnée par l'équipe qui gagne le dernier round
+    last_round = np.append(first_round[1:], len(round_game)) - 1
+    a_won_game = a_won_round[last_round][round_game]
+
+    in_range = (a_before <= MAX_SCORE) & (b_before <= MAX_SCORE)
+    a_before, b_before = a_before[in_range], b_before[in_range]
+    state_game, a_won_state = round_game[in_range], a_won_game[in_range]
+
+    # un état = équipe * 169 + son score * 13 + score adverse, vu des deux équipes
+    keys = np.concatenate([
+        (index_a[state_game] * STATES + a_before) * STATES + b_before,
+        (index_b[state_game] * STATES + b_before) * STATES + a_before,
+    ])
+    won = np.concatenate([a_won_state, 1 - a_won_state])
+    reached += np.bincount(keys, minlength=len(reached))
+    wins += np.bincount(keys, weights=won, minlength=len(reached)).astype(np.int64)
+    return team_ids, reached.reshape(-1, STATES, STATES), wins.reshape(-1, STATES, STATES)
+
+
+def _add_states(conn: sqlite3.Connection, team_ids, reached, wins) -> None:
+    teams, team_scores, opponent_scores = np.nonzero(reached)
+    conn.executemany("""
+        INSERT INTO team_round_states (team_id, team_score, opponent_score, reached, wins)
+        VALUES (?, ?, ?, ?, ?)
+        ON CONFLICT (team_id, team_score, opponent_score) DO UPDATE SET
+            reached = reached + excluded.reached,
+            wins = wins + excluded.wins
+    """, zip(
+        team_ids[teams].tolist(), team_scores.tolist(), opponent_scores.tolist(),
+        reached[teams, team_scores, opponent_scores].tolist(), wins[teams, team_scores, opponent_scores].tolist()
+    ))
+
+
+def update_round_states(conn: sqlite3.Connection, full: bool = False) -> int:
+    """
+    Ajoute aux tables les games pas encore comptées (toutes si full=True), sans commit.
+    Retourne le nombre de games comptées.
+    """
+    _require_numpy()
+    ensure_round_states_tables(conn)
+    if full:
+        conn.execute("DELETE FROM team_round_states")
+        conn.execute("DELETE FROM round_states_games")
+
+    pending = [row[0] for row in conn.execute("""
+        SELECT DISTINCT rh.game_id FROM round_history rh
+        WHERE rh.game_id IS NOT NULL
+          AND rh.game_id NOT IN (SELECT game_id FROM round_states_games)
+    """)]
+
+    counted = marked = 0
+    for start in range(0, len(pending), GAMES_BATCH_SIZE):
+        batch = pending[start:start + GAMES_BATCH_SIZE]
+        scored_games, rounds = _load_games(conn, batch)
+        _add_states(conn, *count_round_states(*rounds))
+        # les games écartées pour un vainqueur inconnu sont aussi marquées : elles ne changeront plus ;
+        # celles dont les scores manquent (match pas encore ou mal scrapé) restent en attente
+        conn.executemany("INSERT OR IGNORE INTO round_states_games (game_id) VALUES (?)", [(g,) for g in scored_games])
+        counted += len(rounds[0])
+        marked += len(scored_games)
+
+    if marked:
+        bump_write_generation(conn)
+    return counted
+
+
+def get_round_states(conn: sqlite3.Connection, team_id: Optional[int] = None) -> Dict[str, Any]:
+    """
+    Matrice des scores d'une équipe (toutes les équipes si team_id est None) :
+    {"team_score-opponent_score": {reached, wins, winrate}} comme les fichiers score_matrix de v1.
+    """
+    rows = conn.execute("""
+        SELECT team_score, opponent_score, SUM(reached), SUM(wins)
+        FROM team_round_states
+        WHERE ? IS NULL OR team_id = ?
+        GROUP BY team_score, opponent_score
+        ORDER BY team_score, opponent_score
+    """, (team_id, team_id)).fetchall()
+    return {
+        f"{team_score}-{opponent_score}": {
+            "reached": reached,
+            "wins": wins,
+            "winrate": round(wins / reached, 4) if reached else None,
+        }
+        for team_score, opponent_score, reached, wins in rows
+    }
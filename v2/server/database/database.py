@@ -1,7 +1,16 @@
 import sqlite3
 import os
 
+from .search import ensure_search_tables, rebuild_search_index
+
 DATABASE_PATH = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'data', 'vlrgg_stats.db'))
+# copie cohérente de la base publiée à la fin de chaque scraping, lue par le site web
+SNAPSHOT_PATH = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'data', 'vlrgg_stats_snapshot.db'))
+
+# compteur incrémenté à chaque écriture des scrapers (sert à invalider les caches des lecteurs)
+WRITE_GENERATION_KEY = 'write_generation'
+# génération d'écriture au moment du dernier ANALYZE (sqlite_stat1 à jour si égale à la génération courante)
+ANALYZE_GENERATION_KEY = 'analyze_generation'
 
 def get_db_connection() -> sqlite3.Connection:
     conn = sqlite3.connect(DATABASE_PATH)
@@ -23,6 +32,7 @@ def init_database(overwrite: bool = False) -> None:
         print(f"Database already exists at: {DATABASE_PATH}")
         if not overwrite:
             print("Skipping initialization. Use overwrite=True to reinitialize.")
+            ensure_support_tables()
             return
         else:
             os.remove(DATABASE_PATH)
@@ -34,6 +44,8 @@ def init_database(overwrite: bool = False) -> None:
         schema = f.read()
     
     conn.executescript(schema)
+    ensure_meta_table(conn)
+    ensure_search_tables(conn)
     conn.commit()
     conn.close()
     
@@ -56,4 +68,94 @@ def execute_query(query: str) -> list[dict] | None:
     except sqlite3.Error as e:
         raise Exception(f"SQL error: {e}")
     finally:
-        conn.close()
\ No newline at end of file
+        conn.close()
+
+def ensure_support_tables() -> None:
+    """tables ajoutées après coup (db_meta, index de recherche) sur une base existante"""
+    conn = get_db_connection()
+    ensure_meta_table(conn)
+    if ensure_search_tables(conn):
+        counts = rebuild_search_index(conn)
+        print(f"Search index built: {counts}")
+    conn.commit()
+    conn.close()
+
+def ensure_meta_table(conn: sqlite3.Connection) -> None:
+    """table clé/valeur pour les infos internes (génération d'écriture, watermarks...)"""
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS db_meta (
+            key TEXT PRIMARY KEY,
+            value
+        )
+    """)
+
+def get_meta(conn: sqlite3.Connection, key: str, default=None):
+    """lire une valeur de db_meta (default si absente ou si la table n'existe pas)"""
+    try:
+        row = conn.execute("SELECT value FROM db_meta WHERE key = ?", (key,)).fetchone()
+    except sqlite3.OperationalError:
+        return default
+    return row[0] if row else default
+
+def set_meta(conn: sqlite3.Connection, key: str, value) -> None:
+    """écrire une valeur dans db_meta (sans commit)"""
+    ensure_meta_table(conn)
+    conn.execute("INSERT OR REPLACE INTO db_meta (key, value) VALUES (?, ?)", (key, value))
+
+def bump_write_generation(conn: sqlite3.Connection) -> None:
+    """incrémenter la génération d'écriture (à appeler dans la transaction d'écriture, avant le commit)"""
+    ensure_meta_table(conn)
+    conn.execute("""
+        INSERT INTO db_meta (key, value) VALUES (?, 1)
+        ON CONFLICT(key) DO UPDATE SET value = value + 1
+    """, (WRITE_GENERATION_KEY,))
+
+def get_write_generation(conn: sqlite3.Connection) -> int:
+    """génération d'écriture courante (0 si la base n'a jamais été écrite par les scrapers)"""
+    return int(get_meta(conn, WRITE_GENERATION_KEY, 0))
+
+def analyze_database(conn: sqlite3.Connection) -> None:
+    """mettre à jour les statistiques sqlite (sqlite_stat1 : nb de lignes des tables et index), sans commit"""
+    conn.execute("ANALYZE")
+    set_meta(conn, ANALYZE_GENERATION_KEY, get_write_generation(conn))
+
+def get_table_row_counts(conn: sqlite3.Connection) -> dict[str, int]:
+    """nb de lignes par table d'après sqlite_stat1 (vide si ANALYZE n'a jamais été lancé)"""
+    try:
+        rows = conn.execute("SELECT tbl, stat FROM sqlite_stat1").fetchall()
+    except sqlite3.OperationalError:
+        return {}
+    counts = {}
+    for table, stat in rows:
+        # le premier nombre de stat est le nb de lignes de la table (identique pour chacun de ses index)
+        counts.setdefault(table, int(stat.split()[0]))
+    return counts
+
+def are_statistics_fresh(conn: sqlite3.Connection) -> bool:
+    """sqlite_stat1 a-t-il été calculé après la dernière écriture des scrapers ?"""
+    analyzed = get_meta(conn, ANALYZE_GENERATION_KEY)
+    return analyzed is not None and int(analyzed) == get_write_generation(conn)
+
+def publish_snapshot(db_path: str = DATABASE_PATH, snapshot_path: str = SNAPSHOT_PATH) -> str:
+    """
+    Publie une copie cohérente de la base pour les lecteurs (site web) :
+    copie avec l'API de backup sqlite dans un fichier temporaire puis remplacement atomique.
+    Les connexions déjà ouvertes sur l'ancien snapshot continuent de le lire jusqu'à leur fermeture.
+    """
+    tmp_path = snapshot_path + '.tmp'
+    if os.path.exists(tmp_path):
+        os.remove(tmp_path)  # reste d'une publication interrompue
+
+    source = sqlite3.connect(db_path)
+    target = sqlite3.connect(tmp_path)
+    try:
+        source.backup(target)
+        # le snapshot est ouvert en immutable : pas de wal/journal à prendre en compte
+        target.execute("PRAGMA journal_mode = DELETE")
+        target.commit()
+    finally:
+        target.close()
+        source.close()
+
+    os.replace(tmp_path, snapshot_path)
+    return snapshot_path
@@ -0,0 +1,116 @@
+"""
+Index de recherche plein texte (FTS5) sur les joueurs, équipes et events.
+Les tables *_fts sont mises à jour par les scrapers en même temps que les tables d'origine
+(rowid = id de la ligne d'origine), rebuild_search_index() les reconstruit entièrement.
+"""
+
+import sqlite3
+import re
+
+Connection = sqlite3.Connection | sqlite3.Cursor
+
+# type -> (table fts, colonnes indexées, table d'origine, colonnes d'origine)
+SEARCH_TABLES = {
+    'player': ('players_fts', ['name'], 'players', ['name']),
+    'team': ('teams_fts', ['name', 'short_name', 'region'], 'teams', ['name', 'short_name', 'region']),
+    'event': ('events_fts', ['title', 'event_name', 'region'], 'events', ['title', 'event_name', 'region']),
+}
+
+# poids bm25 des colonnes (le nom compte plus que la région)
+SEARCH_WEIGHTS = {
+    'player': [1.0],
+    'team': [2.0, 2.0, 0.5],
+    'event': [2.0, 1.0, 0.5],
+}
+
+SEARCH_TOKEN = re.compile(r'\w+', re.UNICODE)
+
+
+def ensure_search_tables(conn: Connection) -> bool:
+    """Crée les tables fts si besoin, True si au moins une a été créée (index à reconstruire)"""
+    created = False
+    for fts_table, columns, _, _ in SEARCH_TABLES.values():
+        exists = conn.execute("SELECT 1 FROM sqlite_master WHERE name = ?", (fts_table,)).fetchone()
+        if not exists:
+            # index de préfixes pour l'autocomplétion dès 2 caractères
+            conn.execute(f"""
+                CREATE VIRTUAL TABLE {fts_table} USING fts5(
+                    {', '.join(columns)},
+                    tokenize = "unicode61 remove_diacritics 2",
+                    prefix = '2 3'
+                )
+            """)
+            created = True
+    return created
+
+
+def _index(conn: Connection, kind: str, row_id: int, values: list) -> None:
+    fts_table, columns, _, _ = SEARCH_TABLES[kind]
+    conn.execute(f"DELETE FROM {fts_table} WHERE rowid = ?", (row_id,))
+    conn.execute(
+        f"INSERT INTO {fts_table} (rowid, {', '.join(columns)}) VALUES (?, {', '.join('?' * len(columns))})",
+        (row_id, *values)
+    )
+
+
+def index_player(conn: Connection, player_id: int, name: str) -> None:
+    _index(conn, 'player', player_id, [name])
+
+
+def index_team(conn: Connection, team_id: int, name: str, short_name: str, region: str) -> None:
+    _index(conn, 'team', team_id, [name, short_name, region])
+
+
+def index_event(conn: Connection, event_id: int, title: str, event_name: str, region: str) -> None:
+    _index(conn, 'event', event_id, [title, event_name, region])
+
+
+def rebuild_search_index(conn: Connection) -> dict[str, int]:
+    """Reconstruit les tables fts à partir des tables d'origine (sans commit)"""
+    ensure_search_tables(conn)
+    counts = {}
+    for kind, (fts_table, columns, table, source_columns) in SEARCH_TABLES.items():
+        conn.execute(f"DELETE FROM {fts_table}")
+        conn.execute(f"""
+            INSERT INTO {fts_table} (rowid, {', '.join(columns)})
+            SELECT id, {', '.join(source_columns)} FROM {table}
+        """)
+        conn.execute(f"INSERT INTO {fts_table} ({fts_table}) VALUES ('optimize')")
+        counts[kind] = conn.execute(f"SELECT COUNT(*) FROM {fts_table}").fetchone()[0]
+    return counts
+
+
+def build_match_query(text: str) -> str | None:
+    """'zek sen' -> '"zek"* "sen"*' (tous les mots, en préfixe), None si pas de mot"""
+    tokens = SEARCH_TOKEN.findall(text)
+    if not tokens:
+        return None
+    return ' '.join(f'"{token}"*' for token in tokens)
+
+
+def search(conn: Connection, text: str, kinds: list[str] | None = None, limit: int = 10) -> list[dict]:
+    """
+    Recherche par préfixe dans les joueurs/équipes/events, les meilleurs résultats (bm25) d'abord.
+    Chaque résultat : {type, id, label, rank}
+    """
+    match = build_match_query(text)
+    if match is None:
+        return []
+
+    results = []
+    for kind in kinds or SEARCH_TABLES:
+        fts_table, columns, _, _ = SEARCH_TABLES[kind]
+        weights = ', '.join(str(weight) for weight in SEARCH_WEIGHTS[kind])
+        rows = conn.execute(f"""
+            SELECT rowid, {columns[0]}, bm25({fts_table}, {weights}) AS score
+            FROM {fts_table}
+            WHERE {fts_table} MATCH ?
+            ORDER BY score
+            LIMIT ?
+        """, (match, limit)).fetchall()
+        results.extend({'type': kind, 'id': row[0], 'label': row[1], 'rank': row[2]} for row in rows)
+
+    # d'abord les noms qui commencent par le texte tapé, puis bm25 (plus petit = plus pertinent)
+    prefix = text.strip().lower()
+    results.sort(key=lambda result: (not (result['label'] or '').lower().startswith(prefix), result['rank']))
+    return results[:limit]
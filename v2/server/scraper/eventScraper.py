@@ -7,7 +7,7 @@ import json
 import os
 
 from .baseScraper import BaseScraper
-from ..database.database import get_db_connection
+from ..database.database import get_db_connection, bump_write_generation
 
 
 class EventScraper(BaseScraper):
@@ -76,6 +76,7 @@ class EventScraper(BaseScraper):
                     VALUES (?, ?, ?)
                 """, (match['match_id'], match['event_id'], match['url']))
             
+            bump_write_generation(conn)
             conn.commit()
             self.logger.info(f"Saved {len(data)} matches to the database") if self.full_log else None
             return True
@@ -7,7 +7,8 @@ import json
 import os
 
 from .baseScraper import BaseScraper
-from ..database.database import get_db_connection
+from ..database.database import get_db_connection, bump_write_generation
+from ..database.search import index_player
 
 
 class GameScraper(BaseScraper):
@@ -430,6 +431,8 @@ class GameScraper(BaseScraper):
                     INSERT OR IGNORE INTO players (id, name)
                     VALUES (?, ?)
                 """, (player_id, player['name']))
+                if cursor.rowcount == 1:  # nouveau joueur
+                    index_player(cursor, player_id, player['name'])
                 
                 # Statistiques du joueur
                 stats = player.get('stats', {})
@@ -505,6 +508,7 @@ class GameScraper(BaseScraper):
                         econ_stats['full_buy_played'], econ_stats['full_buy_won']
                     ))
             
+            bump_write_generation(conn)
             conn.commit()
             self.logger.info(f"Saved game {game_data['game_id']} stats to database") if self.full_log else None
             return True
@@ -7,7 +7,8 @@ import json
 import os
 
 from .baseScraper import BaseScraper
-from ..database.database import get_db_connection
+from ..database.database import get_db_connection, bump_write_generation
+from ..database.search import index_team
 
 
 class MatchScraper(BaseScraper):
@@ -342,6 +343,7 @@ class MatchScraper(BaseScraper):
                         json.dumps(team_bans)    # liste des bans de l'équipe
                     ))
             
+            bump_write_generation(conn)
             conn.commit()
             self.logger.info(f"Saved match {match_data['match_id']} to database") if self.full_log else None
             return True
@@ -371,6 +373,7 @@ class MatchScraper(BaseScraper):
                 team_data['logo_url'],
                 team_data['team_url']
             ))
+            index_team(cursor, team_id, team_data['name'], team_data['short_name'], team_data['region'])
             
             return team_id
             
@@ -423,6 +426,7 @@ class MatchScraper(BaseScraper):
                             score_data['ct']
                         ))
             
+            bump_write_generation(conn)
             conn.commit()
             self.logger.info(f"Saved {len(games)} games to database") if self.full_log else None
             return True
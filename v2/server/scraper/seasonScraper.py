@@ -7,7 +7,8 @@ import os
 
 from .baseScraper import BaseScraper
 from ..database.models import Event
-from ..database.database import get_db_connection
+from ..database.database import get_db_connection, bump_write_generation
+from ..database.search import index_event
 
 class SeasonScraper(BaseScraper):
     """Scraper pour récupérer les evenements d'une saison"""
@@ -272,11 +273,15 @@ class SeasonScraper(BaseScraper):
                             event_data['location'], event_data['thumbnail']
                         ))
                         saved_count += 1
+
+                    # index de recherche tenu à jour en même temps que la table
+                    index_event(cursor, event_data['id'], event_data['title'], event_data['event_name'], event_data['region'])
                         
                 except Exception as e:
                     self.logger.error(f"Error saving event {event_data.get('id', 'unknown')}: {e}")
                     continue
             
+            bump_write_generation(conn)
             conn.commit()
             conn.close()
             
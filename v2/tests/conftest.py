@@ -0,0 +1,32 @@
+import os
+import sqlite3
+import sys
+
+import pytest
+
+# le site (web/app.py) s'importe comme un module de premier niveau, comme dans serve.py
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'web'))
+
+SCHEMA_PATH = os.path.join(os.path.dirname(__file__), '..', 'server', 'db', 'schema.sql')
+
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    """Client de test du site sur une petite base : 20 équipes (noms avec ex aequo), 100 joueurs"""
+    app = pytest.importorskip("app")
+    path = str(tmp_path / 'stats.db')
+    conn = sqlite3.connect(path)
+    with open(SCHEMA_PATH, 'r', encoding='utf-8') as f:
+        conn.executescript(f.read())
+    conn.execute("PRAGMA foreign_keys = OFF")
+    conn.executemany("INSERT INTO teams (id, name) VALUES (?, ?)", [(i, f"team{(i * 7) % 13:02d}") for i in range(1, 21)])
+    conn.executemany("INSERT INTO players (id, name) VALUES (?, ?)", [(i, f"player{(i * 37) % 100:03d}") for i in range(1, 101)])
+    conn.executemany("INSERT INTO player_stats (player_id, team_id) VALUES (?, ?)", [(i, i % 20 + 1) for i in range(1, 101)])
+    conn.commit()
+    conn.close()
+
+    monkeypatch.setattr(app, 'DATABASE_PATH', path)
+    monkeypatch.setattr(app, 'SNAPSHOT_PATH', str(tmp_path / 'missing.db'))
+    monkeypatch.setattr(app, 'query_cache', app.QueryCache())
+    monkeypatch.setattr(app, 'query_scheduler', app.QueryScheduler())
+    return app.app.test_client()
@@ -0,0 +1,32 @@
+import time
+
+import pytest
+
+app = pytest.importorskip("app")
+
+
+def test_export_streams_everything_in_its_own_lane(client):
+    response = client.post('/api/export', json={"query": "SELECT id, name FROM players ORDER BY id"})
+    lines = response.get_data(as_text=True).splitlines()
+
+    assert response.status_code == 200
+    assert lines[0] == 'id,name' and len(lines) == 101
+    lanes = app.query_scheduler.stats()["lanes"]
+    assert lanes["export"]["admitted"] == 1 and lanes["export"]["running"] == 0
+    assert lanes["heavy"]["admitted"] == 0
+
+
+def test_slow_reader_is_cut_at_the_deadline(client, monkeypatch):
+    monkeypatch.setattr(app, 'EXPORT_BATCH_SIZE', 10)
+    monkeypatch.setattr(app, 'EXPORT_TIMEOUT_SECONDS', 0.2)
+    response = client.post('/api/export', json={"query": "SELECT id FROM players"}, buffered=False)
+    chunks = iter(response.response)
+    next(chunks)
+    assert app.query_scheduler.stats()["lanes"]["export"]["running"] == 1
+
+    time.sleep(0.3)  # le client ne lit plus
+    with pytest.raises(app.QueryLimitExceeded):
+        for _ in chunks:
+            pass
+    assert app.query_scheduler.stats()["lanes"]["export"]["running"] == 0
+    response.close()
@@ -0,0 +1,66 @@
+import os
+import sqlite3
+
+import pytest
+
+pytest.importorskip("pyarrow")
+
+from server.analytics.lake import export_to_parquet, load_table
+
+SCHEMA_PATH = os.path.join(os.path.dirname(__file__), '..', 'server', 'db', 'schema.sql')
+
+
+def create_db(path, maps=('Bind', 'Haven')):
+    conn = sqlite3.connect(path)
+    with open(SCHEMA_PATH, 'r', encoding='utf-8') as f:
+        conn.executescript(f.read())
+    conn.executemany("INSERT INTO events (id, start_date) VALUES (?, ?)", [(1, '2024-02-01'), (2, '2025-02-01')])
+    conn.executemany("INSERT INTO matches (match_id, event_id) VALUES (?, ?)", [(10, 1), (20, 2)])
+    conn.executemany("INSERT INTO games (game_id, match_id, map) VALUES (?, ?, ?)", [(100, 10, maps[0]), (200, 20, maps[1])])
+    conn.commit()
+    conn.close()
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    path = str(tmp_path / 'stats.db')
+    create_db(path)
+    return path
+
+
+def write(db_path, *statements):
+    conn = sqlite3.connect(db_path)
+    for statement in statements:
+        conn.execute(statement)
+    conn.commit()
+    conn.close()
+
+
+def test_only_changed_events_are_read_again(db_path, tmp_path):
+    lake_path = str(tmp_path / 'lake')
+    assert export_to_parquet(db_path, lake_path)['games'] == 2
+    assert export_to_parquet(db_path, lake_path)['games'] == 0
+
+    # modification sur place (même rowid) dans l'event 2 : seule sa partition est réécrite
+    write(db_path, "INSERT OR REPLACE INTO games (game_id, match_id, map) VALUES (200, 20, 'Lotus')")
+    written = export_to_parquet(db_path, lake_path)
+    assert written['games'] == 1 and written['matches'] == 0
+    assert sorted(load_table('games', columns=['map'], lake_path=lake_path)['map'].to_pylist()) == ['Bind', 'Lotus']
+
+    # match déplacé dans un autre event : les deux partitions changent, l'ancienne ne fait pas doublon
+    write(db_path, "UPDATE matches SET event_id = 1 WHERE match_id = 20")
+    export_to_parquet(db_path, lake_path)
+    assert load_table('games', columns=['map'], events=[1], lake_path=lake_path).num_rows == 2
+    assert load_table('games', columns=['map'], lake_path=lake_path).num_rows == 2
+    assert sqlite3.connect(db_path).execute("SELECT COUNT(*) FROM lake_changes").fetchone()[0] == 0
+
+
+def test_untracked_writes_trigger_a_full_pass(db_path, tmp_path):
+    lake_path = str(tmp_path / 'lake')
+    export_to_parquet(db_path, lake_path)
+
+    # base réinitialisée, remplie sans suivi : le manifest ne correspond plus au suivi de la base
+    os.remove(db_path)
+    create_db(db_path, maps=('Split', 'Haven'))
+    assert export_to_parquet(db_path, lake_path)['games'] == 1
+    assert sorted(load_table('games', columns=['map'], lake_path=lake_path)['map'].to_pylist()) == ['Haven', 'Split']
@@ -0,0 +1,34 @@
+import json
+import os
+import sqlite3
+
+import pytest
+
+from server.analytics.map_vetoes import refresh_map_vetoes
+
+SCHEMA_PATH = os.path.join(os.path.dirname(__file__), '..', 'server', 'db', 'schema.sql')
+
+
+@pytest.fixture
+def conn():
+    conn = sqlite3.connect(':memory:')
+    with open(SCHEMA_PATH, 'r', encoding='utf-8') as f:
+        conn.executescript(f.read())
+    conn.execute("PRAGMA foreign_keys = OFF")  # matches sans events
+    yield conn
+    conn.close()
+
+
+def test_stub_matches_are_unfolded_once_scraped(conn):
+    # ébauche écrite par EventScraper : pas encore de picks/bans
+    conn.execute("INSERT INTO matches (match_id, event_id, url) VALUES (1, 1, '/1')")
+    assert refresh_map_vetoes(conn) == 0
+
+    # MatchScraper remplace la ligne avec les vetos
+    conn.execute("""
+        INSERT OR REPLACE INTO matches (match_id, event_id, url, picks, bans, decider) VALUES (1, 1, '/1', ?, ?, 'Bind')
+    """, (json.dumps([{"team": "A", "map": "Lotus"}]), json.dumps([{"team": "B", "map": "Haven"}])))
+    assert refresh_map_vetoes(conn) == 1
+    assert sorted(conn.execute("SELECT action, map FROM map_vetoes").fetchall()) == [
+        ('ban', 'Haven'), ('decider', 'Bind'), ('pick', 'Lotus')
+    ]
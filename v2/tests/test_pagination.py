@@ -0,0 +1,69 @@
+import base64
+import json
+import sqlite3
+
+import pytest
+
+app = pytest.importorskip("app")
+
+# joueurs et équipes dont les noms ne sont pas dans le même ordre, équipes avec ex aequo
+PAGED_QUERY = """
+    SELECT p.name, t.name AS name2
+    FROM player_stats ps
+    JOIN players p ON p.id = ps.player_id
+    JOIN teams t ON t.id = ps.team_id
+    ORDER BY t.name
+"""
+
+
+def fetch_all_pages(client, query, page_size):
+    rows, tokens = [], []
+    body = {"query": query, "page_size": page_size}
+    while True:
+        result = client.post('/api/query', json=body).get_json()
+        assert result.get("success"), result
+        rows.extend(tuple(row) for row in result["rows"])
+        if not result["next_token"]:
+            return rows, tokens
+        tokens.append(json.loads(base64.urlsafe_b64decode(result["next_token"])))
+        body = {"query": query, "page_size": page_size, "page_token": result["next_token"]}
+
+
+def test_order_key_qualified_term_resolves_to_its_select_item():
+    assert app.order_key(PAGED_QUERY, ['name', 'name2']) == ('name2', False)
+    assert app.order_key("SELECT p.name, t.name FROM p JOIN t ORDER BY t.name DESC", ['name', 'name']) is None
+    # t.name n'est pas une colonne du résultat, ou n'y est pas seule
+    assert app.order_key("SELECT p.name FROM p JOIN t ON 1 ORDER BY t.name", ['name']) is None
+    assert app.order_key("SELECT t.name AS a, t.name AS b FROM t ORDER BY t.name", ['a', 'b']) is None
+    assert app.order_key("SELECT p.*, t.name AS n FROM p JOIN t ORDER BY t.name", ['id', 'name', 'n']) is None
+    # nom, alias ou numéro du résultat
+    assert app.order_key("SELECT p.name AS player, t.name FROM p JOIN t ORDER BY player DESC LIMIT 5", ['player', 'name']) == ('player', True)
+    assert app.order_key("SELECT p.name, t.name AS team FROM p JOIN t ORDER BY 2", ['name', 'team']) == ('team', False)
+    assert app.order_key("SELECT a, b FROM t ORDER BY a, b", ['a', 'b']) is None
+
+
+def test_paging_by_qualified_key_returns_each_row_once(client):
+    expected = [tuple(row) for row in sqlite3.connect(app.DATABASE_PATH).execute(PAGED_QUERY).fetchall()]
+    rows, tokens = fetch_all_pages(client, PAGED_QUERY, page_size=7)
+
+    assert len(rows) == len(expected) == 100
+    assert sorted(rows) == sorted(expected)
+    assert [row[1] for row in rows] == [row[1] for row in expected]
+    assert tokens and all(token["k"][0] == 'name2' for token in tokens)
+
+
+def test_stale_page_token_is_flagged(client, monkeypatch):
+    first = client.post('/api/query', json={"query": PAGED_QUERY, "page_size": 7}).get_json()
+    monkeypatch.setattr(app, 'get_data_version', lambda conn=None: 'nouvelle-version')
+    result = client.post('/api/query', json={"query": PAGED_QUERY, "page_size": 7, "page_token": first["next_token"]}).get_json()
+
+    assert result["stale_token"] is True and "relancez" in result["error"]
+    result = client.post('/api/query', json={"query": "SELECT 1", "page_token": first["next_token"]}).get_json()
+    assert "error" in result and "stale_token" not in result
+
+
+def test_query_log_keeps_the_size_before_gzip(client):
+    client.post('/api/query', json={"query": PAGED_QUERY, "page_size": 100}, headers={"Accept-Encoding": "gzip"})
+    entry = app.query_log.entries[-1]
+
+    assert entry["sent_bytes"] < entry["bytes"]
@@ -0,0 +1,66 @@
+import os
+import sqlite3
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from server.analytics import player_embedding
+from server.analytics.player_embedding import FEATURE_COLUMNS, FEATURE_SETS, MIN_GAMES, update_player_embeddings
+
+SCHEMA_PATH = os.path.join(os.path.dirname(__file__), '..', 'server', 'db', 'schema.sql')
+
+
+@pytest.fixture
+def conn():
+    conn = sqlite3.connect(':memory:')
+    with open(SCHEMA_PATH, 'r', encoding='utf-8') as f:
+        conn.executescript(f.read())
+    conn.execute("PRAGMA foreign_keys = OFF")  # player_stats seul, sans games ni players
+    yield conn
+    conn.close()
+
+
+def add_games(conn, player_id, games, seed):
+    """`games` lignes de player_stats du joueur, avec des stats aléatoires"""
+    rng = np.random.default_rng(seed)
+    columns = ', '.join(FEATURE_COLUMNS)
+    placeholders = ', '.join('?' * (len(FEATURE_COLUMNS) + 1))
+    conn.executemany(
+        f"INSERT INTO player_stats (player_id, {columns}) VALUES ({placeholders})",
+        [(player_id, *rng.uniform(0, 300, len(FEATURE_COLUMNS)).round(1).tolist()) for _ in range(games)]
+    )
+
+
+def models(conn):
+    return {
+        feature_set: (players, np.frombuffer(feature_sum), np.frombuffer(feature_outer))
+        for feature_set, players, feature_sum, feature_outer in conn.execute(
+            "SELECT feature_set, players, feature_sum, feature_outer FROM pca_models"
+        )
+    }
+
+
+def test_incremental_after_single_player_matches_full(conn):
+    # un seul joueur qualifié : pas d'axes, mais les statistiques doivent être gardées
+    add_games(conn, 1, MIN_GAMES, seed=1)
+    assert update_player_embeddings(conn) == {feature_set: 0 for feature_set in FEATURE_SETS}
+    assert player_embedding.get_embedding(conn, 'v1')["players"] == []
+
+    # le joueur 1 rejoue et deux nouveaux joueurs arrivent
+    add_games(conn, 1, 2, seed=2)
+    add_games(conn, 2, MIN_GAMES, seed=3)
+    add_games(conn, 3, MIN_GAMES + 1, seed=4)
+    update_player_embeddings(conn)
+    incremental = models(conn)
+
+    update_player_embeddings(conn, full=True)
+    full = models(conn)
+
+    assert set(incremental) == set(full) == set(FEATURE_SETS)
+    for feature_set, (players, feature_sum, feature_outer) in full.items():
+        assert players == 3
+        assert incremental[feature_set][0] == players
+        np.testing.assert_allclose(incremental[feature_set][1], feature_sum, rtol=1e-6)
+        np.testing.assert_allclose(incremental[feature_set][2], feature_outer, rtol=1e-6)
+    assert len(player_embedding.get_embedding(conn, 'v1')["players"]) == 3
@@ -0,0 +1,33 @@
+import os
+import sqlite3
+
+import pytest
+
+pytest.importorskip("numpy")
+
+from server.analytics.round_states import get_round_states, update_round_states
+
+SCHEMA_PATH = os.path.join(os.path.dirname(__file__), '..', 'server', 'db', 'schema.sql')
+
+
+@pytest.fixture
+def conn():
+    conn = sqlite3.connect(':memory:')
+    with open(SCHEMA_PATH, 'r', encoding='utf-8') as f:
+        conn.executescript(f.read())
+    conn.execute("PRAGMA foreign_keys = OFF")  # round_history et game_scores seuls, sans games ni teams
+    yield conn
+    conn.close()
+
+
+def test_games_without_scores_stay_pending(conn):
+    # équipe 1 gagne 2 rounds à 1
+    conn.executemany("INSERT INTO round_history (game_id, round_number, winner) VALUES (7, ?, ?)",
+                     [(1, '1'), (2, '2'), (3, '1')])
+    conn.execute("INSERT INTO game_scores (game_id, team_id) VALUES (7, 1)")  # scores incomplets
+    assert update_round_states(conn) == 0
+    assert conn.execute("SELECT COUNT(*) FROM round_states_games").fetchone()[0] == 0
+
+    conn.execute("INSERT INTO game_scores (game_id, team_id) VALUES (7, 2)")
+    assert update_round_states(conn) == 1
+    assert get_round_states(conn, team_id=1)["1-1"] == {"reached": 1, "wins": 1, "winrate": 1.0}
@@ -1,77 +1,1211 @@
-from flask import Flask, render_template, request, jsonify
+from flask import Flask, Response, render_template, request, jsonify
+from collections import OrderedDict, deque
+from contextlib import contextmanager, ExitStack
+from logging.handlers import RotatingFileHandler
+import logging
+import threading
+import time
 import sqlite3
+import zlib
+import gzip
+import csv
+import io
+import hashlib
+import itertools
+import base64
+import json
+import datetime
+import decimal
+import urllib.request
+import glob
+import sys
 import os
+import re
+
+try:
+    import duckdb
+except ImportError:  # moteur colonne optionnel
+    duckdb = None
+
+try:
+    import orjson
+except ImportError:  # encodeur json rapide optionnel
+    orjson = None
+
+try:
+    import pyarrow as pa
+except ImportError:  # sortie arrow optionnelle
+    pa = None
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from server.database.database import get_write_generation, get_table_row_counts, are_statistics_fresh, get_meta, ANALYZE_GENERATION_KEY
+from server.analytics import dashboard, ratings, round_states, agents, map_vetoes, player_embedding, player_similarity, economy_cube
+from server.database import search
 
 app = Flask(__name__)
 
 # config
 DATABASE_PATH = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'server', 'data', 'vlrgg_stats.db')
+SNAPSHOT_PATH = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'server', 'data', 'vlrgg_stats_snapshot.db')
+SNAPSHOT_MMAP_SIZE = 1 << 30  # 1 Go (le snapshot entier tient en mémoire mappée)
+LAKE_PATH = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'server', 'data', 'lake')
+ENGINES = ('sqlite', 'duckdb')  # duckdb seulement à la demande (sémantique et données un peu différentes)
 
-def execute_query(query):
-    try:
+# format des résultats de /api/query : colonnes + lignes en tableaux, objets (ancien format) ou arrow ipc
+QUERY_FORMATS = ('compact', 'objects', 'arrow')
+ARROW_MIMETYPE = 'application/vnd.apache.arrow.stream'
+GZIP_MIN_BYTES = 1024  # en dessous la compression ne vaut pas le coup
+GZIP_LEVEL = 5
+
+# pagination des résultats de /api/query
+PAGE_SIZE = 500
+MAX_PAGE_SIZE = 2000
+SKIP_CHUNK_SIZE = 1000
+
+# export en streaming (/api/export)
+EXPORT_FORMATS = {
+    'csv': ('text/csv', 'csv'),
+    'ndjson': ('application/x-ndjson', 'ndjson'),
+}
+EXPORT_BATCH_SIZE = 1000
+
+# budgets d'exécution des requêtes (watchdog)
+QUERY_TIMEOUT_SECONDS = 15
+QUERY_MAX_VM_STEPS = 1_000_000_000  # instructions de la vm sqlite
+QUERY_MAX_ROWS = 1_000_000  # lignes lues par appel (pages sautées comprises)
+EXPORT_TIMEOUT_SECONDS = 600
+EXPORT_MAX_VM_STEPS = 20_000_000_000  # pas de limite de lignes pour l'export, mais un budget d'instructions
+PROGRESS_HANDLER_INTERVAL = 10_000
+# limites sqlite des connexions de requête (Connection.setlimit, python >= 3.11)
+SQLITE_QUERY_LIMITS = {
+    'SQLITE_LIMIT_LENGTH': 10_000_000,
+    'SQLITE_LIMIT_SQL_LENGTH': 100_000,
+    'SQLITE_LIMIT_ATTACHED': 0,
+    'SQLITE_LIMIT_COMPOUND_SELECT': 50,
+    'SQLITE_LIMIT_EXPR_DEPTH': 500,
+}
+
+# estimation du coût avant exécution (EXPLAIN QUERY PLAN)
+LARGE_TABLE_ROWS = 50_000
+PLAN_WARN_COST = 10_000_000  # lignes visitées (estimation)
+PLAN_REFUSE_COST = 5_000_000_000
+SQL_KEYWORDS = {
+    'WHERE', 'ON', 'USING', 'JOIN', 'LEFT', 'RIGHT', 'INNER', 'OUTER', 'CROSS', 'NATURAL', 'FULL',
+    'GROUP', 'ORDER', 'LIMIT', 'HAVING', 'WINDOW', 'UNION', 'EXCEPT', 'INTERSECT', 'AS', 'SELECT', 'FROM'
+}
+TABLE_REFERENCE = re.compile(r'(?:\bFROM|\bJOIN|,)\s+([A-Za-z_]\w*)(?:\s+(?:AS\s+)?([A-Za-z_]\w*))?', re.IGNORECASE)
+
+# cache des résultats de /api/query
+CACHE_MAX_ENTRIES = 256
+CACHE_MAX_CELLS = 2_000_000  # nb total de valeurs (lignes x colonnes) gardées en mémoire
+
+# journal des requêtes exécutées (profilage, requêtes lentes)
+QUERY_LOG_PATH = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'logs', 'queries.log')
+QUERY_LOG_SIZE = 2000  # dernières requêtes gardées en mémoire
+QUERY_LOG_MAX_BYTES = 10_000_000
+QUERY_LOG_BACKUPS = 3
+QUERY_LOG_SLOW_MS = 1000  # au-delà : marquée comme lente dans le journal
+ADMIN_TOKEN = os.environ.get('VCT_ADMIN_TOKEN')  # si défini, requis pour /api/admin/*
+
+# contrôle d'admission de /api/query : une voie pour les requêtes légères, une pour les lourdes,
+# et une pour les exports de /api/export (leur durée dépend du client : ils ne bloquent pas la voie lourde).
+# Les requêtes en attente occupent un thread du serveur : concurrence + file des deux voies
+# doit rester sous le nombre de threads (serve.py --threads, 8 par défaut) pour laisser
+# /api/tables, le dashboard et l'api v1 répondre pendant que les grosses requêtes tournent.
+QUERY_LANES = {
+    # voie : (requêtes simultanées, places dans la file d'attente, attente max en s)
+    'cheap': (3, 4, 5),
+    'heavy': (1, 2, 10),
+    'export': (1, 1, 5),
+}
+HEAVY_QUERY_COST = 1_000_000  # coût estimé (lignes visitées) à partir duquel une requête est lourde
+HEAVY_QUERY_MS = 500  # ou durée moyenne des exécutions précédentes du même texte
+QUERY_HISTORY_SIZE = 1000  # requêtes dont on garde la durée moyenne
+QUERY_HISTORY_WEIGHT = 0.3  # poids de la dernière exécution dans la moyenne (mobile exponentielle)
+
+# api REST versionnée (/api/v1) : table, clé, filtres (paramètre -> condition sql), colonnes json
+API_PAGE_SIZE = 100
+API_MAX_PAGE_SIZE = 1000
+API_RESOURCES = {
+    'events': {
+        'table': 'events',
+        'key': 'id',
+        'filters': {
+            'region': "region = ?",
+            'status': "status = ?",
+            'season': "strftime('%Y', start_date) = ?",
+            'start_after': "start_date >= ?",
+            'start_before': "start_date <= ?",
+        },
+    },
+    'matches': {
+        'table': 'matches',
+        'key': 'match_id',
+        'filters': {
+            'event_id': "event_id = ?",
+            'patch': "patch = ?",
+            'team_id': "match_id IN (SELECT match_id FROM match_teams WHERE team_id = ?)",
+            'date_after': "date >= ?",
+            'date_before': "date <= ?",
+        },
+        'json': ('picks', 'bans'),
+    },
+    'games': {
+        'table': 'games',
+        'key': 'game_id',
+        'filters': {
+            'match_id': "match_id = ?",
+            'event_id': "match_id IN (SELECT match_id FROM matches WHERE event_id = ?)",
+            'map': "map = ?",
+            'win': "win = ?",
+        },
+    },
+    'teams': {
+        'table': 'teams',
+        'key': 'id',
+        'filters': {
+            'region': "region = ?",
+            'short_name': "short_name = ?",
+        },
+    },
+    'players': {
+        'table': 'players',
+        'key': 'id',
+        'filters': {
+            'name': "name LIKE ? || '%'",
+        },
+    },
+}
+
+# morceaux d'une requête sql : chaînes/identifiants entre quotes, commentaires, espaces, reste
+SQL_TOKENS = re.compile(r"""'(?:[^']|'')*'|"(?:[^"]|"")*"|`[^`]*`|\[[^\]]*\]|--[^\n]*|/\*.*?\*/|\s+|[^'"`\[\s/-]+|.""", re.DOTALL)
+
+class QueryLimitExceeded(Exception):
+    """Requête interrompue par le watchdog (budget dépassé ou annulation)"""
+
+
+class StalePageToken(ValueError):
+    """Jeton de pagination d'une version des données qui n'est plus servie"""
+
+
+class QueryWatchdog:
+    """Budgets d'une requête en cours (temps, instructions, lignes) et annulation depuis un autre thread"""
+
+    def __init__(self, timeout=QUERY_TIMEOUT_SECONDS, max_steps=QUERY_MAX_VM_STEPS, max_rows=QUERY_MAX_ROWS):
+        self.timeout = timeout
+        self.max_steps = max_steps
+        self.max_rows = max_rows
+        self.started = time.monotonic()
+        self.steps = 0
+        self.rows = 0
+        self.reason = None
+        self.cancelled = threading.Event()
+        self.interrupt = None
+        self.timer = None
+
+    def start(self):
+        """(Re)part le budget de temps : l'attente dans la file d'admission n'est pas comptée"""
+        self.started = time.monotonic()
+
+    def attach(self, conn, engine):
+        """Branche le watchdog sur la connexion qui va exécuter la requête"""
+        self.interrupt = conn.interrupt
+        if engine == 'sqlite':
+            conn.set_progress_handler(self.on_progress, PROGRESS_HANDLER_INTERVAL)
+        else:
+            # pas de progress handler avec duckdb : interruption au bout du temps imparti
+            remaining = max(self.timeout - (time.monotonic() - self.started), 0)
+            self.timer = threading.Timer(remaining, self.stop, args=(f"Temps d'exécution dépassé ({self.timeout} s)",))
+            self.timer.daemon = True
+            self.timer.start()
+
+    def on_progress(self):
+        """Appelé par sqlite toutes les PROGRESS_HANDLER_INTERVAL instructions (1 = interrompre)"""
+        self.steps += PROGRESS_HANDLER_INTERVAL
+        if self.cancelled.is_set():
+            return 1
+        if self.time_exceeded():
+            self.reason = f"Temps d'exécution dépassé ({self.timeout} s). Ajoutez des filtres ou un LIMIT."
+            return 1
+        if self.max_steps and self.steps > self.max_steps:
+            self.reason = f"Requête trop coûteuse (plus de {self.max_steps} instructions sqlite). Ajoutez des filtres ou un LIMIT."
+            return 1
+        return 0
+
+    def time_exceeded(self):
+        return bool(self.timeout) and time.monotonic() - self.started > self.timeout
+
+    def count_rows(self, count):
+        self.rows += count
+        if self.max_rows and self.rows > self.max_rows:
+            self.reason = f"Trop de lignes lues (plus de {self.max_rows}). Utilisez l'export pour les gros résultats."
+            raise QueryLimitExceeded(self.reason)
+
+    def stop(self, reason="Requête annulée"):
+        """Annule la requête (thread-safe)"""
+        if self.reason is None:
+            self.reason = reason
+        self.cancelled.set()
+        if self.interrupt is not None:
+            try:
+                self.interrupt()
+            except Exception:
+                pass
+
+    def close(self):
+        if self.timer is not None:
+            self.timer.cancel()
+            self.timer = None
+
+
+# requêtes en cours (query_id -> watchdog) pour pouvoir les annuler
+running_queries = {}
+running_queries_lock = threading.Lock()
+
+
+class QueryCache:
+    """Cache LRU des résultats, vidé dès que la version des données change (nouveau scraping)"""
+
+    def __init__(self, max_entries=CACHE_MAX_ENTRIES, max_cells=CACHE_MAX_CELLS):
+        self.max_entries = max_entries
+        self.max_cells = max_cells
+        self.entries = OrderedDict()
+        self.cells = 0
+        self.version = None
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def _check_version(self, version):
+        if version != self.version:
+            if self.entries:
+                self.invalidations += 1
+            self.entries.clear()
+            self.cells = 0
+            self.version = version
+
+    def get(self, key, version):
+        with self.lock:
+            self._check_version(version)
+            entry = self.entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, key, version, result):
+        cells = result["count"] * max(len(result["columns"]), 1)
+        if cells > self.max_cells:
+            return
+        with self.lock:
+            self._check_version(version)
+            if key in self.entries:
+                return
+            self.entries[key] = (result, cells)
+            self.cells += cells
+            while len(self.entries) > self.max_entries or self.cells > self.max_cells:
+                _, (_, evicted_cells) = self.entries.popitem(last=False)
+                self.cells -= evicted_cells
+                self.evictions += 1
+
+    def stats(self):
+        with self.lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self.entries),
+                "cells": self.cells,
+                "max_entries": self.max_entries,
+                "max_cells": self.max_cells,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else None,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+                "data_version": self.version
+            }
+
+query_cache = QueryCache()
+
+# métadonnées des tables (sidebar, estimations du coût des requêtes), recalculées quand la version change
+tables_info_cache = {"version": None, "tables": []}
+tables_info_lock = threading.Lock()
+
+# compositions d'agents chargées en mémoire (masques de bits), rechargées quand la version change
+agent_compositions_cache = {"version": None, "compositions": None}
+agent_compositions_lock = threading.Lock()
+
+# index de similarité des joueurs par jeu de features, reconstruits quand la version change
+similarity_index_cache = {"version": None, "indexes": {}}
+similarity_index_lock = threading.Lock()
+
+# stats de picks/bans par (event, équipe, patch, regroupement) : empreinte des vetos de l'event + résultat,
+# un event terminé garde son entrée d'un scraping à l'autre
+veto_stats_cache = OrderedDict()
+veto_stats_lock = threading.Lock()
+VETO_CACHE_MAX_ENTRIES = 512
+
+# connexions de lecture par thread (métadonnées, version, explain, dashboard, api v1)
+read_connections = threading.local()
+
+class QueryLog:
+    """Journal des requêtes : les dernières en mémoire (ring buffer) + toutes dans un fichier json lines"""
+
+    def __init__(self, size=QUERY_LOG_SIZE, path=QUERY_LOG_PATH):
+        self.entries = deque(maxlen=size)
+        self.lock = threading.Lock()
+        self.logger = logging.getLogger('vct.queries')
+        self.logger.setLevel(logging.INFO)
+        self.logger.propagate = False
+        if not self.logger.handlers:
+            try:
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                handler = RotatingFileHandler(path, maxBytes=QUERY_LOG_MAX_BYTES, backupCount=QUERY_LOG_BACKUPS, encoding='utf-8')
+                handler.setFormatter(logging.Formatter('%(message)s'))
+                self.logger.addHandler(handler)
+            except OSError as e:
+                print(f"Journal des requêtes sur disque désactivé : {e}")
+
+    def record(self, entry):
+        entry["slow"] = entry["duration_ms"] >= QUERY_LOG_SLOW_MS
+        with self.lock:
+            self.entries.append(entry)
+        self.logger.info(json.dumps(entry, ensure_ascii=False))
+
+    def slowest(self, limit):
+        with self.lock:
+            entries = list(self.entries)
+        return sorted(entries, key=lambda entry: entry["duration_ms"], reverse=True)[:limit]
+
+    def most_frequent(self, limit):
+        """Requêtes regroupées par texte normalisé, les plus lancées d'abord"""
+        groups = {}
+        with self.lock:
+            entries = list(self.entries)
+        for entry in entries:
+            group = groups.setdefault(entry["query"], {
+                "query": entry["query"], "count": 0, "cached": 0, "errors": 0,
+                "total_ms": 0.0, "max_ms": 0.0, "total_rows": 0, "plan": entry.get("plan")
+            })
+            group["count"] += 1
+            group["cached"] += entry["cached"]
+            group["errors"] += entry["status"] != "ok"
+            group["total_ms"] += entry["duration_ms"]
+            group["max_ms"] = max(group["max_ms"], entry["duration_ms"])
+            group["total_rows"] += entry["rows"]
+        for group in groups.values():
+            group["avg_ms"] = round(group["total_ms"] / group["count"], 2)
+            group["avg_rows"] = round(group.pop("total_rows") / group["count"], 1)
+            group["total_ms"] = round(group["total_ms"], 2)
+        return sorted(groups.values(), key=lambda group: (group["count"], group["total_ms"]), reverse=True)[:limit]
+
+query_log = QueryLog()
+
+def percentile(values, p):
+    if not values:
+        return None
+    values = sorted(values)
+    return round(values[min(int(round(p / 100 * (len(values) - 1))), len(values) - 1)], 2)
+
+
+class QueryRejected(Exception):
+    """Pas de place dans la voie (file pleine ou attente trop longue)"""
+
+    def __init__(self, lane, reason, retry_after):
+        super().__init__(reason)
+        self.lane = lane
+        self.retry_after = retry_after
+
+
+class QueryLane:
+    """Nombre borné de requêtes simultanées + file d'attente bornée avec délai max"""
+
+    def __init__(self, name, concurrency, queue_size, timeout):
+        self.name = name
+        self.concurrency = concurrency
+        self.queue_size = queue_size
+        self.timeout = timeout
+        self.condition = threading.Condition()
+        self.running = 0
+        self.waiting = 0
+        self.admitted = 0
+        self.rejected = 0
+        self.timed_out = 0
+        self.waits_ms = deque(maxlen=1000)  # attentes récentes (percentiles)
+        self.durations_ms = deque(maxlen=1000)
+
+    def acquire(self):
+        started = time.monotonic()
+        with self.condition:
+            if self.running >= self.concurrency:
+                if self.waiting >= self.queue_size:
+                    self.rejected += 1
+                    raise QueryRejected(self.name, "Serveur occupé : trop de requêtes en attente, réessayez dans quelques secondes.", self.timeout)
+                self.waiting += 1
+                try:
+                    admitted = self.condition.wait_for(lambda: self.running < self.concurrency, self.timeout)
+                finally:
+                    self.waiting -= 1
+                if not admitted:
+                    self.timed_out += 1
+                    raise QueryRejected(self.name, f"Serveur occupé : pas de place après {self.timeout} s d'attente, réessayez plus tard.", self.timeout)
+            self.running += 1
+            self.admitted += 1
+            self.waits_ms.append((time.monotonic() - started) * 1000)
+
+    def release(self, duration_ms):
+        with self.condition:
+            self.running -= 1
+            self.durations_ms.append(duration_ms)
+            self.condition.notify()
+
+    def stats(self):
+        with self.condition:
+            waits = list(self.waits_ms)
+            durations = list(self.durations_ms)
+            return {
+                "concurrency": self.concurrency,
+                "queue_size": self.queue_size,
+                "queue_timeout_s": self.timeout,
+                "running": self.running,
+                "waiting": self.waiting,
+                "admitted": self.admitted,
+                "rejected": self.rejected,
+                "timed_out": self.timed_out,
+                "wait_ms": {"p50": percentile(waits, 50), "p95": percentile(waits, 95), "max": round(max(waits), 2) if waits else None},
+                "duration_ms": {"p50": percentile(durations, 50), "p95": percentile(durations, 95)},
+            }
+
+
+class QueryScheduler:
+    """
+    Classe les requêtes de /api/query en légères ou lourdes (coût estimé du plan, ou durée
+    des exécutions précédentes du même texte) et les fait passer par la voie correspondante.
+    """
+
+    def __init__(self, lanes=QUERY_LANES):
+        self.lanes = {name: QueryLane(name, *config) for name, config in lanes.items()}
+        self.history = OrderedDict()  # texte normalisé -> durée moyenne (ms)
+        self.lock = threading.Lock()
+
+    def classify(self, normalized, explain):
+        with self.lock:
+            average_ms = self.history.get(normalized)
+        if average_ms is not None:
+            # l'historique prime : l'estimation du plan se trompe dans les deux sens
+            return 'heavy' if average_ms >= HEAVY_QUERY_MS else 'cheap'
+        if explain is None:
+            return 'heavy'  # pas de plan sqlite (duckdb) : prudence
+        return 'heavy' if explain["estimated_cost"] >= HEAVY_QUERY_COST else 'cheap'
+
+    def record(self, normalized, duration_ms):
+        with self.lock:
+            previous = self.history.pop(normalized, None)
+            self.history[normalized] = duration_ms if previous is None else (
+                QUERY_HISTORY_WEIGHT * duration_ms + (1 - QUERY_HISTORY_WEIGHT) * previous
+            )
+            while len(self.history) > QUERY_HISTORY_SIZE:
+                self.history.popitem(last=False)
+
+    @contextmanager
+    def admit(self, lane_name, normalized, record=True):
+        """
+        Attend une place dans la voie (QueryRejected sinon) et la garde pendant l'exécution.
+        record=False : durée non retenue pour classer les requêtes (export, dont la durée dépend du client)
+        """
+        lane = self.lanes[lane_name]
+        lane.acquire()
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            duration_ms = (time.perf_counter() - started) * 1000
+            lane.release(duration_ms)
+            if record:
+                self.record(normalized, duration_ms)
+
+    def stats(self):
+        with self.lock:
+            history_size = len(self.history)
+        return {
+            "lanes": {name: lane.stats() for name, lane in self.lanes.items()},
+            "heavy_query_cost": HEAVY_QUERY_COST,
+            "heavy_query_ms": HEAVY_QUERY_MS,
+            "known_queries": history_size,
+        }
+
+query_scheduler = QueryScheduler()
+
+def normalize_sql(query):
+    """Texte normalisé d'une requête : sans commentaires, espaces fusionnés (sauf dans les chaînes), sans ';' final"""
+    parts = []
+    for token in SQL_TOKENS.findall(query):
+        if token.isspace() or token.startswith('--') or token.startswith('/*'):
+            if parts and parts[-1] != ' ':
+                parts.append(' ')
+        else:
+            parts.append(token)
+    return ''.join(parts).strip().rstrip(';').strip()
+
+def get_database_path():
+    """Snapshot publié par le scraper s'il existe, sinon la base principale"""
+    return SNAPSHOT_PATH if os.path.exists(SNAPSHOT_PATH) else DATABASE_PATH
+
+def get_connection():
+    if os.path.exists(SNAPSHOT_PATH):
+        # le snapshot n'est jamais modifié (remplacé d'un bloc) : pas de verrous ni de vérifs de changement
+        uri = f"file:{urllib.request.pathname2url(os.path.abspath(SNAPSHOT_PATH))}?mode=ro&immutable=1"
+        conn = sqlite3.connect(uri, uri=True)
+        conn.execute(f"PRAGMA mmap_size = {SNAPSHOT_MMAP_SIZE}")
+    else:
         conn = sqlite3.connect(DATABASE_PATH)
-        conn.row_factory = sqlite3.Row
-        cursor = conn.cursor()
-        cursor.execute(query)
-        
-        rows = cursor.fetchall()
-        columns = [description[0] for description in cursor.description]
-        data = [dict(row) for row in rows]
-        
+    conn.row_factory = sqlite3.Row
+    return conn
+
+def get_query_connection():
+    """Connexion sqlite pour les requêtes des utilisateurs (lecture seule + limites)"""
+    conn = get_connection()
+    conn.execute("PRAGMA query_only = ON")
+    if hasattr(conn, 'setlimit'):
+        for name, value in SQLITE_QUERY_LIMITS.items():
+            conn.setlimit(getattr(sqlite3, name), value)
+    return conn
+
+def get_database_identity(path):
+    """Identifie le fichier servi : un nouveau snapshot (os.replace) change d'inode"""
+    stat = os.stat(path)
+    return (path, stat.st_ino, stat.st_mtime_ns) if path == SNAPSHOT_PATH else (path,)
+
+def get_read_connection():
+    """
+    Connexion de lecture du thread (worker) courant, gardée d'une requête à l'autre (ne pas la fermer).
+    Rouverte automatiquement quand le scraper publie un nouveau snapshot.
+    """
+    identity = get_database_identity(get_database_path())
+    conn = getattr(read_connections, 'conn', None)
+    if conn is not None and read_connections.identity != identity:
         conn.close()
+        conn = None
+    if conn is None:
+        conn = get_query_connection()
+        read_connections.conn = conn
+        read_connections.identity = identity
+    return conn
+
+def get_duckdb_connection():
+    """Connexion duckdb sur le lac parquet (server/analytics/lake.py) ou à défaut sur le fichier sqlite"""
+    conn = duckdb.connect()
+    lake_tables = sorted(glob.glob(os.path.join(LAKE_PATH, '*', '')))
+    if lake_tables:
+        for table_path in lake_tables:
+            table = os.path.basename(os.path.dirname(table_path))
+            files = os.path.join(table_path, '**', '*.parquet').replace('\\', '/')
+            conn.execute(f"CREATE VIEW {table} AS SELECT * FROM read_parquet('{files}', hive_partitioning = false)")
+        conn.execute(f"SET allowed_directories = ['{os.path.abspath(LAKE_PATH)}']")
+    else:
+        conn.execute(f"ATTACH '{get_database_path()}' AS vct (TYPE SQLITE, READ_ONLY)")
+        conn.execute("USE vct")
+    # pas de lecture/écriture de fichiers arbitraires depuis les requêtes (read_csv, COPY...)
+    conn.execute("SET enable_external_access = false")
+    return conn
+
+def get_data_version(conn=None):
+    """Version des données : génération d'écriture des scrapers (date de modif du fichier pour une vieille base)"""
+    conn = conn or get_read_connection()
+    return get_write_generation(conn) or os.stat(get_database_path()).st_mtime_ns
+
+def encode_page_token(query, engine, offset, version, resume=None):
+    """
+    Jeton de continuation : position dans le résultat, empreinte de la requête et version des données.
+    resume = (colonne, desc, dernière valeur, nb de lignes déjà lues avec cette valeur) pour reprendre par clé.
+    """
+    payload = {"o": offset, "e": engine, "v": version, "h": hashlib.sha1(normalize_sql(query).encode('utf-8')).hexdigest()[:16]}
+    if resume is not None:
+        payload["k"] = list(resume)
+    return base64.urlsafe_b64encode(json.dumps(payload).encode('utf-8')).decode('ascii')
+
+def decode_page_token(token, query, version):
+    """Retourne (engine, offset, resume) ou lève ValueError si le jeton ne correspond pas à la requête (StalePageToken si les données ont changé)"""
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(token.encode('ascii')))
+        engine, offset, query_hash, token_version = payload["e"], int(payload["o"]), payload["h"], payload["v"]
+        resume = payload.get("k")
+        if resume is not None:
+            column, descending, value, ties = resume
+            resume = (str(column), bool(descending), value, int(ties))
+    except Exception:
+        raise ValueError("Jeton de pagination invalide")
+    if query_hash != hashlib.sha1(normalize_sql(query).encode('utf-8')).hexdigest()[:16] or engine not in ENGINES or offset < 0:
+        raise ValueError("Jeton de pagination invalide (la requête a changé ?)")
+    if token_version != version:
+        raise StalePageToken("Les données ont été mises à jour depuis la première page : relancez la requête")
+    return engine, offset, resume
+
+def sql_words(query):
+    """Mots d'une requête : identifiants, nombres, ponctuation et chaînes/identifiants entre quotes"""
+    words = []
+    for token in SQL_TOKENS.findall(normalize_sql(query)):
+        if token.isspace():
+            continue
+        if token[0] in '\'"`[':
+            words.append(token)
+        else:
+            words.extend(re.findall(r'\w+|[^\w\s]', token))
+    return words
+
+def unquote_identifier(word):
+    """nom en minuscules d'un identifiant (quotes "", `` ou [] retirées)"""
+    if word[0] in '"`[':
+        return word[1:-1].replace('""', '"').lower()
+    return word.lower()
+
+def split_top_level(words, separator=','):
+    """Découpe une liste de mots sur le séparateur hors parenthèses"""
+    items, current, depth = [], [], 0
+    for word in words:
+        if word == separator and depth == 0:
+            items.append(current)
+            current = []
+            continue
+        depth += (word == '(') - (word == ')')
+        current.append(word)
+    items.append(current)
+    return items
+
+def select_item_expressions(words, order_at, column_count):
+    """
+    Expression (mots normalisés) de chaque colonne du SELECT principal, None si le SELECT
+    ne se lit pas simplement (requête composée, *, nombre de colonnes différent)
+    """
+    depth, select_at, from_at = 0, None, order_at - 2
+    for i, word in enumerate(words[:order_at - 2]):
+        upper = word.upper()
+        if depth == 0:
+            if upper in ('UNION', 'INTERSECT', 'EXCEPT'):
+                return None
+            if upper == 'SELECT':
+                select_at, from_at = i + 1, order_at - 2
+            elif upper == 'FROM' and select_at is not None and from_at == order_at - 2:
+                from_at = i
+        depth += (word == '(') - (word == ')')
+    if select_at is None:
+        return None
+    select_words = words[select_at:from_at]
+    if select_words and select_words[0].upper() in ('DISTINCT', 'ALL'):
+        select_words = select_words[1:]
+
+    expressions = []
+    for item in split_top_level(select_words):
+        if not item or item[-1] == '*':
+            return None
+        if len(item) > 2 and item[-2].upper() == 'AS':
+            item = item[:-2]  # alias : c'est le nom de la colonne, pas l'expression
+        elif len(item) > 1 and re.fullmatch(r'\w+|["`\[].*|\)', item[-2]) and re.fullmatch(r'\w+|["`\[].*', item[-1]):
+            item = item[:-1]  # alias sans AS
+        expressions.append([unquote_identifier(word) for word in item])
+    return expressions if len(expressions) == column_count else None
+
+def order_key(query, columns):
+    """
+    (colonne, desc) si la requête se termine par un ORDER BY sur une seule colonne du résultat,
+    suivi au plus d'un LIMIT, None sinon : la page suivante peut alors reprendre par clé.
+    La clé doit désigner sans ambiguïté une colonne : numéro, nom ou alias du résultat, ou
+    expression qualifiée (t.col) qui est exactement une seule des colonnes du SELECT.
+    """
+    lowered = [column.lower() for column in columns]
+    if len(set(lowered)) != len(columns):
+        return None  # colonnes en double : renommées dans une sous-requête
+    words = sql_words(query)
+    depth, order_at = 0, None
+    for i, word in enumerate(words):
+        if depth == 0 and word.upper() == 'ORDER' and i + 1 < len(words) and words[i + 1].upper() == 'BY':
+            order_at = i + 2
+        depth += (word == '(') - (word == ')')
+    if order_at is None:
+        return None
+
+    term = []
+    rest = words[order_at:]
+    while rest and rest[0].upper() not in ('ASC', 'DESC', 'LIMIT'):
+        term.append(rest.pop(0))
+    descending = bool(rest) and rest[0].upper() == 'DESC'
+    if rest and rest[0].upper() in ('ASC', 'DESC'):
+        rest = rest[1:]
+    if not term or (rest and rest[0].upper() != 'LIMIT'):
+        return None  # plusieurs clés, COLLATE, NULLS FIRST...
+
+    if len(term) == 1 and term[0].isdigit():
+        position = int(term[0]) - 1
+        return (columns[position], descending) if 0 <= position < len(columns) else None
+    if len(term) == 1 and re.fullmatch(r'\w+|["`\[].*', term[0]):
+        name = unquote_identifier(term[0])
+        return (columns[lowered.index(name)], descending) if name in lowered else None
+    if len(term) == 3 and term[1] == '.':
+        # t.col : seulement si une seule colonne du SELECT est exactement cette expression
+        expressions = select_item_expressions(words, order_at, len(columns))
+        if expressions is None:
+            return None
+        target = [unquote_identifier(word) for word in term]
+        matches = [i for i, expression in enumerate(expressions) if expression == target]
+        return (columns[matches[0]], descending) if len(matches) == 1 else None
+    return None
+
+def keyset_query(query, resume):
+    """Requête reprise après la dernière valeur de la clé (>= puis on saute les ex aequo déjà lus)"""
+    column, descending, _, _ = resume
+    quoted = '"' + column.replace('"', '""') + '"'
+    # les NULL sont en tête en ASC (déjà lus) et en fin en DESC (encore à lire) avec sqlite
+    condition = f"({quoted} <= ? OR {quoted} IS NULL)" if descending else f"{quoted} >= ?"
+    return f"SELECT * FROM ({normalize_sql(query)}) WHERE {condition} ORDER BY {quoted} {'DESC' if descending else 'ASC'}"
+
+def open_cursor(query, engine, watchdog, params=()):
+    """Lance la requête sur le moteur choisi, retourne (conn, cursor, engine utilisé)"""
+    if engine == 'duckdb' and duckdb is None:
+        raise RuntimeError("Le moteur duckdb n'est pas installé sur le serveur (pip install duckdb)")
+
+    conn = get_duckdb_connection() if engine == 'duckdb' else get_query_connection()
+    watchdog.attach(conn, engine)
+    try:
+        return conn, conn.execute(query, params), engine
+    except Exception as e:
+        watchdog.close()
+        conn.close()
+        if watchdog.reason:
+            raise QueryLimitExceeded(watchdog.reason) from e
+        raise
+
+def get_row_estimates():
+    """Nombre de lignes par table (métadonnées en cache, voir get_tables_info)"""
+    return {table['name']: table['row_count'] for table in get_tables_info()}
+
+def resolve_aliases(query, tables):
+    """alias -> table (ou cte) cités dans FROM/JOIN, car EXPLAIN QUERY PLAN affiche les alias"""
+    aliases = {table: table for table in tables}
+    for name, alias in TABLE_REFERENCE.findall(normalize_sql(query)):
+        if name.upper() in SQL_KEYWORDS:
+            continue
+        aliases.setdefault(name, name)
+        if alias and alias.upper() not in SQL_KEYWORDS:
+            aliases[alias] = name
+    return aliases
+
+def analyze_plan(plan, row_estimates, aliases):
+    """
+    Estimation grossière du coût d'un plan (lignes visitées) + avertissements :
+    scans complets de grosses tables, b-tree temporaires, boucles imbriquées sans index (produit cartésien)
+    """
+    children = {}
+    for node_id, parent, _, detail in plan:
+        children.setdefault(parent, []).append((node_id, detail))
+
+    warnings = []
+    materialized = {}  # sous-requêtes / cte matérialisées -> lignes estimées
+
+    def group_cost(parent):
+        loop_rows = 1
+        subqueries_cost = 0
+        scans = []
+        for node_id, detail in children.get(parent, []):
+            sub_cost = group_cost(node_id) if node_id in children else 0
+            subqueries_cost += sub_cost
+
+            words = detail.split()
+            if len(words) == 2 and words[0] in ('MATERIALIZE', 'CO-ROUTINE'):
+                materialized[words[1]] = max(sub_cost, 1)
+            elif words[0] == 'SCAN' and len(words) > 1 and words[1] != 'CONSTANT':
+                name = words[1]
+                target = aliases.get(name, name)
+                if target in row_estimates:
+                    rows = row_estimates[target]
+                    if rows >= LARGE_TABLE_ROWS:
+                        warnings.append(f"Scan complet de la table {target} (~{rows} lignes)")
+                else:
+                    rows = materialized.get(target, 1)  # sous-requête matérialisée (taille inconnue sinon)
+                loop_rows *= max(rows, 1)
+                scans.append(name)
+            elif detail.startswith('USE TEMP B-TREE'):
+                warnings.append(f"B-tree temporaire : {detail[len('USE TEMP B-TREE '):].lower()}")
+
+        if len(scans) > 1:
+            warnings.append(f"Boucles imbriquées sans index (produit cartésien ?) : {' x '.join(scans)}")
+        return (loop_rows if scans else 0) + subqueries_cost
+
+    cost = group_cost(0)
+    return cost, warnings
+
+def explain_query(query):
+    """EXPLAIN QUERY PLAN + estimation du coût, None si sqlite ne comprend pas la requête (dialecte duckdb...)"""
+    try:
+        plan = get_read_connection().execute(f"EXPLAIN QUERY PLAN {query}").fetchall()
+    except sqlite3.Error:
+        return None
+
+    row_estimates = get_row_estimates()
+    plan = [tuple(row) for row in plan]
+    cost, warnings = analyze_plan(plan, row_estimates, resolve_aliases(query, row_estimates))
+    return {
+        "plan": [{"id": node_id, "parent": parent, "detail": detail} for node_id, parent, _, detail in plan],
+        "estimated_cost": cost,
+        "warnings": warnings
+    }
+
+def summarize_plan(explain):
+    """Plan en une ligne pour le journal des requêtes"""
+    if not explain or not explain.get("plan"):
+        return None
+    return ' | '.join(node["detail"] for node in explain["plan"])
+
+def log_query(normalized, result, response, started, offset, cached=False, status=None, engine=None, watchdog=None):
+    """Ajoute l'appel à /api/query au journal (durée, lignes, taille de la réponse avant et après gzip, plan)"""
+    if status is None:
+        status = "ok" if result.get("success") else ("interrupted" if result.get("interrupted") else "error")
+    query_log.record({
+        "time": datetime.datetime.now().isoformat(timespec='seconds'),
+        "query": normalized,
+        "engine": result.get("engine", engine),
+        "offset": offset,
+        "status": status,
+        "error": result.get("error"),
+        "cached": cached,
+        "duration_ms": round((time.perf_counter() - started) * 1000, 2),
+        "rows": result.get("count", 0),
+        "bytes": getattr(response, 'body_length', response.content_length),  # taille du résultat encodé, avant gzip
+        "sent_bytes": response.content_length,
+        "lane": result.get("lane"),
+        "sqlite_steps": watchdog.steps if watchdog and result.get("engine") == "sqlite" else None,
+        "estimated_cost": result.get("estimated_cost"),
+        "plan": summarize_plan(result)
+    })
+
+def fetch_page(cursor, offset, page_size, watchdog):
+    """Lit une page de résultats depuis le curseur (page_size + 1 lignes pour savoir s'il en reste)"""
+    # on saute les lignes des pages précédentes sans les garder en mémoire ; elles ne comptent pas
+    # dans le budget de lignes (le temps et les instructions restent limités par le watchdog)
+    skipped = 0
+    while skipped < offset:
+        chunk = cursor.fetchmany(min(SKIP_CHUNK_SIZE, offset - skipped))
+        if not chunk:
+            break
+        skipped += len(chunk)
+
+    rows = cursor.fetchmany(page_size + 1)
+    watchdog.count_rows(len(rows))
+    return rows[:page_size], len(rows) > page_size
+
+def next_resume(query, engine, columns, rows, resume):
+    """Position par clé après la page lue (None : la page suivante repartira de l'offset)"""
+    key = resume[:2] if resume else (order_key(query, columns) if engine == 'sqlite' else None)
+    if key is None or not rows:
+        return None
+    column, descending = key
+    index = columns.index(column)
+    last = rows[-1][index]
+    if last is None or not isinstance(last, (int, float, str)):
+        return None
+    ties = sum(1 for _ in itertools.takewhile(lambda row: row[index] == last, reversed(rows)))
+    if resume and resume[2] == last:
+        ties += resume[3]  # ex aequo qui continuent ceux de la page précédente
+    return (column, descending, last, ties)
+
+def execute_query(query, engine='sqlite', offset=0, page_size=PAGE_SIZE, watchdog=None, version=None, resume=None):
+    watchdog = watchdog or QueryWatchdog()
+    try:
+        if resume:
+            # reprise par clé : seules les lignes après la page précédente sont lues
+            conn, cursor, engine = open_cursor(keyset_query(query, resume), engine, watchdog, (resume[2],))
+        else:
+            conn, cursor, engine = open_cursor(query, engine, watchdog)
+        try:
+            columns = [description[0] for description in cursor.description]
+            rows, has_more = fetch_page(cursor, resume[3] if resume else offset, page_size, watchdog)
+            rows = [tuple(row) for row in rows]
+        finally:
+            watchdog.close()
+            conn.close()
+        next_position = next_resume(query, engine, columns, rows, resume) if has_more else None
         
         return {
             "success": True,
-            "data": data,
+            "rows": rows,
             "columns": columns,
-            "count": len(data)
+            "count": len(rows),
+            "engine": engine,
+            "offset": offset,
+            "has_more": has_more,
+            "next_token": encode_page_token(query, engine, offset + len(rows), version, next_position) if has_more else None
         }
         
     except Exception as e:
+        if watchdog.reason:
+            return {"error": watchdog.reason, "interrupted": True}
         return {"error": str(e)}
 
-def get_tables_info():
-    try:
-        conn = sqlite3.connect(DATABASE_PATH)
-        cursor = conn.cursor()
+def json_default(value):
+    """Valeurs non json renvoyées par sqlite/duckdb (BLOB, DECIMAL, dates)"""
+    if isinstance(value, (bytes, bytearray, memoryview)):
+        return bytes(value).hex()
+    if isinstance(value, decimal.Decimal):
+        return float(value)
+    if isinstance(value, (datetime.date, datetime.time)):
+        return value.isoformat()
+    raise TypeError(f"Type non sérialisable en json : {type(value).__name__}")
+
+def encode_json(payload):
+    """json compact en bytes (orjson si installé, bien plus rapide sur les gros résultats)"""
+    if orjson is not None:
+        return orjson.dumps(payload, default=json_default)
+    return json.dumps(payload, ensure_ascii=False, separators=(',', ':'), default=json_default).encode('utf-8')
+
+def compressed_response(body, mimetype, status=200):
+    """Réponse compressée en gzip si le client l'accepte"""
+    response = Response(body, status=status, mimetype=mimetype)
+    response.body_length = len(body)  # taille avant gzip, pour le journal des requêtes
+    response.headers['Vary'] = 'Accept-Encoding'
+    if len(body) >= GZIP_MIN_BYTES and 'gzip' in request.headers.get('Accept-Encoding', ''):
+        response.set_data(gzip.compress(body, GZIP_LEVEL))
+        response.headers['Content-Encoding'] = 'gzip'
+    return response
+
+def encode_arrow(columns, rows):
+    """Résultat au format arrow ipc (stream), buffers compressés en zstd"""
+    arrays = []
+    for i in range(len(columns)):
+        values = [row[i] for row in rows]
+        try:
+            arrays.append(pa.array(values))
+        except (pa.ArrowInvalid, pa.ArrowTypeError):
+            # sqlite accepte des types différents dans une même colonne : on garde le texte
+            arrays.append(pa.array([None if value is None else str(value) for value in values], type=pa.string()))
+    table = pa.Table.from_arrays(arrays, names=columns)
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema, options=pa.ipc.IpcWriteOptions(compression='zstd')) as writer:
+        writer.write_table(table)
+    return sink.getvalue().to_pybytes()
+
+def query_response(result, result_format, cached=False):
+    """Résultat de /api/query dans le format demandé (les métadonnées passent en en-têtes pour arrow)"""
+    if result_format == 'arrow':
+        response = Response(encode_arrow(result["columns"], result["rows"]), mimetype=ARROW_MIMETYPE)
+        response.headers['X-Row-Count'] = str(result["count"])
+        response.headers['X-Engine'] = result["engine"]
+        response.headers['X-Has-More'] = 'true' if result["has_more"] else 'false'
+        response.headers['X-Cached'] = 'true' if cached else 'false'
+        if result.get("lane"):
+            response.headers['X-Lane'] = result["lane"]
+        if result["next_token"]:
+            response.headers['X-Next-Token'] = result["next_token"]
+        return response
+
+    payload = dict(result, cached=cached)
+    if result_format == 'objects':
+        payload["data"] = [dict(zip(result["columns"], row)) for row in payload.pop("rows")]
+    return compressed_response(encode_json(payload), 'application/json')
+
+def read_tables_info(conn):
+    """Colonnes et nb de lignes de chaque table : sqlite_stat1 (ANALYZE fait après chaque scraping) sinon COUNT(*)"""
+    cursor = conn.cursor()
+    row_counts = get_table_row_counts(conn)
+    # stats plus anciennes que la dernière écriture : nb de lignes approximatif (en attendant le prochain ANALYZE)
+    exact = are_statistics_fresh(conn)
+
+    cursor.execute("SELECT name FROM sqlite_master WHERE type='table' ORDER BY name")
+    tables = cursor.fetchall()
+    
+    tables_info = []
+    for table in tables:
+        table_name = table[0]
         
-        cursor.execute("SELECT name FROM sqlite_master WHERE type='table' ORDER BY name")
-        tables = cursor.fetchall()
+        # récupérer les colonnes
+        cursor.execute(f"PRAGMA table_info({table_name})")
+        columns = cursor.fetchall()
         
-        tables_info = []
-        for table in tables:
-            table_name = table[0]
-            
-            # récupérer les colonnes
-            cursor.execute(f"PRAGMA table_info({table_name})")
-            columns = cursor.fetchall()
-            
-            # cmopter les lignes
+        # compter les lignes (les tables vides n'ont pas de ligne dans sqlite_stat1)
+        if table_name in row_counts or (exact and not table_name.startswith('sqlite_')):
+            row_count = row_counts.get(table_name, 0)
+            row_count_exact = exact
+        else:
             cursor.execute(f"SELECT COUNT(*) FROM {table_name}")
             row_count = cursor.fetchone()[0]
-            
-            # Formater les colonnes
-            formatted_columns = []
-            for col in columns:
-                formatted_columns.append({
-                    'name': col[1],
-                    'type': col[2],
-                    'primary_key': bool(col[5])
-                })
-            
-            tables_info.append({
-                'name': table_name,
-                'columns': formatted_columns,
-                'row_count': row_count
+            row_count_exact = True
+        
+        # Formater les colonnes
+        formatted_columns = []
+        for col in columns:
+            formatted_columns.append({
+                'name': col[1],
+                'type': col[2],
+                'primary_key': bool(col[5])
             })
         
-        conn.close()
-        return tables_info
+        tables_info.append({
+            'name': table_name,
+            'columns': formatted_columns,
+            'row_count': row_count,
+            'row_count_exact': row_count_exact
+        })
+    return tables_info
+
+def get_tables_info():
+    """Métadonnées des tables, relues seulement quand les données ou les statistiques changent"""
+    try:
+        conn = get_read_connection()
+        version = (get_data_version(conn), get_meta(conn, ANALYZE_GENERATION_KEY))
+        with tables_info_lock:
+            if tables_info_cache["version"] != version:
+                tables_info_cache["tables"] = read_tables_info(conn)
+                tables_info_cache["version"] = version
+            return tables_info_cache["tables"]
         
     except Exception as e:
         print(f"Erreur lors de la récupération des tables: {e}")
         return []
 
+def get_agent_compositions():
+    """Compositions de toutes les games, relues seulement quand les données changent"""
+    conn = get_read_connection()
+    version = get_data_version(conn)
+    with agent_compositions_lock:
+        if agent_compositions_cache["version"] != version:
+            agent_compositions_cache["compositions"] = agents.load_compositions(conn)
+            agent_compositions_cache["version"] = version
+        return agent_compositions_cache["compositions"]
+
+def get_similarity_index(feature_set):
+    """Index de similarité du jeu de features, construit à la première demande après chaque scraping"""
+    conn = get_read_connection()
+    version = get_data_version(conn)
+    with similarity_index_lock:
+        if similarity_index_cache["version"] != version:
+            similarity_index_cache["indexes"] = {}
+            similarity_index_cache["version"] = version
+        if feature_set not in similarity_index_cache["indexes"]:
+            similarity_index_cache["indexes"][feature_set] = player_similarity.build_index(conn, feature_set)
+        return similarity_index_cache["indexes"][feature_set]
+
+def validate_query(query):
+    """Retourne un message d'erreur si la requête n'est pas autorisée, None sinon"""
+    if not query:
+        return "Requête vide"
+    
+    query_upper = query.upper().strip()
+    if not (query_upper.startswith('SELECT') or query_upper.startswith('WITH')):
+        return "Seules les requêtes SELECT et WITH sont autorisées. Pas touche aux données !"
+    
+    return None
+
+def stream_export(cursor, export_format, compress, watchdog, release):
+    """
+    Générateur des lignes exportées (csv ou ndjson), compressées en gzip à la volée si demandé.
+    Le temps maximum compte aussi quand sqlite ne travaille pas (client qui lit lentement) :
+    vérifié avant chaque paquet, l'export est alors coupé. release() libère la connexion et la voie.
+    """
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31) if compress else None  # 31 = format gzip
+    columns = [description[0] for description in cursor.description]
+
+    def encode(text):
+        data = text.encode('utf-8')
+        return compressor.compress(data) if compressor else data
+
+    try:
+        buffer = io.StringIO()
+        writer = csv.writer(buffer, lineterminator='\n')
+        if export_format == 'csv':
+            writer.writerow(columns)
+
+        while True:
+            if watchdog.time_exceeded():
+                watchdog.reason = f"Export interrompu : temps maximum dépassé ({watchdog.timeout} s)"
+                raise QueryLimitExceeded(watchdog.reason)
+            rows = cursor.fetchmany(EXPORT_BATCH_SIZE)
+            if not rows:
+                break
+
+            if export_format == 'csv':
+                writer.writerows(rows)
+            else:
+                for row in rows:
+                    buffer.write(json.dumps(dict(zip(columns, row)), ensure_ascii=False, default=str))
+                    buffer.write('\n')
+
+            chunk = encode(buffer.getvalue())
+            buffer.seek(0)
+            buffer.truncate()
+            if chunk:
+                yield chunk
+
+        chunk = encode(buffer.getvalue())  # en-tête csv si aucun résultat
+        if chunk:
+            yield chunk
+        if compressor:
+            yield compressor.flush()
+    finally:
+        release()
+
+def get_table_columns(table):
+    """nom -> type déclaré des colonnes d'une table (métadonnées en cache)"""
+    for info in get_tables_info():
+        if info['name'] == table:
+            return {column['name']: (column['type'] or '').upper() for column in info['columns']}
+    return {}
+
+def convert_api_row(row, columns, json_columns):
+    """Valeurs typées selon le schéma (booléens, json des picks/bans...)"""
+    item = {}
+    for name in row.keys():
+        value = row[name]
+        if value is not None:
+            if columns.get(name) == 'BOOLEAN':
+                value = bool(value)
+            elif name in json_columns:
+                try:
+                    value = json.loads(value)
+                except ValueError:
+                    pass
+        item[name] = value
+    return item
+
+def api_etag(version):
+    """ETag fort : même version des données + même url = même contenu"""
+    digest = hashlib.sha1(request.full_path.encode('utf-8')).hexdigest()[:16]
+    return f"v1-{version}-{digest}"
+
+def api_response(payload, etag, status=200):
+    """Réponse json de l'api v1 : ETag, revalidation obligatoire, gzip si accepté"""
+    response = compressed_response(encode_json(payload), 'application/json', status)
+    if response.headers.get('Content-Encoding') == 'gzip':
+        etag += '-gzip'  # représentation différente = etag différent
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = 'no-cache'
+    return response
+
+def api_not_modified(etag):
+    """304 si le client a déjà cette version (avant toute lecture de la base)"""
+    for candidate in (etag, etag + '-gzip'):
+        if request.if_none_match.contains(candidate):
+            response = Response(status=304)
+            response.set_etag(candidate)
+            response.headers['Vary'] = 'Accept-Encoding'
+            response.headers['Cache-Control'] = 'no-cache'
+            return response
+    return None
+
+def api_error(message, status):
+    return jsonify({"error": message}), status
+
+def parse_api_fields(resource, columns):
+    """Colonnes demandées avec fields=a,b,c (toutes par défaut), ValueError si inconnues"""
+    fields = request.args.get('fields')
+    if not fields:
+        return list(columns)
+    selected = [field.strip() for field in fields.split(',') if field.strip()]
+    unknown = [field for field in selected if field not in columns]
+    if unknown:
+        raise ValueError(f"Champ(s) inconnu(s) pour {resource} : {', '.join(unknown)} (possibles : {', '.join(columns)})")
+    return selected
+
 @app.route('/')
 def index():
     # return render_template('index.html')
@@ -86,20 +1220,487 @@ def api_tables():
 def api_query():
     data = request.get_json()
     query = data.get('query', '').strip()
+    engine = data.get('engine', 'sqlite')
     
-    if not query:
-        return jsonify({"error": "Requête vide"})
+    error = validate_query(query)
+    if error:
+        return jsonify({"error": error})
     
-    query_upper = query.upper().strip()
-    if not (query_upper.startswith('SELECT') or query_upper.startswith('WITH')):
-        return jsonify({"error": "Seules les requêtes SELECT et WITH sont autorisées. Pas touche aux données !"})
+    if engine not in ENGINES:
+        return jsonify({"error": f"Moteur inconnu : {engine} (possibles : {', '.join(ENGINES)})"}), 400
+
+    result_format = data.get('format', 'compact')
+    if result_format not in QUERY_FORMATS:
+        return jsonify({"error": f"Format inconnu : {result_format} (possibles : {', '.join(QUERY_FORMATS)})"})
+    if result_format == 'arrow' and pa is None:
+        return jsonify({"error": "Format arrow indisponible : pyarrow n'est pas installé"})
+
+    try:
+        page_size = int(data.get('page_size', PAGE_SIZE))
+    except (TypeError, ValueError):
+        return jsonify({"error": "page_size doit être un entier"})
+    if not 1 <= page_size <= MAX_PAGE_SIZE:
+        return jsonify({"error": f"page_size doit être entre 1 et {MAX_PAGE_SIZE}. Faut pas abuser non plus."})
+
+    # page suivante : le jeton donne le moteur et la position dans le résultat
+    # (le jeton est lié à la version des données : pas de page décalée après une mise à jour)
+    offset, resume = 0, None
+    version = get_data_version()
+    page_token = data.get('page_token')
+    if page_token:
+        try:
+            engine, offset, resume = decode_page_token(page_token, query, version)
+        except StalePageToken as e:
+            return jsonify({"error": str(e), "stale_token": True})
+        except ValueError as e:
+            return jsonify({"error": str(e)})
     
-    result = execute_query(query)
+    # même requête (au format près) sur les mêmes données = même résultat
+    started = time.perf_counter()
+    normalized = normalize_sql(query)
+    cache_key = (normalized, engine, offset, page_size)
+    result = query_cache.get(cache_key, version)
+    if result is not None:
+        response = query_response(result, result_format, cached=True)
+        log_query(normalized, result, response, started, offset, cached=True)
+        return response
+    
+    # estimation du coût avant d'exécuter quoi que ce soit
+    explain = explain_query(query)
+    if explain and explain["estimated_cost"] > PLAN_REFUSE_COST:
+        result = dict(explain, error=(
+            f"Requête refusée : coût estimé trop élevé (~{explain['estimated_cost']:.2e} lignes visitées). "
+            "Voir le plan d'exécution pour l'optimiser (index, filtres, jointures)."
+        ))
+        response = jsonify(result)
+        log_query(normalized, result, response, started, offset, status="refused", engine=engine)
+        return response
+    if explain:
+        explain["cost_level"] = "warning" if explain["estimated_cost"] > PLAN_WARN_COST else "ok"
+
+    # enregistrement de la requête pour pouvoir l'annuler depuis la page
+    watchdog = QueryWatchdog()
+    query_id = data.get('query_id')
+    if query_id:
+        with running_queries_lock:
+            running_queries[query_id] = watchdog
+    lane = query_scheduler.classify(normalized, explain)
+    try:
+        with query_scheduler.admit(lane, normalized):
+            watchdog.start()
+            result = execute_query(query, engine, offset, page_size, watchdog, version, resume)
+    except QueryRejected as e:
+        result = dict(explain or {}, error=str(e), lane=lane)
+        response = jsonify(result)
+        response.status_code = 503
+        response.headers['Retry-After'] = str(e.retry_after)
+        log_query(normalized, result, response, started, offset, status="rejected", engine=engine)
+        return response
+    finally:
+        if query_id:
+            with running_queries_lock:
+                running_queries.pop(query_id, None)
+
+    if explain:
+        result.update(explain)
+    result["lane"] = lane
+    if result.get("success"):
+        query_cache.put(cache_key, version, result)
+        response = query_response(result, result_format)
+    else:
+        response = jsonify(result)
+    log_query(normalized, result, response, started, offset, engine=engine, watchdog=watchdog)
+    return response
+
+def unregister_query(query_id, watchdog):
+    """Retire une requête des requêtes annulables (si l'id n'a pas été repris entre-temps)"""
+    with running_queries_lock:
+        if running_queries.get(query_id) is watchdog:
+            running_queries.pop(query_id)
+
+@app.route('/api/query/cancel', methods=['POST'])
+def api_query_cancel():
+    data = request.get_json(silent=True) or {}
+    with running_queries_lock:
+        watchdog = running_queries.get(data.get('query_id'))
+    if watchdog is None:
+        return jsonify({"error": "Requête introuvable (déjà terminée ?)"})
+    watchdog.stop("Requête annulée")
+    return jsonify({"success": True})
+
+def dashboard_response(read):
+    """Lecture d'une table précalculée après les scrapings (dashboard, classements), 503 si jamais calculée"""
+    try:
+        return jsonify(read(get_read_connection()))
+    except sqlite3.OperationalError:
+        return jsonify({"error": "Données pas encore calculées (lancer un scraping)"}), 503
+
+@app.route('/api/dashboard/counts')
+def api_dashboard_counts():
+    return dashboard_response(dashboard.get_counts)
+
+@app.route('/api/dashboard/top-players')
+def api_dashboard_top_players():
+    metric = request.args.get('metric', 'acs')
+    if metric not in dashboard.PLAYER_METRICS:
+        return jsonify({"error": f"Métrique inconnue : {metric} (possibles : {', '.join(dashboard.PLAYER_METRICS)})"}), 400
+    try:
+        limit = min(max(int(request.args.get('limit', 10)), 1), 100)
+        min_games = max(int(request.args.get('min_games', dashboard.MIN_GAMES)), 0)
+    except ValueError:
+        return jsonify({"error": "limit et min_games doivent être des entiers"}), 400
+    return dashboard_response(lambda conn: {
+        "metric": metric,
+        "players": dashboard.get_top_players(conn, metric, limit, min_games)
+    })
+
+@app.route('/api/dashboard/region-wins')
+def api_dashboard_region_wins():
+    return dashboard_response(dashboard.get_region_wins)
+
+@app.route('/api/ratings')
+def api_ratings():
+    """Classement Elo actuel : /api/ratings?level=series|map&region=emea&limit=50"""
+    level = request.args.get('level', 'series')
+    if level not in ratings.RATING_LEVELS:
+        return jsonify({"error": f"Niveau inconnu : {level} (possibles : {', '.join(ratings.RATING_LEVELS)})"}), 400
+    try:
+        limit = min(max(int(request.args.get('limit', 50)), 1), 500)
+    except ValueError:
+        return jsonify({"error": "limit doit être un entier"}), 400
+    region = request.args.get('region') or None
+    return dashboard_response(lambda conn: {
+        "level": level,
+        "teams": ratings.get_ratings(conn, level, region, limit)
+    })
+
+@app.route('/api/ratings/<int:team_id>')
+def api_rating_history(team_id):
+    """Evolution du classement d'une équipe"""
+    level = request.args.get('level', 'series')
+    if level not in ratings.RATING_LEVELS:
+        return jsonify({"error": f"Niveau inconnu : {level} (possibles : {', '.join(ratings.RATING_LEVELS)})"}), 400
+    return dashboard_response(lambda conn: {
+        "team_id": team_id,
+        "level": level,
+        "history": ratings.get_rating_history(conn, team_id, level)
+    })
+
+@app.route('/api/round-states')
+def api_round_states():
+    """% de maps gagnées depuis chaque score (0-0 à 12-12), d'une équipe (?team_id=) ou de toutes"""
+    try:
+        team_id = int(request.args['team_id']) if request.args.get('team_id') else None
+    except ValueError:
+        return jsonify({"error": "team_id doit être un entier"}), 400
+    return dashboard_response(lambda conn: {
+        "team_id": team_id,
+        "states": round_states.get_round_states(conn, team_id)
+    })
+
+@app.route('/api/agents')
+def api_agents():
+    """Pick/win rate des agents, compositions et paires : /api/agents?map=Bind&region=emea&by=patch"""
+    filters = {name: request.args[name] for name in agents.SLICE_DIMENSIONS if request.args.get(name)}
+    by = request.args.get('by') or None
+    try:
+        top = min(max(int(request.args.get('top', agents.TOP_COMPOSITIONS)), 1), 100)
+        if 'event_id' in filters:
+            filters['event_id'] = int(filters['event_id'])
+    except ValueError:
+        return jsonify({"error": "top et event_id doivent être des entiers"}), 400
+    try:
+        return jsonify({"filters": filters, "by": by, "slices": agents.agent_stats(get_agent_compositions(), filters, by, top)})
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    except ImportError as e:
+        return jsonify({"error": str(e)}), 503
+    except sqlite3.OperationalError:
+        return jsonify({"error": "Données pas encore calculées (lancer un scraping)"}), 503
+
+@app.route('/api/maps/vetoes')
+def api_map_vetoes():
+    """Picks/bans/deciders des maps : /api/maps/vetoes?event_id=&team_id=&patch=&by=team|event|patch"""
+    try:
+        event_id = int(request.args['event_id']) if request.args.get('event_id') else None
+        team_id = int(request.args['team_id']) if request.args.get('team_id') else None
+    except ValueError:
+        return jsonify({"error": "event_id et team_id doivent être des entiers"}), 400
+    patch = request.args.get('patch') or None
+    by = request.args.get('by') or None
+    if by is not None and by not in map_vetoes.VETO_GROUPS:
+        return jsonify({"error": f"Regroupement inconnu : {by} (possibles : {', '.join(map_vetoes.VETO_GROUPS)})"}), 400
+
+    def read(conn):
+        key = (event_id, team_id, patch, by)
+        fingerprint = map_vetoes.veto_fingerprint(conn, event_id)
+        with veto_stats_lock:
+            entry = veto_stats_cache.get(key)
+            if entry is not None and entry[0] == fingerprint:
+                veto_stats_cache.move_to_end(key)
+                return entry[1]
+        result = {"event_id": event_id, "team_id": team_id, "patch": patch, "by": by,
+                  "slices": map_vetoes.map_veto_stats(conn, event_id, team_id, patch, by)}
+        with veto_stats_lock:
+            veto_stats_cache[key] = (fingerprint, result)
+            while len(veto_stats_cache) > VETO_CACHE_MAX_ENTRIES:
+                veto_stats_cache.popitem(last=False)
+        return result
+
+    return dashboard_response(read)
+
+@app.route('/api/economy')
+def api_economy():
+    """Conversions économiques : /api/economy?region=emea&map=Lotus&since_patch=9.0&side=both&by=team"""
+    try:
+        team_id = int(request.args['team_id']) if request.args.get('team_id') else None
+        event_id = int(request.args['event_id']) if request.args.get('event_id') else None
+    except ValueError:
+        return jsonify({"error": "team_id et event_id doivent être des entiers"}), 400
+    regions = [region for region in request.args.get('region', '').split(',') if region] or None
+    filters = {
+        "team_id": team_id,
+        "regions": regions,
+        "map_name": request.args.get('map') or None,
+        "side": request.args.get('side', 'both'),
+        "event_id": event_id,
+        "since_patch": request.args.get('since_patch') or None,
+        "until_patch": request.args.get('until_patch') or None,
+        "by": request.args.get('by') or None,
+    }
+    try:
+        return dashboard_response(lambda conn: dict(filters, slices=economy_cube.economy_conversion(conn, **filters)))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+@app.route('/api/players/embedding')
+def api_player_embedding():
+    """Coordonnées ACP des joueurs : /api/players/embedding?feature_set=v1|duelist|sides|all"""
+    feature_set = request.args.get('feature_set', 'v1')
+    if feature_set not in player_embedding.FEATURE_SETS:
+        return jsonify({"error": f"Jeu de features inconnu : {feature_set} (possibles : {', '.join(player_embedding.FEATURE_SETS)})"}), 400
+    if player_embedding.np is None:
+        return jsonify({"error": "numpy n'est pas installé"}), 503
+    return dashboard_response(lambda conn: player_embedding.get_embedding(conn, feature_set))
+
+@app.route('/api/players/<int:player_id>/similar')
+def api_similar_players(player_id):
+    """Joueurs les plus proches : /api/players/<id>/similar?feature_set=duelist&k=10"""
+    feature_set = request.args.get('feature_set', 'all')
+    if feature_set not in player_embedding.FEATURE_SETS:
+        return jsonify({"error": f"Jeu de features inconnu : {feature_set} (possibles : {', '.join(player_embedding.FEATURE_SETS)})"}), 400
+    try:
+        k = min(max(int(request.args.get('k', player_similarity.DEFAULT_NEIGHBOURS)), 1), player_similarity.MAX_NEIGHBOURS)
+    except ValueError:
+        return jsonify({"error": "k doit être un entier"}), 400
+    try:
+        index = get_similarity_index(feature_set)
+    except ImportError as e:
+        return jsonify({"error": str(e)}), 503
+    except sqlite3.OperationalError:
+        return jsonify({"error": "Données pas encore calculées (lancer un scraping)"}), 503
+    if player_id not in index:
+        return jsonify({"error": f"Joueur {player_id} absent de l'index (moins de {player_embedding.MIN_GAMES} games ?)"}), 404
+    return jsonify(player_similarity.get_similar_players(get_read_connection(), index, player_id, k))
+
+@app.route('/api/search')
+def api_search():
+    """Autocomplétion : /api/search?q=zek&types=player,team&limit=10"""
+    text = request.args.get('q', '').strip()
+    kinds = [kind for kind in request.args.get('types', '').split(',') if kind] or None
+    if kinds and any(kind not in search.SEARCH_TABLES for kind in kinds):
+        return jsonify({"error": f"Types possibles : {', '.join(search.SEARCH_TABLES)}"}), 400
+    try:
+        limit = min(max(int(request.args.get('limit', 10)), 1), 50)
+    except ValueError:
+        return jsonify({"error": "limit doit être un entier"}), 400
+    if not text:
+        return jsonify({"query": text, "results": []})
+    try:
+        results = search.search(get_read_connection(), text, kinds, limit)
+    except sqlite3.OperationalError:
+        return jsonify({"error": "Index de recherche absent (relancer main.py pour le construire)"}), 503
+    return jsonify({"query": text, "results": results})
+
+def check_admin_token():
+    """None si autorisé, sinon la réponse d'erreur (token dans X-Admin-Token ou ?token=)"""
+    if ADMIN_TOKEN and ADMIN_TOKEN not in (request.headers.get('X-Admin-Token'), request.args.get('token')):
+        return jsonify({"error": "Accès refusé"}), 403
+    return None
+
+@app.route('/api/admin/queries')
+def api_admin_queries():
+    """Requêtes les plus lentes et les plus fréquentes parmi les dernières exécutées"""
+    denied = check_admin_token()
+    if denied:
+        return denied
+    try:
+        limit = min(max(int(request.args.get('limit', 20)), 1), QUERY_LOG_SIZE)
+    except ValueError:
+        return jsonify({"error": "limit doit être un entier"}), 400
+    return jsonify({
+        "entries": len(query_log.entries),
+        "slowest": query_log.slowest(limit),
+        "most_frequent": query_log.most_frequent(limit)
+    })
+
+@app.route('/api/admin/lanes')
+def api_admin_lanes():
+    """Etat des voies de /api/query (en cours, en attente, refus, temps d'attente)"""
+    denied = check_admin_token()
+    if denied:
+        return denied
+    return jsonify(query_scheduler.stats())
+
+@app.route('/api/cache/stats')
+def api_cache_stats():
+    return jsonify(query_cache.stats())
+
+@app.route('/api/export', methods=['POST'])
+def api_export():
+    """Export complet du résultat d'une requête (csv ou ndjson), sans limite de lignes"""
+    # formulaire (téléchargement direct depuis la page) ou json
+    data = request.get_json(silent=True) or request.form
+    query = data.get('query', '').strip()
+    engine = data.get('engine', 'sqlite')
+    export_format = data.get('format', 'csv')
+
+    error = validate_query(query)
+    if error:
+        return jsonify({"error": error}), 400
+    if engine not in ENGINES:
+        return jsonify({"error": f"Moteur inconnu : {engine} (possibles : {', '.join(ENGINES)})"}), 400
+    if export_format not in EXPORT_FORMATS:
+        return jsonify({"error": f"Format inconnu : {export_format} (possibles : {', '.join(EXPORT_FORMATS)})"}), 400
+
+    explain = explain_query(query)
+    if explain and explain["estimated_cost"] > PLAN_REFUSE_COST:
+        return jsonify(dict(explain, error=(
+            f"Export refusé : coût estimé trop élevé (~{explain['estimated_cost']:.2e} lignes visitées). "
+            "Voir le plan d'exécution pour l'optimiser (index, filtres, jointures)."
+        ))), 400
+
+    # pas de limite de lignes pour l'export, mais un temps et un budget d'instructions maximum ;
+    # dans la voie des exports, place gardée jusqu'à la fin du téléchargement (ou du temps maximum)
+    watchdog = QueryWatchdog(timeout=EXPORT_TIMEOUT_SECONDS, max_steps=EXPORT_MAX_VM_STEPS, max_rows=None)
+    resources = ExitStack()
+    try:
+        resources.enter_context(query_scheduler.admit('export', normalize_sql(query), record=False))
+    except QueryRejected as e:
+        response = jsonify({"error": str(e), "lane": e.lane})
+        response.status_code = 503
+        response.headers['Retry-After'] = str(e.retry_after)
+        return response
+    watchdog.start()
+    query_id = data.get('query_id')
+    if query_id:
+        # annulable par /api/query/cancel comme une requête de la page
+        with running_queries_lock:
+            running_queries[query_id] = watchdog
+        resources.callback(unregister_query, query_id, watchdog)
+    try:
+        conn, cursor, engine = open_cursor(query, engine, watchdog)
+    except Exception as e:
+        resources.close()
+        return jsonify({"error": str(e)}), 400
+    resources.callback(conn.close)
+    resources.callback(watchdog.close)
+
+    mimetype, extension = EXPORT_FORMATS[export_format]
+    compress = 'gzip' in request.headers.get('Accept-Encoding', '')
+    filename = f"resultats_requete_{datetime.datetime.now().strftime('%Y-%m-%dT%H-%M-%S')}.{extension}"
+
+    response = Response(stream_export(cursor, export_format, compress, watchdog, resources.close), mimetype=mimetype)
+    # appelé par le serveur wsgi à la fin de la réponse, même si le client coupe avant le premier octet
+    response.call_on_close(resources.close)
+    response.headers['Content-Disposition'] = f'attachment; filename="{filename}"'
+    response.headers['Vary'] = 'Accept-Encoding'
+    if compress:
+        response.headers['Content-Encoding'] = 'gzip'
+    return response
+
+@app.route('/api/v1/<resource>')
+def api_v1_list(resource):
+    """Liste paginée (par clé, ?after=) d'une ressource, avec filtres et fields="""
+    config = API_RESOURCES.get(resource)
+    if config is None:
+        return api_error(f"Ressource inconnue : {resource} (possibles : {', '.join(API_RESOURCES)})", 404)
+
+    etag = api_etag(get_data_version())
+    not_modified = api_not_modified(etag)
+    if not_modified:
+        return not_modified
+
+    columns = get_table_columns(config['table'])
+    try:
+        fields = parse_api_fields(resource, columns)
+        limit = int(request.args.get('limit', API_PAGE_SIZE))
+        after = request.args.get('after')
+        after = int(after) if after is not None else None
+    except ValueError as e:
+        return api_error(str(e), 400)
+    if not 1 <= limit <= API_MAX_PAGE_SIZE:
+        return api_error(f"limit doit être entre 1 et {API_MAX_PAGE_SIZE}", 400)
+
+    key = config['key']
+    conditions, params = [], []
+    for name, value in request.args.items():
+        if name in ('fields', 'limit', 'after'):
+            continue
+        if name not in config['filters']:
+            return api_error(f"Filtre inconnu pour {resource} : {name} (possibles : {', '.join(config['filters'])})", 400)
+        conditions.append(config['filters'][name])
+        params.append(value)
+    if after is not None:
+        conditions.append(f"{key} > ?")
+        params.append(after)
+
+    # la clé sert à la pagination même si elle n'est pas demandée dans fields
+    selected = fields if key in fields else fields + [key]
+    where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+    rows = get_read_connection().execute(
+        f"SELECT {', '.join(selected)} FROM {config['table']} {where} ORDER BY {key} LIMIT ?",
+        params + [limit + 1]
+    ).fetchall()
+
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    data = [convert_api_row(row, columns, config.get('json', ())) for row in rows]
+    next_after = rows[-1][key] if has_more else None
+    if key not in fields:
+        for item in data:
+            del item[key]
+
+    return api_response({
+        "data": data,
+        "count": len(data),
+        "next_after": next_after
+    }, etag)
+
+@app.route('/api/v1/<resource>/<int:item_id>')
+def api_v1_item(resource, item_id):
+    config = API_RESOURCES.get(resource)
+    if config is None:
+        return api_error(f"Ressource inconnue : {resource} (possibles : {', '.join(API_RESOURCES)})", 404)
+
+    etag = api_etag(get_data_version())
+    not_modified = api_not_modified(etag)
+    if not_modified:
+        return not_modified
+
+    columns = get_table_columns(config['table'])
+    try:
+        fields = parse_api_fields(resource, columns)
+    except ValueError as e:
+        return api_error(str(e), 400)
 
-    max_results = 2000
-    if int(result.get("count", 0)) > max_results:
-        result = {"error": f"Le nombre de résultats dépasse la limite de {max_results} lignes. Faut pas abuser non plus."}
-    return jsonify(result)
+    row = get_read_connection().execute(
+        f"SELECT {', '.join(fields)} FROM {config['table']} WHERE {config['key']} = ?", (item_id,)
+    ).fetchone()
+    if row is None:
+        return api_error(f"{resource} {item_id} introuvable", 404)
+    return api_response({"data": convert_api_row(row, columns, config.get('json', ()))}, etag)
 
 if __name__ == '__main__':
-    app.run(debug=True, host='0.0.0.0', port=5000)
\ No newline at end of file
+    # serveur de développement (en production : python serve.py)
+    app.run(debug=os.environ.get('VCT_DEBUG', '1') == '1', host='0.0.0.0', port=5000)
\ No newline at end of file
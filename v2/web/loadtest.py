@@ -0,0 +1,106 @@
+"""
+Test de charge du site (bibliothèque standard uniquement) : requêtes/s et latences (p50, p95, p99)
+de /api/tables et /api/query. A lancer contre un serveur démarré avec serve.py et une vraie base :
+
+    python loadtest.py --url http://localhost:5000 --requests 2000 --concurrency 16
+
+Par défaut chaque requête sql est différente (valeur aléatoire) pour ne pas mesurer que le cache
+de /api/query ; --cached réutilise toujours le même texte.
+"""
+
+import argparse
+import http.client
+import json
+import random
+import threading
+import time
+import urllib.parse
+
+# requêtes représentatives de l'outil (filtre -> la valeur change à chaque appel)
+QUERIES = [
+    "SELECT * FROM events WHERE id > {n} ORDER BY start_date DESC",
+    "SELECT p.name, ps.agent_name, ps.acs_both FROM player_stats ps JOIN players p ON p.id = ps.player_id WHERE ps.acs_both > {n} LIMIT 100",
+    "SELECT g.map, COUNT(*) AS games FROM games g JOIN matches m ON m.match_id = g.match_id WHERE m.match_id > {n} GROUP BY g.map",
+    "SELECT t.short_name, COUNT(*) AS wins FROM match_teams mt JOIN teams t ON t.id = mt.team_id WHERE mt.is_winner = 1 AND mt.id > {n} GROUP BY t.short_name ORDER BY wins DESC",
+]
+
+
+def percentile(values, p):
+    if not values:
+        return None
+    values = sorted(values)
+    index = min(int(round(p / 100 * (len(values) - 1))), len(values) - 1)
+    return values[index]
+
+
+def run_endpoint(url, name, make_request, total, concurrency):
+    """Lance `total` requêtes réparties sur `concurrency` threads (une connexion keep-alive par thread)"""
+    parsed = urllib.parse.urlparse(url)
+    latencies = []
+    errors = []
+    lock = threading.Lock()
+    counter = iter(range(total))
+
+    def worker():
+        conn = http.client.HTTPConnection(parsed.hostname, parsed.port or 80, timeout=60)
+        local_latencies = []
+        local_errors = 0
+        while True:
+            with lock:
+                if next(counter, None) is None:
+                    break
+            method, path, body = make_request()
+            headers = {'Content-Type': 'application/json'} if body else {}
+            started = time.perf_counter()
+            try:
+                conn.request(method, path, body=body, headers=headers)
+                response = conn.getresponse()
+                data = response.read()
+                if response.status != 200 or b'"error"' in data[:200]:
+                    local_errors += 1
+            except (OSError, http.client.HTTPException):
+                local_errors += 1
+                conn.close()
+                conn = http.client.HTTPConnection(parsed.hostname, parsed.port or 80, timeout=60)
+            local_latencies.append(time.perf_counter() - started)
+        conn.close()
+        with lock:
+            latencies.extend(local_latencies)
+            errors.append(local_errors)
+
+    started = time.perf_counter()
+    threads = [threading.Thread(target=worker) for _ in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    ms = [latency * 1000 for latency in latencies]
+    print(f"{name:<14} {len(latencies) / elapsed:9.1f} req/s   "
+          f"p50 {percentile(ms, 50):8.2f} ms   p95 {percentile(ms, 95):8.2f} ms   p99 {percentile(ms, 99):8.2f} ms   "
+          f"erreurs {sum(errors)}/{len(latencies)}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Test de charge de /api/tables et /api/query")
+    parser.add_argument('--url', default='http://localhost:5000')
+    parser.add_argument('--requests', type=int, default=1000, help="requêtes par endpoint")
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--cached', action='store_true', help="même texte de requête à chaque fois (cache de /api/query)")
+    args = parser.parse_args()
+
+    def tables_request():
+        return 'GET', '/api/tables', None
+
+    def query_request():
+        query = random.choice(QUERIES).format(n=0 if args.cached else random.randint(0, 1000))
+        return 'POST', '/api/query', json.dumps({"query": query, "engine": "sqlite"})
+
+    print(f"{args.requests} requêtes par endpoint, {args.concurrency} en parallèle sur {args.url}")
+    run_endpoint(args.url, '/api/tables', tables_request, args.requests, args.concurrency)
+    run_endpoint(args.url, '/api/query', query_request, args.requests, args.concurrency)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,41 @@
+"""
+Lancement du site en production (pas de serveur de dev flask ni de debugger) :
+
+    python serve.py --port 5000 --threads 16
+
+avec waitress : un seul processus, un pool de threads (marche aussi sous Windows).
+Ne pas lancer plusieurs processus (gunicorn -w N...) : l'état du site est en mémoire du
+processus (requêtes annulables de /api/query/cancel, voies d'admission, cache des résultats,
+journal des requêtes) et ne serait ni partagé ni cohérent entre workers. Pour monter en
+charge, augmenter --threads (et les voies de QUERY_LANES dans app.py).
+Chaque thread garde sa propre connexion sqlite de lecture, rouverte quand le scraper
+publie un nouveau snapshot : pas besoin de redémarrer après un scraping.
+"""
+
+import argparse
+import os
+
+from app import app
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serveur de production du site VCT")
+    parser.add_argument('--host', default=os.environ.get('VCT_HOST', '0.0.0.0'))
+    parser.add_argument('--port', type=int, default=int(os.environ.get('VCT_PORT', 5000)))
+    parser.add_argument('--threads', type=int, default=int(os.environ.get('VCT_THREADS', 8)),
+                        help="nombre de threads qui traitent les requêtes")
+    args = parser.parse_args()
+
+    try:
+        from waitress import serve
+    except ImportError:
+        raise SystemExit(
+            "waitress n'est pas installé (pip install waitress)"
+        )
+
+    print(f"Serveur sur http://{args.host}:{args.port} ({args.threads} threads)")
+    serve(app, host=args.host, port=args.port, threads=args.threads)
+
+
+if __name__ == '__main__':
+    main()
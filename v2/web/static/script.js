@@ -178,6 +178,7 @@ ORDER BY winrate_first_to_12 DESC;
 document.addEventListener('DOMContentLoaded', function() {
     loadTables();
     displayPredefinedQueries();
+    document.querySelector('#results .table-container').addEventListener('scroll', onResultsScroll);
 });
 
 function displayPredefinedQueries() {
@@ -245,7 +246,9 @@ function displayTables() {
     
     container.innerHTML = '';
     
-    const filteredTables = tablesData.filter(table => table.name !== 'sqlite_sequence' && table.name !== 'utils'); // on enleve les tables sqlite_sequence et utils
+    const hiddenTables = ['sqlite_sequence', 'utils', 'db_meta', 'sqlite_stat1'];
+    const ftsShadowTable = /_fts_(data|idx|docsize|config|content)$/; // tables internes de fts5
+    const filteredTables = tablesData.filter(table => !hiddenTables.includes(table.name) && !ftsShadowTable.test(table.name)); // on enleve les tables internes
     
     filteredTables.forEach(table => {
         const tableCard = createTableCard(table);
@@ -268,7 +271,7 @@ function createTableCard(table) {
     
     const countElement = document.createElement('span');
     countElement.className = 'table-count';
-    countElement.textContent = `${table.row_count} lignes`;
+    countElement.textContent = `${table.row_count_exact ? '' : '~'}${table.row_count} lignes`;
     
     const expandIcon = document.createElement('span');
     expandIcon.className = 'expand-icon';
@@ -329,8 +332,23 @@ function toggleSidebar() {
     sidebar.classList.toggle('open');
 }
 
+// requête en cours (pour charger les pages suivantes)
+let currentQuery = null;
+
+function postQuery(payload) {
+    return fetch('/api/query', {
+        method: 'POST',
+        headers: {
+            'Content-Type': 'application/json',
+        },
+        body: JSON.stringify(payload)
+    })
+    .then(response => response.json());
+}
+
 function executeQuery() {
     const query = document.getElementById('queryTextarea').value.trim();
+    const engine = document.getElementById('engineSelect').value;
     
     if (!query) {
         alert('Veuillez entrer une requête');
@@ -340,16 +358,12 @@ function executeQuery() {
     // Masquer les sections des requetes d'avant 
     document.getElementById('results').style.display = 'none';
     document.getElementById('error').style.display = 'none';
+    document.getElementById('query-plan').style.display = 'none';
     document.getElementById('loading').style.display = 'block';
 
-    fetch('/api/query', {
-        method: 'POST',
-        headers: {
-            'Content-Type': 'application/json',
-        },
-        body: JSON.stringify({ query: query })
-    })
-    .then(response => response.json())
+    currentQuery = { query: query, engine: engine, query_id: newQueryId() };
+
+    postQuery(currentQuery)
     .then(data => {
         document.getElementById('loading').style.display = 'none';
         
@@ -358,6 +372,7 @@ function executeQuery() {
         } else {
             showResults(data);
         }
+        renderPlan(data);
     })
     .catch(error => {
         document.getElementById('loading').style.display = 'none';
@@ -365,56 +380,290 @@ function executeQuery() {
     });
 }
 
-function showResults(data) {
-    document.getElementById('error').style.display = 'none';
-    document.getElementById('results').style.display = 'block';
+function newQueryId() {
+    if (window.crypto && crypto.randomUUID) {
+        return crypto.randomUUID();
+    }
+    return Date.now().toString(36) + Math.random().toString(36).slice(2);
+}
 
-    // Stocker les données pour le téléchargement CSV
-    currentResultData = data;
+// annuler la requête en cours d'exécution (le serveur renvoie alors une erreur "Requête annulée")
+// ou, avec son id, un export en cours
+function cancelQuery(queryId) {
+    if (!queryId && !currentQuery) {
+        return;
+    }
+    fetch('/api/query/cancel', {
+        method: 'POST',
+        headers: {
+            'Content-Type': 'application/json',
+        },
+        body: JSON.stringify({ query_id: queryId || currentQuery.query_id })
+    })
+    .catch(error => console.error('Erreur lors de l\'annulation:', error));
+}
 
+// page suivante du résultat (jeton de continuation renvoyé par le serveur)
+// appelée par le bouton ou automatiquement en approchant du bas du tableau
+function loadNextPage() {
+    if (!currentQuery || !currentResultData || !currentResultData.next_token || loadingNextPage) {
+        return;
+    }
+    loadingNextPage = true;
+
+    const button = document.getElementById('next-page-btn');
+    if (button) {
+        button.disabled = true;
+        button.textContent = 'Chargement...';
+    }
+
+    const resultData = currentResultData;
+    postQuery({ query: currentQuery.query, page_token: resultData.next_token })
+    .then(data => {
+        if (resultData !== currentResultData) {
+            return; // une autre requête a été lancée entre temps
+        }
+        if (data.error) {
+            showPageError(resultData, data);
+            return;
+        }
+        hideResultsStatus();
+        resultData.page_error = false;
+        resultData.rows = resultData.rows.concat(data.rows);
+        resultData.count = resultData.rows.length;
+        resultData.has_more = data.has_more;
+        resultData.next_token = data.next_token;
+
+        applySort();
+        updateResultsInfo(resultData);
+        renderVisibleRows(true);
+    })
+    .catch(error => {
+        if (resultData === currentResultData) {
+            showPageError(resultData, { error: 'Erreur de connexion: ' + error.message });
+        }
+    })
+    .finally(() => {
+        loadingNextPage = false;
+    });
+}
+
+// erreur sur une page suivante : message sous le tableau, les lignes déjà chargées restent
+function showPageError(resultData, data) {
+    resultData.page_error = true;
+    updateResultsInfo(resultData);  // remet le bouton "Page suivante"
+    if (data.stale_token) {
+        // données mises à jour depuis la première page : les pages suivantes seraient décalées
+        showResultsStatus(data.error, true, [{ label: 'Relancer la requête', onClick: rerunQuery }]);
+    } else {
+        showResultsStatus(data.error, true, [{ label: 'Réessayer', onClick: loadNextPage }]);
+    }
+}
+
+// relance depuis la première page la requête affichée (même si l'éditeur a changé depuis)
+function rerunQuery() {
+    if (!currentQuery) {
+        return;
+    }
+    document.getElementById('queryTextarea').value = currentQuery.query;
+    document.getElementById('engineSelect').value = currentQuery.engine;
+    executeQuery();
+}
+
+function updateResultsInfo(data) {
     const resultsInfo = document.getElementById('results-info');
+    const more = data.has_more ? '+' : '';
+    const source = data.cached ? `${data.engine}, cache` : data.engine;
     
-    // Créer le contenu avec le message et le bouton (si il y a des résultats)
-    if (data.data.length > 0) {
+    // Créer le contenu avec le message et les boutons (si il y a des résultats)
+    if (data.rows.length > 0) {
         resultsInfo.innerHTML = `
-            <span>${data.count} résultat(s) trouvé(s)</span>
-            <button class="download-csv-btn" onclick="downloadCSV()" title="Télécharger en CSV">
-                Télécharger CSV
-            </button>
+            <span>${data.count}${more} résultat(s) trouvé(s) (${source})</span>
+            <div class="results-actions">
+                ${data.has_more ? '<button id="next-page-btn" class="download-csv-btn" onclick="loadNextPage()" title="Charger la page suivante">Page suivante</button>' : ''}
+                <button class="download-csv-btn" onclick="downloadExport('csv')" title="Télécharger tout le résultat en CSV">
+                    Télécharger CSV
+                </button>
+                <button class="download-csv-btn" onclick="downloadExport('ndjson')" title="Télécharger tout le résultat en NDJSON">
+                    NDJSON
+                </button>
+            </div>
         `;
     } else {
-        resultsInfo.textContent = `${data.count} résultat(s) trouvé(s)`;
+        resultsInfo.textContent = `${data.count} résultat(s) trouvé(s) (${source})`;
     }
+}
+
+// rendu virtualisé : seules les lignes visibles (+ une marge) sont dans le DOM,
+// deux lignes vides au-dessus et en dessous donnent la hauteur totale du tableau
+const VIRTUAL_OVERSCAN = 15;     // lignes rendues en plus de chaque côté
+const PREFETCH_DISTANCE = 1500;  // px avant la fin du tableau pour charger la page suivante
+const MAX_COLUMN_WIDTH = 400;    // px, les valeurs plus longues sont coupées (...)
+let rowHeight = 40;              // mesurée sur la première ligne affichée
+let renderedRange = { start: -1, end: -1 };
+let resultSort = { column: null, descending: false };
+let loadingNextPage = false;
+let scrollFrameRequested = false;
+const sortCollator = new Intl.Collator('fr', { numeric: true });
+
+function onResultsScroll() {
+    if (scrollFrameRequested) {
+        return;
+    }
+    scrollFrameRequested = true;
+    requestAnimationFrame(() => {
+        scrollFrameRequested = false;
+        renderVisibleRows(false);
+    });
+}
+
+// résultats au format compact : une ligne = un tableau de valeurs dans l'ordre des colonnes
+function createResultRow(row) {
+    const tr = document.createElement('tr');
+    row.forEach(value => {
+        const td = document.createElement('td');
+        td.textContent = value !== null && value !== undefined ? value : '';
+        tr.appendChild(td);
+    });
+    return tr;
+}
+
+function createSpacerRow(height, columnCount) {
+    const tr = document.createElement('tr');
+    tr.className = 'spacer-row';
+    const td = document.createElement('td');
+    td.colSpan = columnCount;
+    td.style.height = `${height}px`;
+    tr.appendChild(td);
+    return tr;
+}
+
+function renderVisibleRows(force) {
+    const data = currentResultData;
+    if (!data || data.rows.length === 0) {
+        return;
+    }
+
+    const container = document.querySelector('#results .table-container');
+    const headerHeight = document.getElementById('results-header').offsetHeight;
+    const top = Math.max(container.scrollTop - headerHeight, 0);
+    const start = Math.max(Math.floor(top / rowHeight) - VIRTUAL_OVERSCAN, 0);
+    const end = Math.min(Math.ceil((top + container.clientHeight) / rowHeight) + VIRTUAL_OVERSCAN, data.rows.length);
+
+    if (force || start !== renderedRange.start || end !== renderedRange.end) {
+        renderedRange = { start: start, end: end };
+        const fragment = document.createDocumentFragment();
+        fragment.appendChild(createSpacerRow(start * rowHeight, data.columns.length));
+        for (let i = start; i < end; i++) {
+            fragment.appendChild(createResultRow(data.rows[i]));
+        }
+        fragment.appendChild(createSpacerRow((data.rows.length - end) * rowHeight, data.columns.length));
+        document.getElementById('results-body').replaceChildren(fragment);
+    }
+
+    // chargement de la page suivante avant d'arriver en bas (pas après une erreur : bouton Réessayer)
+    if (data.has_more && !data.page_error && container.scrollHeight - container.scrollTop - container.clientHeight < PREFETCH_DISTANCE) {
+        loadNextPage();
+    }
+}
+
+// largeurs de colonnes figées d'après les premières lignes, pour qu'elles ne bougent pas au scroll
+function lockColumnWidths() {
+    const table = document.getElementById('results-table');
+    const headers = document.querySelectorAll('#results-header th');
+    const widths = Array.from(headers, th => Math.min(th.offsetWidth, MAX_COLUMN_WIDTH));
+    headers.forEach((th, i) => {
+        th.style.width = `${widths[i]}px`;
+    });
+    table.style.width = `${widths.reduce((total, width) => total + width, 0)}px`;
+    table.style.tableLayout = 'fixed';
+}
+
+function resetColumnWidths() {
+    const table = document.getElementById('results-table');
+    table.style.width = '';
+    table.style.tableLayout = '';
+}
+
+// tri côté client sur les lignes déjà chargées (nulls toujours à la fin)
+function applySort() {
+    if (resultSort.column === null || !currentResultData) {
+        return;
+    }
+    const index = resultSort.column;
+    const direction = resultSort.descending ? -1 : 1;
+    currentResultData.rows.sort((rowA, rowB) => {
+        const a = rowA[index];
+        const b = rowB[index];
+        const aMissing = a === null || a === undefined;
+        const bMissing = b === null || b === undefined;
+        if (aMissing || bMissing) {
+            return aMissing - bMissing;
+        }
+        if (typeof a === 'number' && typeof b === 'number') {
+            return direction * (a - b);
+        }
+        return direction * sortCollator.compare(String(a), String(b));
+    });
+}
+
+function sortResults(columnIndex) {
+    if (resultSort.column === columnIndex) {
+        resultSort.descending = !resultSort.descending;
+    } else {
+        resultSort = { column: columnIndex, descending: false };
+    }
+    applySort();
+
+    document.querySelectorAll('#results-header th').forEach((th, i) => {
+        const indicator = i === resultSort.column ? (resultSort.descending ? ' ▼' : ' ▲') : '';
+        th.textContent = currentResultData.columns[i] + indicator;
+    });
+    renderVisibleRows(true);
+}
+
+function showResults(data) {
+    document.getElementById('error').style.display = 'none';
+    document.getElementById('results').style.display = 'block';
+    hideResultsStatus();
+
+    // Stocker les données (tri, pages suivantes, téléchargement)
+    currentResultData = data;
+    resultSort = { column: null, descending: false };
+    renderedRange = { start: -1, end: -1 };
+
+    updateResultsInfo(data);
 
     const header = document.getElementById('results-header');
     const body = document.getElementById('results-body');
 
     header.innerHTML = '';
     body.innerHTML = '';
+    resetColumnWidths();
+    document.querySelector('#results .table-container').scrollTop = 0;
 
-    if (data.data.length === 0) {
+    if (data.rows.length === 0) {
         body.innerHTML = '<tr><td colspan="100%">Aucun résultat</td></tr>';
         return;
     }
 
     const headerRow = document.createElement('tr');
-    data.columns.forEach(column => {
+    data.columns.forEach((column, i) => {
         const th = document.createElement('th');
         th.textContent = column;
+        th.title = 'Trier (sur les lignes chargées)';
+        th.onclick = () => sortResults(i);
         headerRow.appendChild(th);
     });
     header.appendChild(headerRow);
 
-    data.data.forEach(row => {
-        const tr = document.createElement('tr');
-        data.columns.forEach(column => {
-            const td = document.createElement('td');
-            const value = row[column];
-            td.textContent = value !== null && value !== undefined ? value : '';
-            tr.appendChild(td);
-        });
-        body.appendChild(tr);
-    });
+    renderVisibleRows(true);
+    const firstRow = body.querySelector('tr:not(.spacer-row)');
+    if (firstRow && firstRow.offsetHeight > 0) {
+        rowHeight = firstRow.offsetHeight;
+    }
+    lockColumnWidths();
+    renderVisibleRows(true);
 }
 
 function showError(message) {
@@ -423,56 +672,155 @@ function showError(message) {
     document.getElementById('error-message').textContent = message;
 }
 
+// plan d'exécution (EXPLAIN QUERY PLAN) et coût estimé renvoyés par le serveur
+function renderPlan(data) {
+    const planSection = document.getElementById('query-plan');
+    if (!data.plan || data.plan.length === 0) {
+        planSection.style.display = 'none';
+        return;
+    }
+
+    const cost = Number(data.estimated_cost || 0);
+    document.getElementById('query-plan-summary').textContent =
+        `Plan d'exécution (coût estimé : ~${cost.toExponential(2)} lignes visitées)`;
+
+    const warnings = document.getElementById('query-plan-warnings');
+    warnings.innerHTML = '';
+    (data.warnings || []).forEach(warning => {
+        const div = document.createElement('div');
+        div.className = 'query-plan-warning';
+        div.textContent = warning;
+        warnings.appendChild(div);
+    });
+
+    // indentation selon la profondeur de chaque noeud dans l'arbre (parent -> enfants)
+    const depths = { 0: -1 };
+    const lines = data.plan.map(node => {
+        const depth = (depths[node.parent] !== undefined ? depths[node.parent] : -1) + 1;
+        depths[node.id] = depth;
+        return '  '.repeat(depth) + (depth > 0 ? '└─ ' : '') + node.detail;
+    });
+    document.getElementById('query-plan-tree').textContent = lines.join('\n');
+
+    const highlighted = data.cost_level === 'warning' || Boolean(data.error);
+    planSection.classList.toggle('query-plan-alert', highlighted);
+    planSection.open = highlighted;
+    planSection.style.display = 'block';
+}
+
 // variable pour stocker les dernières données de résultat
 let currentResultData = null;
 
-function downloadCSV() {
-    if (!currentResultData || !currentResultData.data || currentResultData.data.length === 0) {
+// message sous le tableau (export, page suivante) : les lignes chargées restent affichées
+// `actions` : boutons [{ label, onClick }]
+function showResultsStatus(message, isError, actions) {
+    const status = document.getElementById('results-status');
+    status.innerHTML = '';
+    status.classList.toggle('results-status-error', Boolean(isError));
+
+    const text = document.createElement('span');
+    text.textContent = message;
+    status.appendChild(text);
+
+    const buttons = document.createElement('div');
+    buttons.className = 'results-actions';
+    (actions || []).forEach(action => {
+        const button = document.createElement('button');
+        button.className = 'download-csv-btn';
+        button.textContent = action.label;
+        button.onclick = action.onClick;
+        buttons.appendChild(button);
+    });
+    status.appendChild(buttons);
+    status.style.display = 'flex';
+}
+
+function hideResultsStatus() {
+    document.getElementById('results-status').style.display = 'none';
+}
+
+// export en cours (un seul à la fois), annulable comme une requête
+let currentExport = null;
+
+// export complet côté serveur (streaming, pas limité aux lignes déjà chargées)
+function downloadExport(format) {
+    if (!currentQuery || !currentResultData) {
         alert('Aucune donnée à télécharger');
         return;
     }
+    if (currentExport) {
+        alert('Un export est déjà en cours');
+        return;
+    }
 
-    // Créer le contenu CSV
-    let csvContent = '';
-    
-    // Ajouter l'en-tête (noms des colonnes)
-    csvContent += currentResultData.columns.join(',') + '\n';
-    
-    // Ajouter les données
-    currentResultData.data.forEach(row => {
-        const rowData = currentResultData.columns.map(column => {
-            let value = row[column];
-            
-            // Gérer les valeurs nulles/undefined
-            if (value === null || value === undefined) {
-                value = '';
-            }
-            
-            // Échapper les guillemets et encapsuler les valeurs contenant des virgules ou des guillemets
-            value = String(value);
-            if (value.includes(',') || value.includes('"') || value.includes('\n')) {
-                value = '"' + value.replace(/"/g, '""') + '"';
-            }
-            
-            return value;
+    const exportRequest = {
+        query: currentQuery.query,
+        engine: currentResultData.engine || currentQuery.engine,
+        format: format,
+        query_id: newQueryId(),
+        controller: new AbortController(),
+    };
+    currentExport = exportRequest;
+    showResultsStatus(`Export ${format.toUpperCase()} en cours...`, false, [
+        { label: 'Annuler', onClick: () => cancelExport(exportRequest) }
+    ]);
+
+    // fetch plutôt qu'un formulaire : les erreurs (400, 503 serveur occupé) sont lisibles
+    fetch('/api/export', {
+        method: 'POST',
+        headers: {
+            'Content-Type': 'application/json',
+        },
+        body: JSON.stringify({
+            query: exportRequest.query,
+            engine: exportRequest.engine,
+            format: exportRequest.format,
+            query_id: exportRequest.query_id,
+        }),
+        signal: exportRequest.controller.signal
+    })
+    .then(response => {
+        if (!response.ok) {
+            return response.json()
+            .catch(() => ({}))
+            .then(data => {
+                throw new Error(data.error || `Erreur ${response.status}`);
+            });
+        }
+        const disposition = response.headers.get('Content-Disposition') || '';
+        const match = disposition.match(/filename="([^"]+)"/);
+        const filename = match ? match[1] : `resultats_requete.${format}`;
+        return response.blob().then(blob => {
+            const url = URL.createObjectURL(blob);
+            const link = document.createElement('a');
+            link.href = url;
+            link.download = filename;
+            document.body.appendChild(link);
+            link.click();
+            document.body.removeChild(link);
+            URL.revokeObjectURL(url);
+            hideResultsStatus();
         });
-        csvContent += rowData.join(',') + '\n';
+    })
+    .catch(error => {
+        if (exportRequest.cancelled) {
+            showResultsStatus('Export annulé', false);
+        } else {
+            showResultsStatus('Export impossible : ' + error.message, true);
+        }
+    })
+    .finally(() => {
+        if (currentExport === exportRequest) {
+            currentExport = null;
+        }
     });
+}
 
-    // Créer le blob et déclencher le téléchargement
-    const blob = new Blob([csvContent], { type: 'text/csv;charset=utf-8;' });
-    const link = document.createElement('a');
-    
-    if (link.download !== undefined) {
-        const url = URL.createObjectURL(blob);
-        link.setAttribute('href', url);
-        link.setAttribute('download', `resultats_requete_${new Date().toISOString().slice(0, 19).replace(/:/g, '-')}.csv`);
-        link.style.visibility = 'hidden';
-        document.body.appendChild(link);
-        link.click();
-        document.body.removeChild(link);
-        URL.revokeObjectURL(url);
-    }
+// arrête l'export côté serveur (requête sqlite interrompue) et le téléchargement
+function cancelExport(exportRequest) {
+    exportRequest.cancelled = true;
+    cancelQuery(exportRequest.query_id);
+    exportRequest.controller.abort();
 }
 
 function clearQuery() {